@@ -3,13 +3,73 @@
 负责后续的数据清洗和结构化处理
 """
 
+import os
 import re
 import logging
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .corpus import get_corpus
+from .crawl_cache import content_hash
 
 logger = logging.getLogger(__name__)
 
+# 子进程中复用的清洗器（每个进程只编译一次正则）
+_worker_cleaner = None
+
+
+def _write_atomic(filepath: Path, content: str):
+    """先写临时文件再替换，避免中断时留下半截文件"""
+    tmp_path = filepath.with_name(filepath.name + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp_path, filepath)
+
+
+def _clean_chunk(paths: List[str], known_hashes: Dict[str, str],
+                 cleaner: Optional["RegulationCleaner"] = None) -> List[Tuple]:
+    """
+    清洗一组文件（在子进程中执行）
+
+    Args:
+        paths: 文件路径列表
+        known_hashes: 清单中记录的已清洗内容哈希（文件名 -> 哈希）
+        cleaner: 使用的清洗器，None表示使用进程内复用的默认清洗器
+
+    Returns:
+        每个文件的 (文件名, 状态, 大小, 修改时间ns, 内容哈希)，状态为 cleaned/unchanged/failed
+    """
+    global _worker_cleaner
+    if cleaner is None:
+        if _worker_cleaner is None:
+            _worker_cleaner = RegulationCleaner()
+        cleaner = _worker_cleaner
+
+    results = []
+    for path in paths:
+        filepath = Path(path)
+        try:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                content = f.read()
+
+            digest = content_hash(content)
+            status = "unchanged"
+            # 内容与上次清洗结果一致（只是修改时间变了）时不再清洗
+            if known_hashes.get(filepath.name) != digest:
+                cleaned = cleaner.clean_text(content)
+                if cleaned != content:
+                    _write_atomic(filepath, cleaned)
+                    digest = content_hash(cleaned)
+                    status = "cleaned"
+
+            stat = filepath.stat()
+            results.append((filepath.name, status, stat.st_size, stat.st_mtime_ns, digest))
+        except Exception as e:
+            logger.error(f"清洗失败 {filepath}: {e}")
+            results.append((filepath.name, "failed", 0, 0, None))
+    return results
+
 
 class RegulationCleaner:
     """招生章程数据清洗器"""
@@ -39,10 +99,69 @@ class RegulationCleaner:
         r'^[0-9]+[、\.]',
     ]
 
+    # 章节标题合并表达式（与 CHAPTER_PATTERNS 一致，命名分组区分章/条/编号条目）
+    HEADING_PATTERN = (
+        r'(?P<chapter>第(?:[一二三四五六七八九十百]+|[0-9]+)章)'
+        r'|(?P<article>第(?:[一二三四五六七八九十百]+|[0-9]+)条)'
+        r'|(?P<item>(?:[一二三四五六七八九十百]+|[0-9]+)[、\.])'
+    )
+
+    # 标题层级（数字越小层级越高）
+    HEADING_LEVELS = {"chapter": 1, "article": 2, "item": 3}
+
+    # 联系信息字段：(标签列表（按优先级）, 值模式)
+    CONTACT_FIELDS = {
+        "phone": (["电话", "联系电话", "招生电话"], r'[0-9\-—()()]{7,20}'),
+        "email": (["邮箱", "E-mail", "Email"], r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'),
+        "website": (["网址", "网站", "官网"], r'https?://[a-zA-Z0-9.-]+(?:\.[a-zA-Z]{2,})?(?:/[^\s]*)?'),
+        "address": (["地址", "学校地址", "通讯地址"], r'[^。\n]{10,100}'),
+    }
+
     def __init__(self):
         """初始化清洗器"""
         self.compiled_patterns = [re.compile(p, re.MULTILINE) for p in self.USELESS_PATTERNS]
         self.chapter_patterns = [re.compile(p) for p in self.CHAPTER_PATTERNS]
+        # 标题行：以换行开头（字面量前缀让正则引擎快速跳到行首），匹配到行尾；
+        # 文本第一行没有前导换行，单独匹配
+        self.heading_pattern = re.compile(rf'\n[^\S\n]*(?:{self.HEADING_PATTERN})[^\n]*')
+        self.first_heading_pattern = re.compile(rf'[^\S\n]*(?:{self.HEADING_PATTERN})[^\n]*')
+
+        # 每个模式的字面量前缀：文本中不含该字面量时跳过这个模式的扫描
+        self.useless_guards = [
+            (self._literal_prefixes(p), compiled)
+            for p, compiled in zip(self.USELESS_PATTERNS, self.compiled_patterns)
+        ]
+        # 所有字面量的预筛选表达式：一次扫描判断是否需要逐个模式处理
+        self.useless_prefilter = re.compile('|'.join(
+            re.escape(literal) for literals, _ in self.useless_guards for literal in literals))
+        self.space_pattern = re.compile(r'[ \t]{2,}|\t')
+        self.blank_lines_pattern = re.compile(r'\n{3,}')
+
+        self.contact_pattern, self.contact_groups = self._build_contact_pattern()
+
+    @staticmethod
+    def _literal_prefixes(pattern: str) -> List[str]:
+        """取模式各分支开头的字面量（遇到第一个正则元字符为止）"""
+        return [re.split(r'[.*+?()\[\]{}\\^$]', branch, maxsplit=1)[0]
+                for branch in pattern.split('|')]
+
+    def _build_contact_pattern(self) -> Tuple["re.Pattern", Dict[str, Tuple[str, int]]]:
+        """
+        把所有联系信息模式合并为一个表达式，每个分支的值用命名分组区分字段和标签优先级
+
+        包含更高优先级标签的标签（如"联系电话"包含"电话"）不单独成分支：
+        高优先级标签的模式在同一位置一定也能匹配，结果相同。
+        """
+        branches = []
+        groups = {}
+        for field, (labels, value) in self.CONTACT_FIELDS.items():
+            for rank, label in enumerate(labels):
+                if any(earlier in label for earlier in labels[:rank]):
+                    continue
+                group = f"{field}_{rank}"
+                groups[group] = (field, rank)
+                branches.append(rf'{re.escape(label)}[：:]\s*(?P<{group}>{value})')
+        return re.compile('|'.join(branches)), groups
 
     def clean_text(self, text: str) -> str:
         """
@@ -57,25 +176,85 @@ class RegulationCleaner:
         if not text:
             return ""
 
-        # 移除无关内容
-        for pattern in self.compiled_patterns:
-            text = pattern.sub('', text)
+        # 移除无关内容：预筛选一次扫描，只对实际出现字面量的模式执行替换
+        # （按原顺序逐个替换，保证与多次 re.sub 的结果一致）
+        if self.useless_prefilter.search(text):
+            for literals, pattern in self.useless_guards:
+                if any(literal in text for literal in literals):
+                    text = pattern.sub('', text)
 
-        # 清理多余空白
-        text = re.sub(r'[ \t]+', ' ', text)  # 空格和tab
-        text = re.sub(r'\n\s*\n', '\n\n', text)  # 多余空行
-        text = re.sub(r'\r\n', '\n', text)  # 统一换行符
-
-        # 移除行首行尾空白
-        lines = [line.strip() for line in text.split('\n')]
-        text = '\n'.join(lines)
+        # 清理空白：连续空格/tab合并为一个空格、去除行首行尾空白（含\r）、连续空行合并为一个
+        if '\t' in text or '  ' in text:
+            text = self.space_pattern.sub(' ', text)
+        text = '\n'.join([line.strip() for line in text.split('\n')])
+        if '\n\n\n' in text:
+            text = self.blank_lines_pattern.sub('\n\n', text)
 
         # 移除过短的行（可能是噪音）
-        # lines = [line for line in text.split('\n') if len(line) >= 3]
-        # text = '\n'.join(lines)
+        # lines = [line for line in lines if len(line) >= 3]
 
         return text.strip()
 
+    def iter_headings(self, text: str) -> Iterator[Dict]:
+        """
+        逐个产出章节标题（一次正则扫描，不拆分全文）
+
+        Args:
+            text: 章程文本
+
+        Yields:
+            标题信息：type（chapter/article/item）、level、start（标题行起点）、
+            title_start/title_end（去除首尾空白后的标题范围）、body_start（标题行结束位置）
+        """
+        first = self.first_heading_pattern.match(text)
+        if first:
+            yield self._heading(text, first, 0)
+
+        for match in self.heading_pattern.finditer(text):
+            yield self._heading(text, match, match.start() + 1)
+
+    def _heading(self, text: str, match: "re.Match", start: int) -> Dict:
+        """由标题行匹配结果构建标题信息"""
+        kind = match.lastgroup
+        title_start = match.start(kind)
+        line_end = match.end()
+        return {
+            "type": kind,
+            "level": self.HEADING_LEVELS[kind],
+            "start": start,
+            "title_start": title_start,
+            "title_end": title_start + len(text[title_start:line_end].rstrip()),
+            "body_start": line_end,
+        }
+
+    def segment(self, text: str) -> Dict:
+        """
+        把章程切分为 章→条→条目 的嵌套结构，只记录字符偏移不复制文本
+
+        每个节点包含 type、level、start/end（整节范围，直到下一个同级或更高级标题）、
+        title_start/title_end、body_start 和 children。根节点 type 为 document，
+        第一个标题之前的内容是根节点的 [0, children[0]["start"]) 部分。
+
+        Args:
+            text: 章程文本
+
+        Returns:
+            根节点
+        """
+        root = {"type": "document", "level": 0, "start": 0, "end": len(text),
+                "title_start": 0, "title_end": 0, "body_start": 0, "children": []}
+        stack = [root]
+
+        for heading in self.iter_headings(text):
+            while stack[-1]["level"] >= heading["level"]:
+                stack.pop()["end"] = heading["start"]
+
+            node = dict(heading, end=len(text), children=[])
+            stack[-1]["children"].append(node)
+            stack.append(node)
+
+        return root
+
     def extract_chapters(self, text: str) -> List[Dict]:
         """
         提取章节结构
@@ -87,52 +266,21 @@ class RegulationCleaner:
             章节列表，每个章节包含标题和内容
         """
         chapters = []
-        lines = text.split('\n')
-
-        current_chapter = None
-        current_content = []
-
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-
-            # 检查是否是章节标题
-            is_chapter = False
-            for pattern in self.chapter_patterns:
-                if pattern.match(line):
-                    is_chapter = True
-                    break
-
-            if is_chapter:
-                # 保存上一章
-                if current_chapter:
-                    chapters.append({
-                        "title": current_chapter,
-                        "content": '\n'.join(current_content).strip()
-                    })
-
-                current_chapter = line
-                current_content = []
-            else:
-                if current_chapter:
-                    current_content.append(line)
-                else:
-                    # 第一章之前的内容
-                    current_content.append(line)
-
-        # 保存最后一章
-        if current_chapter:
+        headings = list(self.iter_headings(text))
+
+        for i, heading in enumerate(headings):
+            end = headings[i + 1]["start"] if i + 1 < len(headings) else len(text)
+            body = text[heading["body_start"]:end]
             chapters.append({
-                "title": current_chapter,
-                "content": '\n'.join(current_content).strip()
+                "title": text[heading["title_start"]:heading["title_end"]],
+                "content": '\n'.join(line.strip() for line in body.split('\n') if line.strip())
             })
 
         return chapters
 
     def extract_contact_info(self, text: str) -> Dict[str, Optional[str]]:
         """
-        提取联系信息
+        提取联系信息（一次扫描找出全部字段）
 
         Args:
             text: 章程文本
@@ -140,63 +288,38 @@ class RegulationCleaner:
         Returns:
             联系信息字典
         """
-        contact_info = {
-            "phone": None,
-            "email": None,
-            "website": None,
-            "address": None
-        }
-
-        # 提取电话
-        phone_patterns = [
-            r'电话[：:]\s*([0-9\-—()()]{7,20})',
-            r'联系电话[：:]\s*([0-9\-—()()]{7,20})',
-            r'招生电话[：:]\s*([0-9\-—()()]{7,20})',
-        ]
-        for pattern in phone_patterns:
-            match = re.search(pattern, text)
-            if match:
-                contact_info["phone"] = match.group(1).strip()
+        contact_info = {field: None for field in self.CONTACT_FIELDS}
+        # 每个字段已找到的最高优先级（标签序号越小优先级越高）
+        found_rank = {}
+
+        pos = 0
+        while len(found_rank) < len(self.CONTACT_FIELDS) or any(found_rank.values()):
+            match = self.contact_pattern.search(text, pos)
+            if not match:
                 break
 
-        # 提取邮箱
-        email_patterns = [
-            r'邮箱[：:]\s*([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})',
-            r'E-mail[：:]\s*([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})',
-            r'Email[：:]\s*([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})',
-        ]
-        for pattern in email_patterns:
-            match = re.search(pattern, text)
-            if match:
-                contact_info["email"] = match.group(1).strip()
-                break
+            field, rank = self.contact_groups[match.lastgroup]
+            if rank < found_rank.get(field, len(self.CONTACT_FIELDS[field][0])):
+                contact_info[field] = match.group(match.lastgroup).strip()
+                found_rank[field] = rank
 
-        # 提取网址
-        website_patterns = [
-            r'网址[：:]\s*(https?://[a-zA-Z0-9.-]+(?:\.[a-zA-Z]{2,})?(?:/[^\s]*)?)',
-            r'网站[：:]\s*(https?://[a-zA-Z0-9.-]+(?:\.[a-zA-Z]{2,})?(?:/[^\s]*)?)',
-            r'官网[：:]\s*(https?://[a-zA-Z0-9.-]+(?:\.[a-zA-Z]{2,})?(?:/[^\s]*)?)',
-        ]
-        for pattern in website_patterns:
-            match = re.search(pattern, text)
-            if match:
-                contact_info["website"] = match.group(1).strip()
-                break
-
-        # 提取地址
-        address_patterns = [
-            r'地址[：:]\s*([^。\n]{10,100})',
-            r'学校地址[：:]\s*([^。\n]{10,100})',
-            r'通讯地址[：:]\s*([^。\n]{10,100})',
-        ]
-        for pattern in address_patterns:
-            match = re.search(pattern, text)
-            if match:
-                contact_info["address"] = match.group(1).strip()
-                break
+            # 从值的开头继续扫描（值中可能包含其他字段的标签，如地址后紧跟电话）
+            pos = match.start(match.lastgroup)
 
         return contact_info
 
+    def extract_contact_info_batch(self, texts: Iterable[str]) -> List[Dict[str, Optional[str]]]:
+        """
+        批量提取联系信息
+
+        Args:
+            texts: 章程文本序列
+
+        Returns:
+            与输入顺序一致的联系信息字典列表
+        """
+        return [self.extract_contact_info(text) for text in texts]
+
     def clean_md_file(self, filepath: Path) -> bool:
         """
         清洗单个MD文件
@@ -214,9 +337,9 @@ class RegulationCleaner:
             # 清洗内容
             cleaned = self.clean_text(content)
 
-            # 写回文件
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(cleaned)
+            # 写回文件（内容未变化时不写）
+            if cleaned != content:
+                _write_atomic(Path(filepath), cleaned)
 
             logger.debug(f"已清洗: {filepath.name}")
             return True
@@ -225,39 +348,78 @@ class RegulationCleaner:
             logger.error(f"清洗失败 {filepath}: {e}")
             return False
 
-    def batch_clean(self, directory: str = "details") -> Dict:
+    def batch_clean(self, directory: str = "details", workers: Optional[int] = None,
+                    use_manifest: bool = True) -> Dict:
         """
         批量清洗MD文件
 
+        目录清单（与其他全量任务共用）中大小和修改时间都未变化、且标记为已清洗的文件直接跳过（不读取）；
+        其余文件按块分发到进程池，内容与上次清洗结果哈希一致或清洗后无变化的文件不重写。
+
         Args:
             directory: MD文件目录
+            workers: 进程数，None表示CPU核数，<=1 表示在当前进程顺序执行
+            use_manifest: 是否使用目录清单跳过已清洗的文件
 
         Returns:
             统计信息
         """
-        dir_path = Path(directory)
-        md_files = list(dir_path.glob("*.md"))
-
-        logger.info(f"开始批量清洗: 共 {len(md_files)} 个文件")
-
-        success_count = 0
-        fail_count = 0
-
-        for md_file in md_files:
-            if self.clean_md_file(md_file):
-                success_count += 1
+        corpus = get_corpus(directory)
+        corpus.refresh()
+        md_files = corpus.names()
+
+        if use_manifest:
+            cleaned = {name: record["hash"] for name, record in corpus.manifest.items() if record.get("cleaned")}
+            pending = [name for name in md_files if not (name in cleaned and corpus.is_fresh(name))]
+        else:
+            cleaned = {}
+            pending = md_files
+
+        logger.info(f"开始批量清洗: 共 {len(md_files)} 个文件，待检查 {len(pending)} 个")
+
+        results = self._run_clean([str(corpus.directory / name) for name in pending], cleaned, workers)
+
+        counts = {"cleaned": 0, "unchanged": 0, "failed": 0}
+        for name, status, size, mtime_ns, digest in results:
+            counts[status] += 1
+            if status == "failed":
+                corpus.forget(name)
             else:
-                fail_count += 1
+                corpus.record(name, size, mtime_ns, digest, cleaned=True)
+        corpus.save_manifest()
 
         result = {
             "total": len(md_files),
-            "success": success_count,
-            "failed": fail_count
+            "success": len(md_files) - counts["failed"],
+            "failed": counts["failed"],
+            "cleaned": counts["cleaned"],
+            "skipped": len(md_files) - counts["cleaned"] - counts["failed"],
         }
 
         logger.info(f"批量清洗完成: {result}")
         return result
 
+    def _run_clean(self, paths: List[str], known_hashes: Dict[str, str],
+                   workers: Optional[int]) -> List[Tuple]:
+        """按块分发清洗任务，返回所有文件的清洗结果"""
+        if not paths:
+            return []
+
+        workers = workers or os.cpu_count() or 1
+        workers = min(workers, len(paths))
+        if workers <= 1:
+            return _clean_chunk(paths, known_hashes, self)
+
+        # 每个进程分到约4块，兼顾负载均衡和进程间通信开销
+        chunk_size = max(1, len(paths) // (workers * 4))
+        chunks = [paths[i:i + chunk_size] for i in range(0, len(paths), chunk_size)]
+
+        results = []
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for chunk_results in executor.map(_clean_chunk, chunks, [known_hashes] * len(chunks)):
+                results.extend(chunk_results)
+        return results
+
     def validate_content(self, text: str, min_length: int = 100) -> Dict:
         """
         验证内容质量
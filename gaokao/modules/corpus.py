@@ -0,0 +1,224 @@
+"""
+语料读取模块
+MD目录（details/、tables/、special/）的共享读取器：一次目录扫描列出文件，线程池并行读取
+（大文件用 mmap），按顺序惰性返回 (学校名称, 内容)；目录清单（.corpus_manifest.json）
+记录每个文件的大小、修改时间和内容哈希，清洗、合并、统计等全量任务共用同一份清单
+"""
+
+import json
+import logging
+import mmap
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .crawl_cache import content_hash
+
+logger = logging.getLogger(__name__)
+
+# 目录清单文件名（保存在MD目录中）
+CORPUS_MANIFEST = ".corpus_manifest.json"
+
+# 读取线程数
+READ_WORKERS = 8
+
+# 超过该大小的文件用 mmap 读取
+MMAP_THRESHOLD = 1 << 20
+
+# 同一目录在同一进程内共用一个读取器
+_readers: Dict[Path, "CorpusReader"] = {}
+
+
+def read_text(path, size: Optional[int] = None) -> str:
+    """
+    读取UTF-8文本文件，换行统一为 \\n（与文本模式 open 一致）
+
+    Args:
+        path: 文件路径
+        size: 文件大小，None表示读取前获取
+
+    Returns:
+        文件内容
+    """
+    if size is None:
+        size = os.path.getsize(path)
+    if size < MMAP_THRESHOLD:
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        text = str(mm[:], 'utf-8')
+    return text.replace('\r\n', '\n').replace('\r', '\n')
+
+
+def get_corpus(directory) -> "CorpusReader":
+    """取得目录的共享读取器（同一进程内同一目录只扫描、只加载一次清单）"""
+    key = Path(directory).resolve()
+    if key not in _readers:
+        _readers[key] = CorpusReader(directory)
+    return _readers[key]
+
+
+class CorpusReader:
+    """MD目录读取器"""
+
+    def __init__(self, directory, suffix: str = ".md", workers: int = READ_WORKERS):
+        """
+        初始化读取器
+
+        Args:
+            directory: MD文件目录
+            suffix: 文件后缀
+            workers: 读取线程数
+        """
+        self.directory = Path(directory)
+        self.suffix = suffix
+        self.workers = workers
+        self.manifest_path = self.directory / CORPUS_MANIFEST
+        self._stats: Optional[Dict[str, Tuple[int, int]]] = None
+        self._manifest: Optional[Dict[str, Dict]] = None
+        self._dirty = False
+
+    # ---------- 目录扫描 ----------
+
+    def refresh(self) -> Dict[str, Tuple[int, int]]:
+        """重新扫描目录：{文件名: (大小, 修改时间ns)}"""
+        stats = {}
+        if self.directory.is_dir():
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if entry.name.endswith(self.suffix) and entry.is_file():
+                        stat = entry.stat()
+                        stats[entry.name] = (stat.st_size, stat.st_mtime_ns)
+        self._stats = stats
+        return stats
+
+    @property
+    def stats(self) -> Dict[str, Tuple[int, int]]:
+        """最近一次扫描结果（首次访问时扫描）"""
+        if self._stats is None:
+            self.refresh()
+        return self._stats
+
+    def names(self) -> List[str]:
+        """文件名列表（排序）"""
+        return sorted(self.stats)
+
+    def school_names(self) -> List[str]:
+        """学校名称列表（文件名去掉后缀）"""
+        return [name[:-len(self.suffix)] for name in self.names()]
+
+    def paths(self) -> List[Path]:
+        """文件路径列表"""
+        return [self.directory / name for name in self.names()]
+
+    # ---------- 目录清单 ----------
+
+    @property
+    def manifest(self) -> Dict[str, Dict]:
+        """目录清单：{文件名: {size, mtime_ns, hash, cleaned}}（不存在或损坏时为空）"""
+        if self._manifest is None:
+            self._manifest = {}
+            if self.manifest_path.exists():
+                try:
+                    with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                        self._manifest = json.load(f)
+                except (OSError, json.JSONDecodeError) as e:
+                    logger.warning(f"目录清单读取失败，将重新读取全部文件: {e}")
+        return self._manifest
+
+    def is_fresh(self, name: str) -> bool:
+        """清单记录与当前文件大小、修改时间一致"""
+        record = self.manifest.get(name)
+        stat = self.stats.get(name)
+        return (record is not None and stat is not None
+                and record["size"] == stat[0] and record["mtime_ns"] == stat[1])
+
+    def record(self, name: str, size: int, mtime_ns: int, digest: str,
+               cleaned: Optional[bool] = None):
+        """
+        更新文件的清单记录
+
+        Args:
+            name: 文件名
+            size: 文件大小
+            mtime_ns: 修改时间ns
+            digest: 内容哈希
+            cleaned: 内容是否已清洗，None表示内容未变时沿用原记录
+        """
+        previous = self.manifest.get(name)
+        if cleaned is None:
+            cleaned = bool(previous and previous.get("cleaned") and previous["hash"] == digest)
+        self.manifest[name] = {"size": size, "mtime_ns": mtime_ns, "hash": digest, "cleaned": cleaned}
+        if self._stats is not None:
+            self._stats[name] = (size, mtime_ns)
+        self._dirty = True
+
+    def forget(self, name: str):
+        """删除文件的清单记录"""
+        if self.manifest.pop(name, None) is not None:
+            self._dirty = True
+
+    def save_manifest(self):
+        """保存目录清单（只保留仍存在的文件，没有变化时不写入）"""
+        existing = self.stats
+        stale = [name for name in self.manifest if name not in existing]
+        for name in stale:
+            del self.manifest[name]
+        if not (self._dirty or stale):
+            return
+
+        tmp_path = self.manifest_path.with_name(self.manifest_path.name + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, ensure_ascii=False)
+        os.replace(tmp_path, self.manifest_path)
+        self._dirty = False
+
+    # ---------- 读取 ----------
+
+    def _read(self, name: str) -> str:
+        return read_text(self.directory / name, self.stats[name][0])
+
+    def iter_texts(self, names: Optional[Iterable[str]] = None) -> Iterator[Tuple[str, str]]:
+        """
+        线程池并行读取，按顺序惰性返回 (学校名称, 内容)，同时更新清单中的内容哈希
+
+        预读窗口为线程数的4倍，内存占用与文件总数无关；读取失败的文件记录日志后跳过
+
+        Args:
+            names: 要读取的文件名，None表示全部
+        """
+        names = self.names() if names is None else list(names)
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pending = deque()
+            for name in names:
+                pending.append((name, executor.submit(self._read, name)))
+                if len(pending) >= self.workers * 4:
+                    yield from self._take(pending)
+            while pending:
+                yield from self._take(pending)
+
+    def _take(self, pending: deque) -> Iterator[Tuple[str, str]]:
+        name, future = pending.popleft()
+        try:
+            text = future.result()
+        except Exception as e:
+            logger.error(f"读取失败 {self.directory / name}: {e}")
+            return
+        if not self.is_fresh(name):
+            self.record(name, *self.stats[name], content_hash(text))
+        yield name[:-len(self.suffix)], text
+
+    def hashes(self) -> Dict[str, str]:
+        """
+        全部文件的内容哈希：清单中未变化的文件直接使用记录，其余文件读取后计算
+
+        Returns:
+            {文件名: 内容哈希}
+        """
+        stale = [name for name in self.names() if not self.is_fresh(name)]
+        for _ in self.iter_texts(stale):
+            pass
+        return {name: self.manifest[name]["hash"] for name in self.names() if name in self.manifest}
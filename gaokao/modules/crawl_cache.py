@@ -0,0 +1,106 @@
+"""
+爬取缓存模块
+按URL记录 ETag / Last-Modified / 内容哈希，支持条件请求和增量重写
+"""
+
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(content: str) -> str:
+    """计算内容哈希（SHA-256）"""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class CrawlCache:
+    """爬取缓存管理器"""
+
+    def __init__(self, cache_path: str = "crawl_cache.json"):
+        """
+        初始化缓存
+
+        Args:
+            cache_path: 缓存JSON文件路径
+        """
+        self.cache_path = Path(cache_path)
+        self.entries: Dict[str, Dict] = {}
+        self._dirty = False
+
+    def load(self) -> "CrawlCache":
+        """从文件加载缓存（文件不存在时为空缓存）"""
+        if self.cache_path.exists():
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+            logger.info(f"已加载爬取缓存: {len(self.entries)} 条")
+        return self
+
+    def save(self):
+        """保存缓存（先写临时文件再替换，避免中断时损坏）"""
+        if not self._dirty:
+            return
+
+        tmp_path = self.cache_path.with_suffix(self.cache_path.suffix + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.cache_path)
+        self._dirty = False
+
+    def get(self, url: str) -> Optional[Dict]:
+        """获取URL的缓存记录"""
+        return self.entries.get(url)
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """
+        构建条件请求头
+
+        Args:
+            url: 目标URL
+
+        Returns:
+            If-None-Match / If-Modified-Since 请求头，无缓存时为空
+        """
+        entry = self.entries.get(url) or {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def update_validators(self, url: str, etag: Optional[str], last_modified: Optional[str]):
+        """记录服务器返回的 ETag / Last-Modified"""
+        entry = self.entries.setdefault(url, {})
+        entry["etag"] = etag
+        entry["last_modified"] = last_modified
+        entry["checked_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self._dirty = True
+
+    def content_changed(self, url: str, content: str) -> Optional[bool]:
+        """
+        判断内容是否与上次记录的哈希不同
+
+        Args:
+            url: 页面URL
+            content: 本次提取的内容
+
+        Returns:
+            变化返回True，未变化返回False，没有哈希记录返回None
+        """
+        entry = self.entries.get(url) or {}
+        if not entry.get("content_hash"):
+            return None
+        return entry["content_hash"] != content_hash(content)
+
+    def record_content(self, url: str, content: str):
+        """记录本次内容哈希"""
+        entry = self.entries.setdefault(url, {})
+        entry["content_hash"] = content_hash(content)
+        entry["updated_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self._dirty = True
@@ -4,13 +4,120 @@
 """
 
 import asyncio
-import random
+import os
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
 from playwright.async_api import async_playwright, Browser, Page, BrowserContext
-from typing import Optional, Dict, Any
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+from typing import Optional, Dict, Any, List, Sequence
 import logging
 
+from .blocker import ResourceBlocker
+from .rate_limiter import AdaptiveRateLimiter, classify_exception
+from .recycler import PageRecycler
+
 logger = logging.getLogger(__name__)
 
+# 章程正文开始标记（"招生章程"会出现在导航栏中，不能单独作为就绪依据）
+START_MARKER = "已经由上级主管部门审核通过"
+# 章程正文结束标记（页脚）
+END_MARKER = "学籍查询"
+# 正文就绪标记：出现任意一个即认为正文已渲染
+BODY_MARKERS = (START_MARKER, "第一章", "第一条", "总则")
+
+
+class FetchError(Exception):
+    """页面访问失败（kind 为错误类型：timeout/network/error_redirect/error）"""
+
+    def __init__(self, kind: str, message: str = ""):
+        super().__init__(message or kind)
+        self.kind = kind
+
+
+class ReadinessWaiter:
+    """
+    页面就绪等待策略
+
+    用"正文标记出现"代替固定sleep：标记一出现立即返回，
+    原来的固定等待时间只作为超时兜底，并统计每页节省的时间
+    """
+
+    READY_JS = """
+    ({markers, selectors, endMarkers}) => {
+        if (!document.body) return false;
+        const text = document.body.textContent || '';
+        const started = markers.some(m => text.includes(m)) ||
+                        selectors.some(s => document.querySelector(s) !== null);
+        return started && endMarkers.every(m => text.includes(m));
+    }
+    """
+
+    def __init__(self, markers: Sequence[str] = BODY_MARKERS, selectors: Sequence[str] = ("table",),
+                 end_markers: Sequence[str] = (), poll_interval: float = 0.1):
+        """
+        初始化等待策略
+
+        Args:
+            markers: 正文文本标记，出现任意一个即视为开始就绪
+            selectors: CSS选择器，匹配到任意元素也视为开始就绪
+            end_markers: 必须同时出现的结束标记（如页脚），保证正文完整
+            poll_interval: 轮询间隔（秒）
+        """
+        self.markers = list(markers)
+        self.selectors = list(selectors)
+        self.end_markers = list(end_markers)
+        self.poll_interval = poll_interval
+        self.stats = {"pages": 0, "ready": 0, "timeout": 0, "waited": 0.0, "saved": 0.0}
+
+    async def wait(self, page: Page, timeout: float) -> float:
+        """
+        等待页面正文就绪
+
+        Args:
+            page: Playwright Page对象（已完成goto）
+            timeout: 最长等待时间（秒），即原固定sleep时间
+
+        Returns:
+            实际等待时间（秒）
+        """
+        start = time.monotonic()
+        try:
+            await page.wait_for_function(
+                self.READY_JS,
+                arg={"markers": self.markers, "selectors": self.selectors, "endMarkers": self.end_markers},
+                timeout=timeout * 1000,
+                polling=int(self.poll_interval * 1000),
+            )
+            ready = True
+        except PlaywrightTimeoutError:
+            ready = False
+
+        waited = time.monotonic() - start
+        saved = max(timeout - waited, 0.0)
+
+        self.stats["pages"] += 1
+        self.stats["ready" if ready else "timeout"] += 1
+        self.stats["waited"] += waited
+        self.stats["saved"] += saved
+
+        if ready:
+            logger.debug(f"页面就绪: 等待 {waited:.2f} 秒，节省 {saved:.2f} 秒")
+        else:
+            logger.debug(f"等待超时: {timeout:.2f} 秒内未检测到正文标记")
+        return waited
+
+    def summary(self) -> Dict:
+        """获取等待统计信息"""
+        pages = self.stats["pages"]
+        return {
+            "pages": pages,
+            "ready": self.stats["ready"],
+            "timeout": self.stats["timeout"],
+            "avg_wait": round(self.stats["waited"] / pages, 3) if pages else 0.0,
+            "total_saved": round(self.stats["saved"], 1),
+        }
+
 
 class RegulationCrawler:
     """招生章程详情页爬虫"""
@@ -31,81 +138,204 @@ class RegulationCrawler:
         "viewport": {"width": 1920, "height": 1080},
     }
 
-    def __init__(self, page_load_delay: float = 4.0):
+    def __init__(self, page_load_delay: float = 4.0, pool_size: int = 1,
+                 max_requests_per_second: float = 0.0, isolate_contexts: bool = False,
+                 block_resources: bool = True,
+                 rate_limiter: Optional[AdaptiveRateLimiter] = None,
+                 recycle_every: int = 200, max_renderer_mb: float = 1536.0,
+                 profile: Optional["CrawlProfile"] = None,
+                 waiter: Optional[ReadinessWaiter] = None):
         """
         初始化爬虫
 
         Args:
-            page_load_delay: 页面加载等待时间（秒）
+            page_load_delay: 页面加载最长等待时间（秒），正文就绪后提前返回
+            pool_size: 页面池大小（可并发执行的 fetch_page / navigate 数量）
+            max_requests_per_second: 每个主机每秒最大请求数，<=0 表示不限速
+            isolate_contexts: 为True时每个页面使用独立的BrowserContext（独立cookie），否则共用一个
+            block_resources: 是否屏蔽图片、字体、样式表和统计脚本请求
+            rate_limiter: 共用的自适应限速器（与HTTP抓取器共用时按同一主机统一限速），
+                None表示按 max_requests_per_second 新建
+            recycle_every: 页面导航满该次数后换新页面（独立上下文时连同上下文），<=0 表示不按次数回收
+            max_renderer_mb: 渲染进程内存（MB）超过该值时换新页面，<=0 表示不检查内存
+            profile: 浏览器配置档（持久化 storage_state/磁盘缓存、无头模式），None表示每次全新启动
+            waiter: 页面就绪等待策略，None表示按默认正文标记等待
         """
+        if pool_size < 1:
+            raise ValueError("pool_size 必须大于等于 1")
+
+        self.profile = profile or CrawlProfile(profile_dir=None, headless=self.ANTI_BOT_CONFIG["headless"])
+        if isolate_contexts and self.profile.persistent:
+            raise ValueError("持久化配置档只有一个上下文，不能与 isolate_contexts 同时使用")
+
         self.page_load_delay = page_load_delay
+        self.pool_size = pool_size
+        self.isolate_contexts = isolate_contexts
+        self.rate_limiter = rate_limiter or AdaptiveRateLimiter(max_requests_per_second)
+        self.waiter = waiter or ReadinessWaiter()
+        self.blocker: Optional[ResourceBlocker] = ResourceBlocker() if block_resources else None
+        self.recycler = PageRecycler(recycle_every, max_renderer_mb)
         self.playwright = None
         self.browser: Optional[Browser] = None
         self.context: Optional[BrowserContext] = None
         self.page: Optional[Page] = None
+        self.contexts: List[BrowserContext] = []
+        self.pages: List[Page] = []
+        self._idle_pages: Optional[asyncio.Queue] = None
 
     async def start(self):
         """启动浏览器"""
         self.playwright = await async_playwright().start()
+        await self.profile.start(self.playwright, self.blocker)
+        self.browser = self.profile.browser
 
-        self.browser = await self.playwright.chromium.launch(
-            headless=self.ANTI_BOT_CONFIG["headless"],
-            args=self.ANTI_BOT_CONFIG["args"]
-        )
-
-        self.context = await self.browser.new_context(
-            user_agent=self.ANTI_BOT_CONFIG["user_agent"],
-            viewport=self.ANTI_BOT_CONFIG["viewport"],
-            locale=self.ANTI_BOT_CONFIG["locale"],
-            timezone_id=self.ANTI_BOT_CONFIG["timezone_id"],
-        )
+        self._idle_pages = asyncio.Queue()
+        for _ in range(self.pool_size):
+            if self.isolate_contexts or not self.pages:
+                # 由配置档打开页面：独立上下文时每个页面一个新上下文，持久化模式下使用启动时自带的空白页
+                page = await self.profile.new_page()
+                self.contexts.append(page.context)
+            else:
+                page = await self.pages[0].context.new_page()
+            self.pages.append(page)
+            self._idle_pages.put_nowait(page)
 
-        self.page = await self.context.new_page()
-        logger.info("浏览器启动成功")
+        # 保持单页面模式下的属性兼容
+        self.context = self.contexts[0]
+        self.page = self.pages[0]
+        logger.info(f"浏览器启动成功（页面池: {self.pool_size}）")
 
     async def close(self):
-        """关闭浏览器"""
-        if self.page:
-            await self.page.close()
-        if self.context:
-            await self.context.close()
-        if self.browser:
-            await self.browser.close()
+        """关闭浏览器（关闭前保存配置档状态）"""
+        for page in self.pages:
+            await page.close()
+        await self.profile.close()
+        self.browser = None
         if self.playwright:
             await self.playwright.stop()
+        self.pages = []
+        self.contexts = []
+        self.page = None
+        self.context = None
+        logger.info(f"页面等待统计: {self.waiter.summary()}")
+        if self.blocker:
+            logger.info(f"请求屏蔽统计: {self.blocker.summary()}")
+        logger.info(f"页面回收统计: {self.recycler.summary()}")
+        logger.info(f"限速统计: {self.rate_limiter.summary()}")
         logger.info("浏览器已关闭")
 
-    async def fetch_page(self, url: str) -> Optional[str]:
+    @asynccontextmanager
+    async def acquire_page(self):
+        """
+        从页面池借出一个空闲页面，用完自动归还
+
+        池中页面数即并发上限，等价于一个信号量；归还时由回收器决定是否换成新页面
+        """
+        if self._idle_pages is None:
+            raise RuntimeError("浏览器未启动，请先调用 start() 方法")
+
+        page = await self._idle_pages.get()
+        try:
+            yield page
+        finally:
+            try:
+                page = await self.recycler.maybe_recycle(page, self._replace_page)
+            except Exception as e:
+                logger.error(f"回收页面失败: {e}")
+            self._idle_pages.put_nowait(page)
+
+    async def _replace_page(self, page: Page) -> Page:
+        """关闭旧页面（独立上下文时连同上下文）并在原位置换上新页面"""
+        index = self.pages.index(page)
+        context = page.context
+
+        if self.isolate_contexts or self.profile.persistent:
+            # 由配置档回收：保存 storage_state，独立上下文时换新上下文
+            new_page = await self.profile.recycle_page(page)
+            if new_page.context is not context:
+                self.contexts[self.contexts.index(context)] = new_page.context
+        else:
+            # 共用上下文只换页面
+            await page.close()
+            new_page = await context.new_page()
+
+        self.pages[index] = new_page
+        self.context = self.contexts[0]
+        self.page = self.pages[0]
+        return new_page
+
+    @asynccontextmanager
+    async def navigate(self, url: str, wait_time: Optional[float] = None):
         """
-        获取页面内容
+        借出一个页面打开URL，正文就绪后交给调用方读取，用完自动归还（可并发调用）
 
         Args:
             url: 目标URL
+            wait_time: 正文就绪最长等待时间（秒），None表示 page_load_delay
 
-        Returns:
-            页面HTML内容，失败返回None
+        Raises:
+            FetchError: 访问超时、网络错误或跳转到错误页
         """
         if not self.page:
             raise RuntimeError("浏览器未启动，请先调用 start() 方法")
 
-        try:
-            logger.info(f"正在访问: {url}")
-            await self.page.goto(url, wait_until="domcontentloaded", timeout=30000)
+        async with self.acquire_page() as page:
+            await self.rate_limiter.wait(url)
+            start = time.monotonic()
+            self.recycler.navigated(page)
+            try:
+                await page.goto(url, wait_until="domcontentloaded", timeout=30000)
+            except Exception as e:
+                kind = classify_exception(e)
+                self.rate_limiter.record(url, ok=False, reason=kind)
+                raise FetchError(kind, str(e)[:100]) from e
+            latency = time.monotonic() - start
 
-            # 等待页面加载完成
-            await asyncio.sleep(self.page_load_delay)
+            # 等待正文就绪，wait_time 仅作为超时兜底
+            await self.waiter.wait(page, self.page_load_delay if wait_time is None else wait_time)
 
             # 检查是否被重定向到错误页面
-            current_url = self.page.url
-            if "error" in current_url.lower():
-                logger.warning(f"页面访问可能失败: {current_url}")
-                return None
+            if "error" in page.url.lower():
+                self.rate_limiter.record(url, ok=False, latency=latency, reason="error_redirect")
+                raise FetchError("error_redirect", f"跳转到错误页 {page.url}"[:100])
+
+            self.rate_limiter.record(url, latency=latency)
+            yield page
+
+    async def fetch_page(self, url: str) -> Optional[str]:
+        """
+        获取页面内容（可并发调用，并发数受页面池大小限制）
 
-            return await self.page.content()
+        Args:
+            url: 目标URL
 
+        Returns:
+            页面HTML内容，失败返回None
+        """
+        logger.info(f"正在访问: {url}")
+        try:
+            async with self.navigate(url) as page:
+                return await page.content()
+        except FetchError as e:
+            if e.kind == "error_redirect":
+                logger.warning(f"页面访问可能失败: {e}")
+            else:
+                logger.error(f"访问页面失败 {url}: {e}")
         except Exception as e:
             logger.error(f"访问页面失败 {url}: {e}")
-            return None
+        return None
+
+    async def fetch_many(self, urls: List[str]) -> List[Optional[str]]:
+        """
+        并发获取多个页面
+
+        Args:
+            urls: URL列表
+
+        Returns:
+            与urls顺序一致的HTML内容列表，失败项为None
+        """
+        return list(await asyncio.gather(*(self.fetch_page(url) for url in urls)))
 
     async def execute_js(self, js_code: str) -> Any:
         """
@@ -130,8 +360,157 @@ class RegulationCrawler:
         logger.info(f"截图已保存: {filepath}")
 
 
-async def random_delay(min_seconds: float, max_seconds: float):
-    """随机延迟"""
-    delay = random.uniform(min_seconds, max_seconds)
-    logger.debug(f"延迟 {delay:.2f} 秒")
-    await asyncio.sleep(delay)
+
+class CrawlProfile:
+    """
+    浏览器配置档：按反爬虫配置启动浏览器、创建上下文，并在多次运行之间保留登录态和缓存
+
+    - persistent=True：用 launch_persistent_context 打开用户数据目录，cookie、localStorage 和
+      磁盘缓存（JS/CSS等）都保存在目录中，整个浏览器只有一个上下文
+    - persistent=False：每个上下文从 storage_state.json 恢复 cookie 和 localStorage，关闭前写回
+    - headless=True：以 Chromium 新版无头模式运行（与有头模式同一内核，UA、视口、语言、时区不变），
+      可在没有显示器的服务器上运行
+
+    配置档目录保存会话 cookie，属于凭据，已在 .gitignore 中排除，不要提交或共享
+    """
+
+    STORAGE_STATE_FILE = "storage_state.json"
+    USER_DATA_DIR = "user_data"
+
+    def __init__(self, profile_dir: Optional[str] = "browser_profile", headless: bool = False,
+                 persistent: bool = True, config: Optional[Dict[str, Any]] = None):
+        """
+        初始化配置档
+
+        Args:
+            profile_dir: 配置档目录，None表示不持久化（每次都是全新的浏览器状态）
+            headless: 是否无头运行
+            persistent: 是否使用持久化用户数据目录（含磁盘缓存），否则只持久化 storage_state
+            config: 反爬虫配置，默认 RegulationCrawler.ANTI_BOT_CONFIG
+        """
+        self.profile_dir = Path(profile_dir) if profile_dir else None
+        self.headless = headless
+        self.persistent = persistent and self.profile_dir is not None
+        self.config = config or RegulationCrawler.ANTI_BOT_CONFIG
+        self.browser: Optional[Browser] = None
+        self.contexts: List[BrowserContext] = []
+        self.blocker: Optional[ResourceBlocker] = None
+        self._initial_pages: List[Page] = []
+
+    @property
+    def storage_state_path(self) -> Optional[Path]:
+        return self.profile_dir / self.STORAGE_STATE_FILE if self.profile_dir else None
+
+    def launch_options(self) -> Dict[str, Any]:
+        """浏览器启动参数"""
+        args = list(dict.fromkeys(self.config["args"]))
+        if self.headless:
+            # 以有头方式启动再加 --headless=new：使用完整 Chromium 的新版无头模式，
+            # 而不是指纹差异较大的 headless shell
+            args.append("--headless=new")
+        return {"headless": False, "args": args}
+
+    def context_options(self) -> Dict[str, Any]:
+        """上下文参数（指纹配置 + 已保存的 storage_state）"""
+        options = {
+            "user_agent": self.config["user_agent"],
+            "viewport": self.config["viewport"],
+            "locale": self.config["locale"],
+            "timezone_id": self.config["timezone_id"],
+        }
+        state_path = self.storage_state_path
+        if not self.persistent and state_path is not None and state_path.exists():
+            options["storage_state"] = str(state_path)
+        return options
+
+    async def start(self, playwright, blocker: Optional[ResourceBlocker] = None):
+        """
+        启动浏览器
+
+        Args:
+            playwright: Playwright 实例
+            blocker: 新建上下文时挂载的资源屏蔽器
+        """
+        self.blocker = blocker
+        if self.persistent:
+            user_data_dir = self.profile_dir / self.USER_DATA_DIR
+            user_data_dir.mkdir(parents=True, exist_ok=True)
+            context = await playwright.chromium.launch_persistent_context(
+                str(user_data_dir), **self.launch_options(), **self.context_options())
+            if self.blocker:
+                await self.blocker.attach(context)
+            self.contexts.append(context)
+            # 持久化上下文启动时自带一个空白页，第一次 new_page 直接使用（恢复的多余标签页关闭）
+            for extra in context.pages[1:]:
+                await extra.close()
+            self._initial_pages = list(context.pages[:1])
+            logger.info(f"已打开持久化配置档: {user_data_dir}")
+        else:
+            self.browser = await playwright.chromium.launch(**self.launch_options())
+
+    async def new_context(self) -> BrowserContext:
+        """创建上下文（持久化模式下返回唯一的上下文）"""
+        if self.persistent:
+            return self.contexts[0]
+        context = await self.browser.new_context(**self.context_options())
+        if self.blocker:
+            await self.blocker.attach(context)
+        self.contexts.append(context)
+        return context
+
+    async def new_page(self) -> Page:
+        """在新上下文（持久化模式下为唯一的上下文）中打开页面"""
+        if self._initial_pages:
+            return self._initial_pages.pop()
+        context = await self.new_context()
+        return await context.new_page()
+
+    async def save_state(self, context: BrowserContext):
+        """把上下文的 cookie 和 localStorage 写入 storage_state.json"""
+        state_path = self.storage_state_path
+        if state_path is None:
+            return
+        state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = state_path.with_name(state_path.name + ".tmp")
+        try:
+            await context.storage_state(path=str(tmp_path))
+            os.replace(tmp_path, state_path)
+        except Exception as e:
+            logger.warning(f"保存 storage_state 失败: {e}")
+
+    async def close_context(self, context: BrowserContext):
+        """保存状态后关闭上下文（持久化模式下只保存，不关闭唯一的上下文）"""
+        await self.save_state(context)
+        if self.persistent:
+            return
+        if context in self.contexts:
+            self.contexts.remove(context)
+        await context.close()
+
+    async def recycle_page(self, page: Page) -> Page:
+        """
+        回收页面：持久化模式下只换新页面；否则保存状态、关闭上下文后在新上下文中打开页面
+
+        Args:
+            page: 旧页面
+
+        Returns:
+            新页面
+        """
+        if self.persistent:
+            await self.save_state(page.context)
+            await page.close()
+            return await self.contexts[0].new_page()
+        await self.close_context(page.context)
+        return await self.new_page()
+
+    async def close(self):
+        """保存状态并关闭所有上下文和浏览器"""
+        if self.contexts:
+            await self.save_state(self.contexts[0])
+        for context in self.contexts:
+            await context.close()
+        self.contexts = []
+        if self.browser:
+            await self.browser.close()
+            self.browser = None
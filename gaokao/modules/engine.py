@@ -0,0 +1,457 @@
+"""
+异步爬取引擎
+统一的爬取流水线：任务来源（TaskStore）→ 抓取（HTTP预取或浏览器页面池）→ 提取 → 保存 → 进度；
+各爬取脚本只需定义一个 CrawlJob（任务来源、就绪标记、提取和保存步骤），
+并发、限速、页面回收、重试队列、断点续传和统计由引擎统一提供
+"""
+
+import argparse
+import asyncio
+import logging
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Sequence
+
+from .crawler import BODY_MARKERS, CrawlProfile, FetchError, ReadinessWaiter, RegulationCrawler
+from .rate_limiter import AdaptiveRateLimiter, classify_exception
+from .task_store import TaskStore, RETRY_STATUS
+
+logger = logging.getLogger(__name__)
+
+
+class TaskFailed(Exception):
+    """任务失败（kind 为错误类型，决定进入重试队列还是死信列表，见 task_store.RETRYABLE_ERRORS）"""
+
+    def __init__(self, kind: str, message: str = ""):
+        super().__init__(message or kind)
+        self.kind = kind
+
+
+class CrawlerStartError(Exception):
+    """浏览器无法启动（未安装、没有显示器、配置档目录不可用等），停止运行，不改动任务状态"""
+
+
+# 与单个任务无关的错误：直接停止运行，不计入任务失败（否则所有任务都会进入重试队列直到死信）
+INFRASTRUCTURE_ERRORS = (CrawlerStartError, sqlite3.Error)
+
+
+class CrawlJob(ABC):
+    """
+    爬取任务定义
+
+    子类设置类属性（任务类型、就绪标记、等待时间、限速参数、配置档目录），
+    并实现抽象方法 load_tasks / extract / save（缺少任一个时创建实例即报错）；其余步骤按需覆盖
+    """
+
+    # 任务存储中的任务类型
+    name = "details"
+    # 日志标题
+    title = "爬取任务"
+
+    # 页面就绪标记（见 ReadinessWaiter）
+    markers: Sequence[str] = BODY_MARKERS
+    selectors: Sequence[str] = ("table",)
+    end_markers: Sequence[str] = ()
+
+    # 第一页最长等待时间（秒），之后每页最长等待时间
+    first_wait = 2.0
+    wait = 0.5
+
+    # 自适应限速（每秒请求数）
+    max_rate = 3.0
+    initial_rate: Optional[float] = 2.0
+    min_rate = 0.2
+
+    # 页面回收：导航次数、渲染进程内存（MB）
+    recycle_every = 200
+    max_renderer_mb = 1536.0
+
+    # 浏览器配置档目录（cookie、localStorage、磁盘缓存跨运行保留），None表示不持久化
+    profile_dir: Optional[str] = None
+
+    def __init__(self, refresh: bool = False):
+        """
+        初始化任务
+
+        Args:
+            refresh: 重新处理全部任务（默认跳过已完成的）
+        """
+        self.refresh = refresh
+        self.engine: Optional["CrawlEngine"] = None
+
+    @abstractmethod
+    def load_tasks(self, store: TaskStore):
+        """把任务写入任务存储（已存在的任务保留状态）"""
+
+    def select(self, store: TaskStore) -> List[Dict]:
+        """
+        本次要处理的任务（不含重试队列，重试由引擎在之后处理）
+
+        Returns:
+            任务列表，每个任务包含school_name和url字段
+        """
+        if self.refresh:
+            return store.get_tasks(self.name)
+        return store.get_remaining(self.name)
+
+    async def open(self, engine: "CrawlEngine"):
+        """开始处理前调用（可访问 engine.store / engine.limiter）"""
+        self.engine = engine
+
+    async def prefetch(self, task: Dict) -> Any:
+        """
+        不经浏览器获取任务数据（如HTTP直连）
+
+        Returns:
+            交给 save 的数据，None表示需要用浏览器访问
+        """
+        return None
+
+    @abstractmethod
+    async def extract(self, page, task: Dict) -> Any:
+        """
+        从已就绪的页面提取数据
+
+        Args:
+            page: Playwright Page对象（正文已就绪）
+            task: 任务
+
+        Returns:
+            交给 save 的数据
+
+        Raises:
+            TaskFailed: 提取失败
+        """
+
+    @abstractmethod
+    def save(self, task: Dict, result: Any) -> Optional[Dict]:
+        """
+        保存提取结果
+
+        Args:
+            task: 任务
+            result: prefetch 或 extract 的返回值
+
+        Returns:
+            TaskStore.update 的参数（content/text_length/table_count/note，可选 status，默认“成功”；
+            changed=False 表示内容未变化），None表示无需更新任务状态（计为未变化）
+
+        Raises:
+            TaskFailed: 内容为空或无法保存
+        """
+
+    def on_failure(self, task: Dict, kind: str, message: str, status: str):
+        """任务失败后调用（status 为 重试/放弃）"""
+
+    def checkpoint(self):
+        """每处理一批任务和结束时调用，用于落盘缓存、清单和导出结果"""
+
+    async def close(self):
+        """处理结束后调用"""
+
+    def summary(self) -> Dict:
+        """任务自身的统计信息"""
+        return {}
+
+
+class CrawlEngine:
+    """异步爬取引擎（页面池并发 + 自适应限速 + 重试队列）"""
+
+    def __init__(self, job: CrawlJob, concurrency: int = 1, headless: bool = False,
+                 task_db: str = "gaokao_tasks.db", checkpoint_every: int = 15):
+        """
+        初始化引擎
+
+        Args:
+            job: 爬取任务定义
+            concurrency: 并发数（浏览器页面池大小）
+            headless: 无头模式运行浏览器
+            task_db: SQLite任务存储路径
+            checkpoint_every: 每完成多少个任务调用一次 job.checkpoint 并输出进度
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency 必须大于等于 1")
+
+        self.job = job
+        self.concurrency = concurrency
+        self.headless = headless
+        self.task_db = task_db
+        self.checkpoint_every = max(1, checkpoint_every)
+        self.store: Optional[TaskStore] = None
+        self.limiter = AdaptiveRateLimiter(max_rate=job.max_rate, initial_rate=job.initial_rate,
+                                           min_rate=job.min_rate)
+        self.crawler: Optional[RegulationCrawler] = None
+        self._crawler_lock = asyncio.Lock()
+        self._start_error: Optional[CrawlerStartError] = None
+        self.counts = {"completed": 0, "unchanged": 0, "retry": 0, "failed": 0}
+        self.fetched = {"prefetch": 0, "browser": 0}
+        self._processed = 0
+        self._since_checkpoint = 0
+        self._total = 0
+        self._started_at = 0.0
+
+    async def _ensure_crawler(self) -> RegulationCrawler:
+        """
+        第一次需要浏览器时才启动（全部由 prefetch 完成时不启动浏览器）
+
+        Raises:
+            CrawlerStartError: 浏览器启动失败（之后的调用直接抛出同一个错误，不再重复启动）
+        """
+        async with self._crawler_lock:
+            if self._start_error is not None:
+                raise self._start_error
+            if self.crawler is None:
+                job = self.job
+                crawler = RegulationCrawler(
+                    page_load_delay=job.wait,
+                    pool_size=self.concurrency,
+                    rate_limiter=self.limiter,
+                    recycle_every=job.recycle_every,
+                    max_renderer_mb=job.max_renderer_mb,
+                    profile=CrawlProfile(job.profile_dir, headless=self.headless),
+                    waiter=ReadinessWaiter(job.markers, job.selectors, job.end_markers),
+                )
+                try:
+                    await crawler.start()
+                except Exception as e:
+                    self._start_error = CrawlerStartError(f"浏览器启动失败: {e}")
+                    try:
+                        await crawler.close()
+                    except Exception as close_error:
+                        logger.debug(f"关闭未启动完成的浏览器失败: {close_error}")
+                    raise self._start_error from e
+                self.crawler = crawler
+        return self.crawler
+
+    async def _fetch(self, task: Dict) -> Any:
+        """HTTP预取，未取得时用浏览器访问并提取"""
+        result = await self.job.prefetch(task)
+        if result is not None:
+            self.fetched["prefetch"] += 1
+            return result
+
+        crawler = await self._ensure_crawler()
+        wait_time = self.job.first_wait if self.fetched["browser"] == 0 else self.job.wait
+        async with crawler.navigate(task["url"], wait_time) as page:
+            self.fetched["browser"] += 1
+            return await self.job.extract(page, task)
+
+    def _fail(self, task: Dict, kind: str, message: str) -> str:
+        """记录失败：可重试的进入重试队列，否则进入死信列表"""
+        status = self.store.fail(task["school_name"], kind, self.job.name, note=message)
+        self.job.on_failure(task, kind, message, status)
+        if status == RETRY_STATUS:
+            logger.warning(f"  ↻ {message}（{kind}，稍后重试）")
+            return "retry"
+        logger.warning(f"  ✗ {message}（{kind}，放弃）")
+        return "failed"
+
+    async def _process(self, task: Dict) -> str:
+        """
+        处理一个任务
+
+        Returns:
+            completed / unchanged / retry / failed
+        """
+        try:
+            result = await self._fetch(task)
+            fields = self.job.save(task, result)
+        except (FetchError, TaskFailed) as e:
+            return self._fail(task, e.kind, str(e))
+        except INFRASTRUCTURE_ERRORS:
+            raise
+        except Exception as e:
+            logger.error(f"  ✗ {e}")
+            return self._fail(task, classify_exception(e), str(e)[:100])
+
+        if fields is None:
+            return "unchanged"
+        changed = fields.pop("changed", True)
+        status = fields.pop("status", "成功")
+        self.store.update(task["school_name"], status, self.job.name, **fields)
+        return "completed" if changed else "unchanged"
+
+    def _tally(self, outcome: str):
+        self.counts[outcome] += 1
+        self._since_checkpoint += 1
+        if self._since_checkpoint >= self.checkpoint_every:
+            self._checkpoint()
+
+    def _checkpoint(self):
+        """调用 job.checkpoint 并输出进度"""
+        self._since_checkpoint = 0
+        self.job.checkpoint()
+        pct = self._processed / self._total * 100 if self._total else 100.0
+        logger.info(f"进度: {self._processed}/{self._total} ({pct:.1f}%)  "
+                    f"成功: {self.counts['completed']}, 失败: {self.counts['failed']}, "
+                    f"未变化: {self.counts['unchanged']}, 待重试: {self.counts['retry']}")
+        logger.info(f"  限速: {self.limiter.summary()}")
+
+    async def _run_tasks(self, tasks: List[Dict], retry: bool = False):
+        """工作协程从队列中取任务并发处理，并发数为 concurrency"""
+        queue: asyncio.Queue = asyncio.Queue()
+        for task in tasks:
+            queue.put_nowait(task)
+
+        async def worker():
+            while not queue.empty():
+                task = queue.get_nowait()
+                self._processed += 1
+                if retry:
+                    logger.info(f"[重试 第{task['attempts'] + 1}次] {task['school_name']}"
+                                f"（上次: {task['error_kind']}）")
+                    self.counts["retry"] -= 1
+                else:
+                    logger.info(f"[{self._processed}/{self._total}] {task['school_name']}")
+                self._tally(await self._process(task))
+
+        workers = [asyncio.create_task(worker()) for _ in range(min(self.concurrency, len(tasks)))]
+        try:
+            await asyncio.gather(*workers)
+        except BaseException:
+            # 浏览器无法启动等错误：停止其余工作协程，未处理的任务保持原状态
+            for w in workers:
+                w.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            raise
+
+    async def _drain_retries(self):
+        """重试队列：失败的任务按退避时间自动重试，直到成功或进入死信列表"""
+        while True:
+            due = self.store.get_retry_due(self.job.name)
+            if not due:
+                next_at = self.store.next_retry_time(self.job.name)
+                if next_at is None:
+                    return
+                delay = max(0.0, next_at - time.time())
+                pending = len(self.store.get_tasks(self.job.name, RETRY_STATUS))
+                logger.info(f"重试队列: {pending} 个，{delay:.0f} 秒后开始")
+                await asyncio.sleep(delay)
+                continue
+
+            self._total += len(due)
+            await self._run_tasks(due, retry=True)
+
+    async def run(self, retry_dead: bool = False) -> Dict:
+        """
+        运行任务
+
+        Args:
+            retry_dead: 先把死信列表中的任务重新入队
+
+        Returns:
+            统计信息（见 summary）
+        """
+        job = self.job
+        logger.info("=" * 60)
+        logger.info(f"{job.title}启动")
+        logger.info("=" * 60)
+
+        self.store = TaskStore(self.task_db)
+        self._started_at = time.monotonic()
+        try:
+            job.load_tasks(self.store)
+            if retry_dead:
+                self.store.requeue_dead_letters(job.name)
+
+            tasks = job.select(self.store)
+            self._total = len(tasks)
+            logger.info(f"{'刷新' if job.refresh else '剩余'}任务数: {len(tasks)}（并发 {self.concurrency}）")
+            if not tasks and self.store.next_retry_time(job.name) is None:
+                logger.info("所有任务已完成！")
+                return self.summary()
+
+            await job.open(self)
+            try:
+                await self._run_tasks(tasks)
+                await self._drain_retries()
+            finally:
+                job.checkpoint()
+                await job.close()
+                if self.crawler is not None:
+                    await self.crawler.close()
+
+            self._log_summary()
+            return self.summary()
+        finally:
+            self.store.close()
+
+    def summary(self) -> Dict:
+        """运行统计：各结果数量、抓取方式、耗时、吞吐量，以及限速和任务自身的统计"""
+        elapsed = time.monotonic() - self._started_at if self._started_at else 0.0
+        return {
+            **self.counts,
+            **self.fetched,
+            "processed": self._processed,
+            "elapsed": round(elapsed, 1),
+            "per_minute": round(self._processed / elapsed * 60, 1) if elapsed > 0 else 0.0,
+            "limiter": self.limiter.summary(),
+            "job": self.job.summary(),
+        }
+
+    def _log_summary(self):
+        """输出最终统计和死信列表"""
+        stats = self.summary()
+        done = stats["completed"] + stats["unchanged"]
+        logger.info("")
+        logger.info("=" * 60)
+        logger.info("爬取完成！")
+        logger.info(f"  成功: {stats['completed']}")
+        logger.info(f"  失败: {stats['failed']}（死信）")
+        logger.info(f"  未变化: {stats['unchanged']}")
+        logger.info(f"  成功率: {done / max(done + stats['failed'], 1) * 100:.1f}%")
+        logger.info(f"  耗时: {stats['elapsed']}秒，{stats['per_minute']}个/分钟")
+        logger.info(f"  预取: {stats['prefetch']}, 浏览器: {stats['browser']}")
+
+        dead_letters = self.store.get_dead_letters(self.job.name)
+        if dead_letters:
+            logger.info(f"  死信列表: {len(dead_letters)} 个（--retry-dead 重新入队）")
+            for task in dead_letters:
+                logger.info(f"    {task['school_name']}: {task['error_kind']} {task['note']}")
+
+        limit_stats = stats["limiter"]
+        logger.info(f"  限速: 当前速率 {limit_stats['rate']}，异常 {limit_stats['errors']}次，"
+                    f"退避 {limit_stats['backoffs']}次，过慢 {limit_stats['slow']}次")
+        if self.crawler is not None:
+            wait_stats = self.crawler.waiter.summary()
+            logger.info(f"  页面等待: 平均 {wait_stats['avg_wait']}秒，共节省 {wait_stats['total_saved']}秒")
+            if self.crawler.blocker:
+                block_stats = self.crawler.blocker.summary()
+                logger.info(f"  请求屏蔽: {block_stats['blocked']}个请求，约节省 {block_stats['saved_mb']}MB")
+            recycle_stats = self.crawler.recycler.summary()
+            logger.info(f"  页面回收: {recycle_stats['recycles']}次（按次数 {recycle_stats['by_count']}，"
+                        f"按内存 {recycle_stats['by_memory']}），内存峰值 {recycle_stats['peak_mb']}MB")
+        if stats["job"]:
+            logger.info(f"  {self.job.title}: {stats['job']}")
+        logger.info("=" * 60)
+
+
+def build_parser(description: str) -> argparse.ArgumentParser:
+    """爬取脚本的公共命令行参数（--refresh/--retry-dead/--headless/--concurrency）"""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--refresh", action="store_true",
+                        help="重新处理全部任务（默认跳过已完成的，中断后继续）")
+    parser.add_argument("--retry-dead", action="store_true",
+                        help="死信列表（多次失败后放弃）中的任务重新入队")
+    parser.add_argument("--headless", action="store_true",
+                        help="无头模式（指纹配置不变，可在没有显示器的服务器上运行）")
+    parser.add_argument("--concurrency", type=int, default=1,
+                        help="并发页面数（同一主机仍受自适应限速约束）")
+    return parser
+
+
+def run_job(job: CrawlJob, args: argparse.Namespace, task_db: str = "gaokao_tasks.db",
+            checkpoint_every: int = 15) -> Optional[Dict]:
+    """按命令行参数运行任务（Ctrl+C 中断时进度已保存在任务存储中）"""
+    engine = CrawlEngine(job, concurrency=args.concurrency, headless=args.headless,
+                         task_db=task_db, checkpoint_every=checkpoint_every)
+    try:
+        return asyncio.run(engine.run(retry_dead=args.retry_dead))
+    except CrawlerStartError as e:
+        logger.error(f"{e}（任务状态未改动，修复后重新运行即可）")
+        raise SystemExit(1)
+    except KeyboardInterrupt:
+        logger.info("")
+        logger.info("用户中断，进度已保存（下次运行从未完成的任务继续）")
+        return None
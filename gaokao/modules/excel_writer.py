@@ -0,0 +1,139 @@
+"""
+Excel流式写入模块
+基于 openpyxl 只写模式逐行写入，内存占用与行数无关
+"""
+
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Sequence
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+from openpyxl.utils import get_column_letter
+
+logger = logging.getLogger(__name__)
+
+
+def _fill(color: str) -> PatternFill:
+    return PatternFill(start_color=color, end_color=color, fill_type="solid")
+
+
+_THIN = Side(style="thin")
+
+# 样式预设：header 与 pdf2excel excel_utils.get_header_style 一致（浅蓝底、加粗）
+STYLE_PRESETS: Dict[str, Dict] = {
+    "header": {
+        "font": Font(bold=True),
+        "fill": _fill("CCE5FF"),
+        "alignment": Alignment(horizontal="center", vertical="center", wrap_text=True),
+    },
+    # 进度表、任务状态表的灰色表头
+    "gray_header": {
+        "font": Font(bold=True),
+        "fill": _fill("CCCCCC"),
+        "alignment": Alignment(horizontal="center", vertical="center"),
+    },
+    # 与 pandas.to_excel 默认表头一致（加粗、细边框、居中）
+    "bold_header": {
+        "font": Font(bold=True),
+        "border": Border(left=_THIN, right=_THIN, top=_THIN, bottom=_THIN),
+        "alignment": Alignment(horizontal="center", vertical="top"),
+    },
+    # 爬取状态行底色
+    "成功": {"fill": _fill("90EE90")},
+    "失败": {"fill": _fill("FFB6C1")},
+    "跳过": {"fill": _fill("FFE4B5")},
+}
+
+
+class StreamingSheet:
+    """只写工作表（由 StreamingExcelWriter.add_sheet 创建）"""
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.row_count = 0
+
+    def append(self, values: Iterable, style: Optional[str] = None):
+        """
+        追加一行
+
+        Args:
+            values: 单元格值
+            style: 整行使用的样式预设名，None表示不设置样式
+        """
+        if style is None:
+            self.ws.append(list(values))
+        else:
+            self.ws.append([self._styled_cell(value, STYLE_PRESETS[style]) for value in values])
+        self.row_count += 1
+
+    def append_rows(self, rows: Iterable[Iterable]):
+        """批量追加无样式的行"""
+        for values in rows:
+            self.ws.append(list(values))
+            self.row_count += 1
+
+    def _styled_cell(self, value, preset: Dict) -> WriteOnlyCell:
+        cell = WriteOnlyCell(self.ws, value=value)
+        for attr, style in preset.items():
+            setattr(cell, attr, style)
+        return cell
+
+
+class StreamingExcelWriter:
+    """Excel流式写入器（先写临时文件再替换，中断时不会损坏已有文件）"""
+
+    def __init__(self, output_path: str):
+        """
+        初始化写入器
+
+        Args:
+            output_path: 输出Excel路径
+        """
+        self.output_path = Path(output_path)
+        self.wb = Workbook(write_only=True)
+        self.sheets = []
+
+    def add_sheet(self, title: Optional[str] = None, headers: Optional[Sequence[str]] = None,
+                  header_style: str = "header",
+                  column_widths: Optional[Sequence[float]] = None) -> StreamingSheet:
+        """
+        添加工作表
+
+        Args:
+            title: 工作表名称
+            headers: 表头，None表示不写表头
+            header_style: 表头样式预设名
+            column_widths: 列宽（按列顺序），只写模式下必须在写入数据前设置
+
+        Returns:
+            工作表
+        """
+        ws = self.wb.create_sheet(title=title)
+        for idx, width in enumerate(column_widths or [], 1):
+            ws.column_dimensions[get_column_letter(idx)].width = width
+
+        sheet = StreamingSheet(ws)
+        if headers is not None:
+            sheet.append(headers, style=header_style)
+        self.sheets.append(sheet)
+        return sheet
+
+    def save(self):
+        """保存工作簿（只写工作簿只能保存一次）"""
+        if not self.sheets:
+            self.add_sheet()
+
+        tmp_path = self.output_path.with_name(self.output_path.name + ".tmp")
+        self.wb.save(tmp_path)
+        os.replace(tmp_path, self.output_path)
+        logger.debug(f"已保存Excel: {self.output_path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.save()
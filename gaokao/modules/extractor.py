@@ -5,8 +5,10 @@
 
 import logging
 import re
-from typing import Dict, Any, Optional
-from bs4 import BeautifulSoup
+from typing import Dict, Any, List, Optional, Tuple
+from bs4 import BeautifulSoup, Comment, NavigableString, Tag
+from bs4.dammit import EntitySubstitution
+from bs4.formatter import HTMLFormatter
 
 logger = logging.getLogger(__name__)
 
@@ -42,112 +44,120 @@ class RegulationExtractor:
         "热点推荐",
     ]
 
+    # 导航、页脚等非正文行的关键词（行内包含任意一个即跳过）
+    SKIP_KEYWORDS = [
+        '首页', '高考资讯', '阳光志愿', '高招咨询', '招生动态',
+        '试题评析', '院校库', '专业库', '院校满意度', '专业满意度',
+        '学籍查询', '学历查询', '学位查询', '在线验证',
+        '登录', '注册', '更多', '主办单位：', 'Copyright',
+        '客服热线：', '客服邮箱：', '官方微信', '官方微博',
+        '学信网', '中心简介', '联系我们', '版权声明', '帮助中心', '网站地图',
+        '京ICP备', '京公网安备', '教育部学生服务与素质发展中心'
+    ]
+
+    # 正文开始标记（第一次出现之前的行都跳过）
+    START_KEYWORDS = ['招生章程', '第一章', '第一条', '总则']
+
+    # 页面文本最小长度，低于此长度认为页面未正常加载
+    MIN_PAGE_LENGTH = 100
+
     def __init__(self):
         """初始化提取器"""
         self.js_extraction_code = self._build_extraction_js()
+        # 页面内过滤使用的关键词（与Python端过滤规则一致）
+        self.js_extraction_args = {
+            "skipKeywords": self.SKIP_KEYWORDS,
+            "startKeywords": self.START_KEYWORDS,
+            "minTableRows": MIN_TABLE_ROWS,
+            "maxColspan": MAX_COLSPAN,
+        }
+        # 关键词合并为一个表达式，每行一次扫描
+        self.skip_pattern = re.compile('|'.join(re.escape(kw) for kw in self.SKIP_KEYWORDS))
+        self.start_pattern = re.compile('|'.join(re.escape(kw) for kw in self.START_KEYWORDS))
 
     def _build_extraction_js(self) -> str:
         """
         构建JavaScript提取代码
-        返回纯文本内容和表格数据
+        在页面内完成行过滤和表格提取，只返回过滤后的文本和表格数据
         """
-        return """
-        () => {
-            // 直接从body提取文本，简单有效
-            const bodyText = document.body.innerText || '';
+        return r"""
+        ({skipKeywords, startKeywords, minTableRows, maxColspan}) => {
+            // 关键词编译为正则，每行一次匹配
+            const escape = s => s.replace(/[.*+?^${}()|[\]\\]/g, '\\$&');
+            const skipRe = new RegExp(skipKeywords.map(escape).join('|'));
+            const startRe = new RegExp(startKeywords.map(escape).join('|'));
+
+            const bodyText = (document.body && document.body.innerText) || '';
 
-            // 清理文本：移除导航、页脚等无关内容
-            const lines = bodyText.split('\\n');
+            // 过滤导航、页脚等无关行，从正文开始标记处开始收集
             const filteredLines = [];
             let inContent = false;
 
-            for (const line of lines) {
+            for (const line of bodyText.split('\n')) {
                 const trimmed = line.trim();
 
-                // 跳过空行
-                if (!trimmed) continue;
-
-                // 跳过导航菜单
-                if (['首页', '高考资讯', '阳光志愿', '高招咨询', '招生动态',
-                     '试题评析', '院校库', '专业库', '院校满意度', '专业满意度',
-                     '学籍查询', '学历查询', '学位查询', '在线验证',
-                     '登录', '注册', '更多', '主办单位：', 'Copyright',
-                     '客服热线：', '客服邮箱：', '官方微信', '官方微博'].includes(trimmed)) {
-                    continue;
-                }
-
-                // 跳过页脚链接
-                if (trimmed.includes('京ICP备') || trimmed.includes('京公网安备')) {
-                    continue;
-                }
+                if (!trimmed || skipRe.test(trimmed)) continue;
 
-                // 检测正文开始（包含"招生章程"或学校相关关键词）
                 if (!inContent) {
-                    if (trimmed.includes('招生章程') || trimmed.includes('第一章') ||
-                        trimmed.includes('第一条') || trimmed.includes('总则')) {
-                        inContent = true;
-                    } else {
-                        continue;
-                    }
+                    if (!startRe.test(trimmed)) continue;
+                    inContent = true;
                 }
 
-                // 到达页脚时停止
-                if (trimmed.includes('附：') || trimmed.includes('学校地址：')) {
-                    filteredLines.push(trimmed);
-                    // 继续添加联系信息
-                } else if (trimmed.startsWith('http') || trimmed.includes('点击次数')) {
-                    // 跳过链接和统计
-                    continue;
-                } else {
-                    filteredLines.push(trimmed);
-                }
+                filteredLines.push(trimmed);
             }
 
-            const fullText = filteredLines.join('\\n\\n');
+            const fullText = filteredLines.join('\n\n');
 
-            // 提取表格（如果有）
+            // 提取数据表格：按 rowspan/colspan 展开为规则网格（合并单元格的值填入覆盖的每一格）
             const tables = [];
-            const tableElements = document.querySelectorAll('table');
 
-            tableElements.forEach((table, index) => {
-                const headers = Array.from(table.querySelectorAll('th, tr:first-child td'))
-                    .map(th => th.textContent?.trim() || '')
-                    .filter(h => h);
-
-                const rows = [];
-                const rowElements = table.querySelectorAll('tr');
-
-                Array.from(rowElements).slice(1).forEach(tr => {
-                    const cells = Array.from(tr.querySelectorAll('td'))
-                        .map(td => td.textContent?.trim() || '')
-                        .filter(c => c);
-
-                    if (cells.length > 0) {
-                        rows.push(cells);
+            document.querySelectorAll('table').forEach((table, index) => {
+                const rowElements = Array.from(table.rows);
+                if (rowElements.length < minTableRows) return;
+
+                const grid = [];
+                rowElements.forEach((tr, r) => {
+                    grid[r] = grid[r] || [];
+                    let c = 0;
+                    for (const cell of tr.cells) {
+                        while (grid[r][c] !== undefined) c++;
+                        const text = (cell.textContent || '').replace(/\s+/g, ' ').trim();
+                        const rowspan = Math.min(cell.rowSpan || 1, rowElements.length - r) || 1;
+                        const colspan = Math.min(cell.colSpan || 1, maxColspan);
+                        for (let dr = 0; dr < rowspan; dr++) {
+                            const target = grid[r + dr] = grid[r + dr] || [];
+                            for (let dc = 0; dc < colspan; dc++) target[c + dc] = text;
+                        }
+                        c += colspan;
                     }
                 });
 
-                if (headers.length > 0 || rows.length > 0) {
-                    tables.push({
-                        index: index,
-                        headers: headers,
-                        rows: rows
-                    });
-                }
+                const width = Math.max(0, ...grid.map(row => row.length));
+                const rows = grid
+                    .map(row => Array.from({length: width}, (_, i) => row[i] ?? ''))
+                    .filter(row => row.some(cell => cell));
+                if (rows.length === 0) return;
+
+                tables.push({
+                    index: index,
+                    headers: rows[0],
+                    rows: rows.slice(1),
+                    row_count: rows.length,
+                    col_count: width
+                });
             });
 
             return {
                 text: fullText,
                 tables: tables,
-                textLength: fullText.length,
-                tableCount: tables.length
+                pageLength: bodyText.length
             };
         }
         """
 
     async def extract(self, page, url: str) -> Optional[Dict[str, Any]]:
         """
-        从页面提取内容
+        从页面提取内容（过滤在页面内完成，只传回正文和表格）
 
         Args:
             page: Playwright Page对象
@@ -159,62 +169,85 @@ class RegulationExtractor:
         try:
             logger.info(f"正在提取内容: {url}")
 
-            # 直接获取body文本，简单有效
-            body_text = await page.evaluate("() => document.body.innerText || ''")
+            data = await page.evaluate(self.js_extraction_code, self.js_extraction_args)
 
-            if not body_text or len(body_text) < 100:
-                logger.warning(f"提取内容过少: {url} (长度: {len(body_text) if body_text else 0})")
+            if data["pageLength"] < self.MIN_PAGE_LENGTH:
+                logger.warning(f"提取内容过少: {url} (长度: {data['pageLength']})")
                 return None
 
-            # 用Python处理文本，更可控
-            lines = body_text.split('\n')
-            filtered_lines = []
-            in_content = False
+            return self._make_result(data["text"], data["tables"], url)
 
-            for line in lines:
-                trimmed = line.strip()
+        except Exception as e:
+            logger.error(f"提取内容失败 {url}: {e}")
+            return None
 
-                if not trimmed:
-                    continue
+    def extract_from_html(self, html: str, url: str) -> Optional[Dict[str, Any]]:
+        """
+        从HTML源码提取内容（HTTP直连抓取时使用，无需浏览器）
 
-                # 跳过导航菜单
-                skip_keywords = [
-                    '首页', '高考资讯', '阳光志愿', '高招咨询', '招生动态',
-                    '试题评析', '院校库', '专业库', '院校满意度', '专业满意度',
-                    '学籍查询', '学历查询', '学位查询', '在线验证',
-                    '登录', '注册', '更多', '主办单位：', 'Copyright',
-                    '客服热线：', '客服邮箱：', '官方微信', '官方微博',
-                    '学信网', '中心简介', '联系我们', '版权声明', '帮助中心', '网站地图',
-                    '京ICP备', '京公网安备', '教育部学生服务与素质发展中心'
-                ]
-
-                if any(kw in trimmed for kw in skip_keywords):
-                    continue
+        Args:
+            html: 页面HTML源码
+            url: 页面URL（用于日志）
+
+        Returns:
+            提取结果字典，格式与 extract 相同
+        """
+        try:
+            # 只解析一次：先取表格（只读），再转换文本（会改动文档树）
+            soup = BeautifulSoup(html, "html.parser")
+            tables = _soup_tables(soup)
+            return self._build_result(_soup_to_text(soup), url, tables)
+        except Exception as e:
+            logger.error(f"提取内容失败 {url}: {e}")
+            return None
+
+    def _build_result(self, body_text: str, url: str,
+                      tables: Optional[List[Dict]] = None) -> Optional[Dict[str, Any]]:
+        """
+        过滤页面文本并构建提取结果（规则与页面内JS一致）
 
-                # 检测正文开始
-                if not in_content:
-                    if any(kw in trimmed for kw in ['招生章程', '第一章', '第一条', '总则']):
-                        in_content = True
-                    else:
-                        continue
+        Args:
+            body_text: 页面正文文本（innerText 或等价文本）
+            url: 页面URL（用于日志）
+            tables: 已提取的表格
 
-                filtered_lines.append(trimmed)
+        Returns:
+            提取结果字典，内容过少返回None
+        """
+        if not body_text or len(body_text) < self.MIN_PAGE_LENGTH:
+            logger.warning(f"提取内容过少: {url} (长度: {len(body_text) if body_text else 0})")
+            return None
 
-            full_text = '\n\n'.join(filtered_lines)
+        filtered_lines = []
+        in_content = False
 
-            logger.info(f"提取成功: {url} (文本: {len(full_text)}字符)")
+        for line in body_text.split('\n'):
+            trimmed = line.strip()
 
-            return {
-                "text": full_text,
-                "tables": [],
-                "url": url,
-                "text_length": len(full_text),
-                "table_count": 0
-            }
+            if not trimmed or self.skip_pattern.search(trimmed):
+                continue
 
-        except Exception as e:
-            logger.error(f"提取内容失败 {url}: {e}")
-            return None
+            # 检测正文开始
+            if not in_content:
+                if not self.start_pattern.search(trimmed):
+                    continue
+                in_content = True
+
+            filtered_lines.append(trimmed)
+
+        return self._make_result('\n\n'.join(filtered_lines), tables or [], url)
+
+    def _make_result(self, text: str, tables: list, url: str) -> Dict[str, Any]:
+        """构建提取结果字典"""
+        logger.info(f"提取成功: {url} (文本: {len(text)}字符, 表格: {len(tables)}个)")
+
+        return {
+            "text": text,
+            "tables": tables,
+            "url": url,
+            "text_length": len(text),
+            "table_count": len(tables)
+        }
 
     def format_tables_as_markdown(self, tables: list) -> str:
         """
@@ -237,7 +270,10 @@ class RegulationExtractor:
             if not headers and not rows:
                 continue
 
-            # 构建Markdown表格
+            # 构建Markdown表格（单元格中的竖线转义，避免破坏表格结构）
+            headers = [str(h).replace("|", "\\|") for h in headers]
+            rows = [[str(c).replace("|", "\\|") for c in row] for row in rows]
+
             if headers:
                 md_parts.append("| " + " | ".join(headers) + " |")
                 md_parts.append("| " + " | ".join(["---"] * len(headers)) + " |")
@@ -275,6 +311,276 @@ class RegulationExtractor:
             return text
 
 
+# 会产生换行的块级元素（模拟浏览器 innerText 的分行规则）
+BLOCK_TAGS = [
+    "p", "div", "li", "tr", "table", "section", "article", "header", "footer",
+    "nav", "aside", "main", "ul", "ol", "dl", "dt", "dd", "blockquote", "pre",
+    "form", "h1", "h2", "h3", "h4", "h5", "h6",
+]
+
+
+# 数据表格的最少行数（行数更少的一般是排版用表格）
+MIN_TABLE_ROWS = 3
+
+# colspan 上限（防止异常属性值撑大网格）
+MAX_COLSPAN = 100
+
+# 单元格内需要换行的子元素
+CELL_BREAK_TAGS = ("p", "div", "br", "li", "tr")
+
+class _OuterHTMLFormatter(HTMLFormatter):
+    """按浏览器 outerHTML 的方式输出：保持属性顺序，<br> 等空元素不自闭合"""
+
+    def attributes(self, tag):
+        return list(tag.attrs.items())
+
+
+def _substitute_outer_html(text: str) -> str:
+    """浏览器 outerHTML 只转义 &、<、> 和不换行空格"""
+    return EntitySubstitution.substitute_xml(text).replace("\xa0", "&nbsp;")
+
+
+OUTER_HTML_FORMATTER = _OuterHTMLFormatter(
+    entity_substitution=_substitute_outer_html, void_element_close_prefix=None)
+
+# 表格正文中需要移除的元素
+UNWANTED_SELECTORS = "script, style, link, meta, .footer-wrapper, .footer-nav, svg"
+
+
+def html_to_text(html: str) -> str:
+    """
+    将HTML转换为与 document.body.innerText 近似的纯文本
+
+    行内元素不换行，块级元素和<br>换行，单元格之间用Tab分隔
+
+    Args:
+        html: HTML源码
+
+    Returns:
+        纯文本
+    """
+    if not html:
+        return ""
+
+    return _soup_to_text(BeautifulSoup(html, "html.parser"))
+
+
+def _soup_to_text(soup: BeautifulSoup) -> str:
+    """html_to_text 的实现（会修改传入的文档树）"""
+    for tag in soup(["head", "script", "style", "noscript", "template", "svg"]):
+        tag.decompose()
+    for comment in soup.find_all(string=lambda s: isinstance(s, Comment)):
+        comment.extract()
+
+    body = soup.body or soup
+
+    # 源码中的换行和缩进不是可见文本，先折叠为单个空格
+    for node in body.find_all(string=True):
+        collapsed = re.sub(r'\s+', ' ', node)
+        if collapsed != node:
+            node.replace_with(collapsed)
+
+    for br in body.find_all("br"):
+        br.replace_with("\n")
+    for tag in body.find_all(BLOCK_TAGS):
+        tag.insert_before("\n")
+        tag.append("\n")
+    for cell in body.find_all(["td", "th"]):
+        cell.append("\t")
+
+    return body.get_text()
+
+
+def extract_tables(html: str) -> List[Dict]:
+    """
+    提取HTML中的数据表格（与页面内JS提取结果格式一致）
+
+    rowspan/colspan 展开为规则网格，合并单元格的值填入覆盖的每一格，
+    行数少于 MIN_TABLE_ROWS 的表格视为排版表格忽略
+
+    Args:
+        html: HTML源码
+
+    Returns:
+        表格列表，每个表格包含 index、headers、rows、row_count、col_count
+    """
+    if not html or "<table" not in html.lower():
+        return []
+    return _soup_tables(BeautifulSoup(html, "html.parser"))
+
+
+def _soup_tables(soup: BeautifulSoup) -> List[Dict]:
+    """extract_tables 的实现（不修改文档树）"""
+    tables = []
+    for index, table in enumerate(soup.find_all("table")):
+        # 只取本表格的行，嵌套表格的行归属内层表格
+        rows = [tr for tr in table.find_all("tr") if tr.find_parent("table") is table]
+        if len(rows) < MIN_TABLE_ROWS:
+            continue
+
+        grid = _table_grid(rows)
+        if grid:
+            tables.append({
+                "index": index,
+                "headers": grid[0],
+                "rows": grid[1:],
+                "row_count": len(grid),
+                "col_count": len(grid[0]),
+            })
+    return tables
+
+
+def _span(cell, name: str) -> int:
+    """读取 rowspan/colspan 属性（无效值按1处理）"""
+    try:
+        return max(int(cell.get(name, 1)), 1)
+    except (TypeError, ValueError):
+        return 1
+
+
+def _table_grid(rows: list) -> List[List[str]]:
+    """
+    将表格行展开为规则网格
+
+    Args:
+        rows: 表格的 tr 元素列表
+
+    Returns:
+        等宽的二维文本网格（去掉全空行）
+    """
+    grid: List[Dict[int, str]] = [{} for _ in rows]
+
+    for r, tr in enumerate(rows):
+        c = 0
+        for cell in tr.find_all(["td", "th"], recursive=False):
+            while c in grid[r]:
+                c += 1
+            text = re.sub(r'\s+', ' ', cell.get_text()).strip()
+            rowspan = min(_span(cell, "rowspan"), len(rows) - r)
+            colspan = min(_span(cell, "colspan"), MAX_COLSPAN)
+            for dr in range(rowspan):
+                for dc in range(colspan):
+                    grid[r + dr][c + dc] = text
+            c += colspan
+
+    width = max((max(row) + 1 for row in grid if row), default=0)
+    result = [[row.get(i, "") for i in range(width)] for row in grid]
+    return [row for row in result if any(row)]
+
+
+def build_table_document(html: str, start_marker: str, end_marker: str) -> Optional[Tuple[str, int]]:
+    """
+    构建表格章程文档：正文文本 + 清理后的HTML表格（tables/ 目录的MD格式）
+
+    截取开始标记和结束标记之间的正文，行数超过2的表格只保留 colspan/rowspan 属性，
+    单元格内容转为文本（块级元素之间用<br>分隔），其余表格移除，非表格内容提取为段落文本
+
+    Args:
+        html: 页面HTML源码
+        start_marker: 正文开始标记（不含在结果中）
+        end_marker: 正文结束标记
+
+    Returns:
+        (文档内容, 数据表格数)，找不到标记时返回None
+    """
+    body_pos = max(html.lower().find("<body"), 0)
+    start = html.find(start_marker, body_pos)
+    if start < 0:
+        return None
+    end = html.find(end_marker, start)
+    if end < 0:
+        return None
+
+    fragment = BeautifulSoup(html[start + len(start_marker):end], "html.parser")
+    for tag in fragment.select(UNWANTED_SELECTORS):
+        tag.decompose()
+
+    table_count = 0
+    for table in fragment.find_all("table"):
+        if table.decomposed:
+            continue
+        if len(table.find_all("tr")) >= MIN_TABLE_ROWS:
+            table_count += 1
+            _clean_table(fragment, table)
+        else:
+            # 移除排版用小表格
+            table.decompose()
+
+    content = "".join(
+        _table_html(child) if _is_table(child) else _fragment_text(child)
+        for child in fragment.children
+    )
+    return content, table_count
+
+
+def _is_table(node) -> bool:
+    return isinstance(node, Tag) and node.name == "table"
+
+
+def _table_html(table: Tag) -> str:
+    """表格HTML（与浏览器 outerHTML 一致）"""
+    return table.decode(formatter=OUTER_HTML_FORMATTER) + "\n\n"
+
+
+def _clean_table(soup: BeautifulSoup, table: Tag):
+    """清理表格：只保留单元格的 colspan/rowspan，单元格内容转为文本"""
+    # 与浏览器解析结果一致，直接位于 table 下的行放入 tbody
+    direct_rows = table.find_all("tr", recursive=False)
+    if direct_rows:
+        tbody = soup.new_tag("tbody")
+        direct_rows[0].insert_before(tbody)
+        for tr in direct_rows:
+            tbody.append(tr.extract())
+
+    table.attrs = {}
+    for tr in table.find_all("tr"):
+        tr.attrs = {}
+
+    for cell in table.find_all(["td", "th"]):
+        if cell.decomposed:
+            continue
+        spans = {name: cell[name] for name in ("colspan", "rowspan") if cell.get(name)}
+
+        children = list(cell.children)
+        parts = []
+        for idx, node in enumerate(children):
+            if type(node) is NavigableString:
+                text = node.strip()
+                if text:
+                    parts.append(text)
+            elif isinstance(node, Tag):
+                text = node.get_text().strip()
+                if not text:
+                    continue
+                parts.append(text)
+                if idx + 1 < len(children) and node.name in CELL_BREAK_TAGS:
+                    parts.append(None)
+
+        cell.clear(decompose=True)
+        cell.attrs = spans
+        for part in parts:
+            cell.append(soup.new_tag("br") if part is None else NavigableString(part))
+
+
+def _fragment_text(node) -> str:
+    """提取非表格内容的段落文本，包含表格的元素逐个子节点处理"""
+    if type(node) is NavigableString:
+        text = node.strip()
+        return text + "\n\n" if text else ""
+
+    if not isinstance(node, Tag) or node.name in ("table", "script", "style", "svg", "link", "meta"):
+        return ""
+
+    if node.find("table"):
+        return "".join(
+            _table_html(child) if _is_table(child) else _fragment_text(child)
+            for child in node.children
+        )
+
+    text = node.get_text().strip()
+    return text + "\n\n" if text else ""
+
+
 def clean_text(text: str) -> str:
     """
     清理文本内容
@@ -0,0 +1,228 @@
+"""
+HTTP直连抓取模块
+服务端渲染的详情页直接用HTTP获取，只有缺少正文标记时才回退到浏览器
+"""
+
+import asyncio
+import logging
+import time
+from typing import Optional, Dict, Sequence, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .crawl_cache import CrawlCache
+from .crawler import RegulationCrawler, BODY_MARKERS
+from .rate_limiter import AdaptiveRateLimiter, classify_exception
+
+logger = logging.getLogger(__name__)
+
+
+class HttpRegulationFetcher:
+    """HTTP直连抓取器（接口与 RegulationCrawler.fetch_page 一致）"""
+
+    # 请求头与浏览器指纹保持一致
+    HEADERS = {
+        "User-Agent": RegulationCrawler.ANTI_BOT_CONFIG["user_agent"],
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+        "Accept-Language": "zh-CN,zh;q=0.9",
+        "Accept-Encoding": "gzip, deflate",
+        "Connection": "keep-alive",
+    }
+
+    def __init__(self, fallback: Optional[RegulationCrawler] = None,
+                 body_markers: Sequence[str] = BODY_MARKERS,
+                 pool_size: int = 10, timeout: float = 30.0,
+                 max_requests_per_second: float = 0.0,
+                 cache: Optional[CrawlCache] = None,
+                 rate_limiter: Optional[AdaptiveRateLimiter] = None):
+        """
+        初始化抓取器
+
+        Args:
+            fallback: 正文标记缺失时使用的浏览器爬虫（首次需要时才启动），None表示不回退
+            body_markers: 正文标记，HTML中出现任意一个即认为是服务端渲染的完整页面
+            pool_size: 连接池大小（同一主机保持的keep-alive连接数）
+            timeout: 请求超时时间（秒）
+            max_requests_per_second: 每个主机每秒最大请求数，<=0 表示不限速
+            cache: 爬取缓存，提供时记录 ETag/Last-Modified 并支持条件请求
+            rate_limiter: 共用的自适应限速器（可与回退浏览器共用），None表示按 max_requests_per_second 新建
+        """
+        self.fallback = fallback
+        self.body_markers = list(body_markers)
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter or AdaptiveRateLimiter(max_requests_per_second)
+        self.cache = cache
+        self.session: Optional[requests.Session] = None
+        self.stats: Dict[str, int] = {"http": 0, "not_modified": 0, "fallback": 0, "failed": 0}
+        self._fallback_started = False
+        self._fallback_lock = asyncio.Lock()
+
+    async def start(self):
+        """创建HTTP会话（连接复用、gzip解压由requests自动处理）"""
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update(self.HEADERS)
+        logger.info(f"HTTP会话已创建（连接池: {self.pool_size}）")
+
+    async def close(self):
+        """关闭HTTP会话和回退浏览器"""
+        if self.session:
+            self.session.close()
+            self.session = None
+        if self._fallback_started:
+            await self.fallback.close()
+            self._fallback_started = False
+        logger.info(f"HTTP抓取统计: {self.stats}")
+        logger.info(f"限速统计: {self.rate_limiter.summary()}")
+
+    def _get(self, url: str, headers: Optional[Dict[str, str]] = None) -> requests.Response:
+        """同步GET请求（在线程池中执行）"""
+        return self.session.get(url, timeout=self.timeout, headers=headers)
+
+    async def _request(self, url: str, headers: Optional[Dict[str, str]] = None) -> Optional[requests.Response]:
+        """限速后发送请求并向限速器反馈结果，网络异常返回None"""
+        if not self.session:
+            raise RuntimeError("HTTP会话未创建，请先调用 start() 方法")
+
+        await self.rate_limiter.wait(url)
+
+        start = time.monotonic()
+        try:
+            logger.info(f"正在请求: {url}")
+            response = await asyncio.to_thread(self._get, url, headers)
+        except requests.RequestException as e:
+            logger.error(f"HTTP请求失败 {url}: {e}")
+            self.rate_limiter.record(url, ok=False, reason=classify_exception(e))
+            return None
+
+        latency = time.monotonic() - start
+        # 429 和 5xx 说明服务器在限流或过载，错误页跳转通常是触发了反爬
+        if response.status_code == 429 or response.status_code >= 500:
+            self.rate_limiter.record(url, ok=False, latency=latency, reason=f"http_{response.status_code}")
+        elif "error" in response.url.lower():
+            self.rate_limiter.record(url, ok=False, latency=latency, reason="error_redirect")
+        else:
+            self.rate_limiter.record(url, latency=latency)
+        return response
+
+    def _read_html(self, url: str, response: Optional[requests.Response]) -> Optional[str]:
+        """
+        校验响应并解码HTML
+
+        Returns:
+            包含正文标记的HTML，否则返回None
+        """
+        if response is None:
+            return None
+
+        if response.status_code != 200:
+            logger.warning(f"HTTP状态异常 {response.status_code}: {url}")
+            return None
+
+        # 检查是否被重定向到错误页面
+        if "error" in response.url.lower():
+            logger.warning(f"页面访问可能失败: {response.url}")
+            return None
+
+        # 响应头未声明编码时按UTF-8解码，避免requests默认的ISO-8859-1
+        if "charset" not in response.headers.get("Content-Type", "").lower():
+            response.encoding = "utf-8"
+        html = response.text
+
+        if not self.has_body(html):
+            logger.info(f"未检测到正文标记: {url}")
+            return None
+        return html
+
+    @staticmethod
+    def validators(response: Optional[requests.Response]) -> Dict[str, Optional[str]]:
+        """响应的 ETag / Last-Modified（参数名与 CrawlCache.update_validators 一致）"""
+        if response is None:
+            return {"etag": None, "last_modified": None}
+        return {"etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified")}
+
+    def has_body(self, html: Optional[str]) -> bool:
+        """检查HTML是否包含正文标记"""
+        return bool(html) and any(marker in html for marker in self.body_markers)
+
+    async def fetch_static(self, url: str) -> Optional[str]:
+        """
+        仅通过HTTP获取页面，不回退浏览器
+
+        Args:
+            url: 目标URL
+
+        Returns:
+            包含正文标记的HTML，请求失败或缺少正文标记返回None
+        """
+        response = await self._request(url)
+        return self._read_html(url, response)
+
+    async def fetch_if_modified(self, url: str, conditional: bool = True
+                                ) -> Tuple[bool, Optional[str], Dict[str, Optional[str]]]:
+        """
+        条件请求：带上缓存的 ETag / Last-Modified，服务器返回304时不下载正文
+
+        响应的 ETag / Last-Modified 不会自动写入缓存：调用方在内容提取并保存成功后
+        调用 cache.update_validators(url, **validators)，避免保存失败或文件被删除后一直返回304
+
+        Args:
+            url: 目标URL
+            conditional: 是否发送条件请求头（目标文件不存在时应为False，强制下载）
+
+        Returns:
+            (是否可能有变化, HTML, validators)；304时返回 (False, None, ...)，
+            请求失败或缺少正文标记时返回 (True, None, ...)
+        """
+        headers = self.cache.conditional_headers(url) if conditional and self.cache is not None else {}
+        response = await self._request(url, headers)
+        validators = self.validators(response)
+
+        if response is not None and response.status_code == 304:
+            self.stats["not_modified"] += 1
+            logger.info(f"内容未变化(304): {url}")
+            return False, None, validators
+
+        html = self._read_html(url, response)
+        if html is not None:
+            self.stats["http"] += 1
+        return True, html, validators
+
+    async def fetch_page(self, url: str) -> Optional[str]:
+        """
+        获取页面内容：优先HTTP直连，缺少正文标记时回退到浏览器
+
+        Args:
+            url: 目标URL
+
+        Returns:
+            页面HTML内容，失败返回None
+        """
+        html = await self.fetch_static(url)
+        if html is not None:
+            self.stats["http"] += 1
+            return html
+
+        if self.fallback is None:
+            self.stats["failed"] += 1
+            return None
+
+        await self._ensure_fallback()
+        self.stats["fallback"] += 1
+        html = await self.fallback.fetch_page(url)
+        if html is None:
+            self.stats["failed"] += 1
+        return html
+
+    async def _ensure_fallback(self):
+        """首次回退时才启动浏览器"""
+        async with self._fallback_lock:
+            if not self._fallback_started:
+                logger.info("启动浏览器用于回退抓取")
+                await self.fallback.start()
+                self._fallback_started = True
@@ -3,32 +3,49 @@
 负责读取任务和记录爬取进度
 """
 
-import openpyxl
+import json
 from openpyxl import load_workbook
-from openpyxl.styles import Font, PatternFill, Alignment
 from pathlib import Path
 import logging
 from typing import List, Dict, Optional
 from datetime import datetime
 
+from .excel_writer import StreamingExcelWriter
+from .task_store import TaskStore
+
 logger = logging.getLogger(__name__)
 
 
 class ProgressTracker:
     """进度跟踪管理器"""
 
-    def __init__(self, excel_path: str, progress_path: str = "爬取进度.xlsx"):
+    # 进度Excel表头
+    HEADERS = ["序号", "院校名称", "详情页链接", "状态", "字符数", "表格数", "爬取时间", "备注"]
+
+    def __init__(self, excel_path: str, progress_path: str = "爬取进度.xlsx",
+                 journal_path: Optional[str] = None, export_every: int = 0,
+                 store: Optional[TaskStore] = None, job: str = "details"):
         """
         初始化进度跟踪器
 
         Args:
             excel_path: 源Excel文件路径
-            progress_path: 进度Excel文件路径
+            progress_path: 进度Excel文件路径（导出用）
+            journal_path: 进度日志文件路径（JSONL，进度的唯一数据源），默认与进度Excel同名
+            export_every: 每更新多少条自动导出一次Excel，0表示只在 export_excel()/close() 时导出
+            store: SQLite任务存储，提供时同步任务状态并用索引查询剩余任务
+            job: 在任务存储中的任务类型
         """
         self.excel_path = Path(excel_path)
         self.progress_path = Path(progress_path)
+        self.journal_path = Path(journal_path) if journal_path else self.progress_path.with_suffix(".jsonl")
+        self.export_every = export_every
+        self.store = store
+        self.job = job
         self.tasks: List[Dict] = []
         self.progress_data: Dict[str, Dict] = {}
+        self._journal_file = None
+        self._updates_since_export = 0
 
     def load_tasks(self) -> List[Dict]:
         """
@@ -84,35 +101,69 @@ class ProgressTracker:
 
         wb.close()
         self.tasks = tasks
+        if self.store is not None:
+            self.store.add_tasks(tasks, self.job)
 
         logger.info(f"加载完成: 共 {len(tasks)} 个任务")
         return tasks
 
     def init_progress_file(self):
-        """初始化进度Excel文件"""
+        """初始化进度文件（优先从进度日志恢复，旧的进度Excel会导入日志）"""
+        if self.journal_path.exists():
+            logger.info(f"进度日志已存在: {self.journal_path}")
+            self._load_journal()
+            if not self.progress_path.exists():
+                self._create_progress_excel()
+            return
+
         if self.progress_path.exists():
             logger.info(f"进度文件已存在: {self.progress_path}")
             self._load_progress()
+            self._migrate_to_journal()
             return
 
-        # 创建新进度文件
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "爬取进度"
-
-        # 设置表头
-        headers = ["序号", "院校名称", "详情页链接", "状态", "字符数", "表格数", "爬取时间", "备注"]
-        for col_idx, header in enumerate(headers, 1):
-            cell = ws.cell(row=1, column=col_idx)
-            cell.value = header
-            cell.font = Font(bold=True)
-            cell.fill = PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
-            cell.alignment = Alignment(horizontal="center", vertical="center")
-
-        # 保存
-        wb.save(self.progress_path)
+        self._create_progress_excel()
+        self.journal_path.touch()
+
+    def _create_progress_excel(self):
+        """创建只有表头的进度Excel文件"""
+        with StreamingExcelWriter(self.progress_path) as writer:
+            writer.add_sheet("爬取进度", self.HEADERS, header_style="gray_header")
         logger.info(f"已创建进度文件: {self.progress_path}")
 
+    def _load_journal(self):
+        """从进度日志加载进度（同一学校以最后一条记录为准）"""
+        with open(self.journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # 中断时可能留下不完整的最后一行
+                    logger.warning(f"跳过损坏的进度记录: {line[:50]}")
+                    continue
+                school_name = record.pop("school_name", None)
+                if school_name:
+                    self.progress_data[school_name] = record
+
+        logger.info(f"已加载进度: {len(self.progress_data)} 条记录")
+
+    def _migrate_to_journal(self):
+        """将进度Excel中的记录导入进度日志"""
+        for school_name, progress in self.progress_data.items():
+            self._append_journal(school_name, progress)
+        logger.info(f"已导入进度日志: {self.journal_path}")
+
+    def _append_journal(self, school_name: str, progress: Dict):
+        """追加一条进度记录（O(1)，不重写已有内容）"""
+        if self._journal_file is None:
+            self._journal_file = open(self.journal_path, 'a', encoding='utf-8')
+
+        record = {"school_name": school_name, **progress}
+        self._journal_file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        self._journal_file.flush()
+
     def _load_progress(self):
         """从进度文件加载已记录的进度"""
         wb = load_workbook(self.progress_path, read_only=True, data_only=True)
@@ -156,56 +207,53 @@ class ProgressTracker:
             "note": note
         }
 
-        # 写入Excel
-        self._write_progress_to_excel()
-
-    def _write_progress_to_excel(self):
-        """将进度数据写入Excel文件"""
-        wb = load_workbook(self.progress_path)
-        ws = wb.active
+        # 追加到进度日志，按需导出Excel
+        self._append_journal(school_name, self.progress_data[school_name])
+        if self.store is not None:
+            self.store.update(school_name, status, self.job, text_length=text_length,
+                              table_count=table_count, note=note)
 
-        # 清除现有数据（保留表头）
-        for row in ws.iter_rows(min_row=2, max_row=ws.max_row):
-            for cell in row:
-                cell.value = None
+        self._updates_since_export += 1
+        if self.export_every and self._updates_since_export >= self.export_every:
+            self.export_excel()
 
-        # 写入数据
-        row_idx = 2
-        for idx, task in enumerate(self.tasks, 1):
-            school_name = task["school_name"]
-            url = task["url"]
+    def export_excel(self):
+        """将当前进度导出到进度Excel文件"""
+        self._write_progress_to_excel()
+        self._updates_since_export = 0
+        logger.info(f"已导出进度Excel: {self.progress_path}")
 
-            # 获取进度数据
-            progress = self.progress_data.get(school_name, {})
+    def close(self):
+        """关闭进度日志，并导出最终的进度Excel"""
+        if self._journal_file is not None:
+            self._journal_file.close()
+            self._journal_file = None
+        if self._updates_since_export:
+            self.export_excel()
 
-            ws.cell(row=row_idx, column=1, value=idx)
-            ws.cell(row=row_idx, column=2, value=school_name)
-            ws.cell(row=row_idx, column=3, value=url)
-            ws.cell(row=row_idx, column=4, value=progress.get("status", "待爬取"))
-            ws.cell(row=row_idx, column=5, value=progress.get("text_length", 0))
-            ws.cell(row=row_idx, column=6, value=progress.get("table_count", 0))
-            ws.cell(row=row_idx, column=7, value=progress.get("crawl_time", ""))
-            ws.cell(row=row_idx, column=8, value=progress.get("note", ""))
-
-            # 根据状态设置颜色
-            status = progress.get("status", "待爬取")
-            if status == "成功":
-                fill = PatternFill(start_color="90EE90", end_color="90EE90", fill_type="solid")
-            elif status == "失败":
-                fill = PatternFill(start_color="FFB6C1", end_color="FFB6C1", fill_type="solid")
-            elif status == "跳过":
-                fill = PatternFill(start_color="FFE4B5", end_color="FFE4B5", fill_type="solid")
-            else:
-                fill = None
-
-            if fill:
-                for col in range(1, 9):
-                    ws.cell(row=row_idx, column=col).fill = fill
-
-            row_idx += 1
-
-        # 保存
-        wb.save(self.progress_path)
+    def _write_progress_to_excel(self):
+        """将进度数据写入Excel文件（流式写入，整表重新生成）"""
+        with StreamingExcelWriter(self.progress_path) as writer:
+            sheet = writer.add_sheet("爬取进度", self.HEADERS, header_style="gray_header")
+
+            for idx, task in enumerate(self.tasks, 1):
+                school_name = task["school_name"]
+
+                # 获取进度数据
+                progress = self.progress_data.get(school_name, {})
+                status = progress.get("status", "待爬取")
+
+                # 根据状态设置颜色（待爬取不着色）
+                sheet.append([
+                    idx,
+                    school_name,
+                    task["url"],
+                    status,
+                    progress.get("text_length", 0),
+                    progress.get("table_count", 0),
+                    progress.get("crawl_time", ""),
+                    progress.get("note", ""),
+                ], style=status if status in ("成功", "失败", "跳过") else None)
 
     def get_remaining_tasks(self, storage_dir: str = "details") -> List[Dict]:
         """
@@ -217,6 +265,14 @@ class ProgressTracker:
         Returns:
             剩余任务列表
         """
+        if self.store is not None:
+            # 一次目录扫描同步新增文件，剩余任务由索引查询得到（已到重试时间的任务排在最后）
+            self.store.import_directory(storage_dir, self.job)
+            remaining = [{"school_name": t["school_name"], "url": t["url"]}
+                         for t in self.store.get_remaining(self.job) + self.store.get_retry_due(self.job)]
+            logger.info(f"剩余任务数: {len(remaining)} / {len(self.tasks)}")
+            return remaining
+
         remaining = []
         storage_path = Path(storage_dir)
 
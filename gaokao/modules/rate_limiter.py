@@ -0,0 +1,223 @@
+"""
+自适应限速模块
+按主机令牌桶限速，速率按 AIMD 调整：响应正常时每次加性提速，出错、跳转到错误页或响应过慢时
+乘性降速，连续出错时指数退避暂停；统计当前速率、错误率等指标供调参
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections import Counter, deque
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+
+def classify_exception(exc: BaseException) -> str:
+    """把抓取异常归类为 timeout / network / error"""
+    name = type(exc).__name__.lower()
+    if "timeout" in name or "timed out" in str(exc).lower():
+        return "timeout"
+    if "connection" in name or "net::" in str(exc):
+        return "network"
+    return "error"
+
+
+class _HostState:
+    """单个主机的令牌桶和统计"""
+
+    def __init__(self, rate: float, burst: float, window: int):
+        self.rate = rate
+        self.tokens = burst
+        # 令牌桶的计时起点；退避暂停时推到暂停结束时刻，暂停期间不积累令牌
+        self.updated = time.monotonic()
+        self.consecutive_errors = 0
+        self.outcomes = deque(maxlen=window)
+        self.requests = 0
+        self.errors = 0
+        self.slow = 0
+        self.backoffs = 0
+        self.latency_total = 0.0
+        self.latency_count = 0
+        self.reasons = Counter()
+
+
+class AdaptiveRateLimiter:
+    """自适应限速器（按主机令牌桶 + AIMD 速率调整 + 指数退避）"""
+
+    def __init__(self, max_rate: float = 2.0, initial_rate: Optional[float] = None,
+                 min_rate: float = 0.1, burst: float = 1.0, increase: float = 0.05,
+                 decrease: float = 0.5, slow_threshold: float = 5.0,
+                 backoff_base: float = 2.0, max_backoff: float = 60.0,
+                 jitter: float = 0.2, window: int = 50):
+        """
+        初始化限速器
+
+        Args:
+            max_rate: 每个主机每秒最大请求数，<=0 表示不限速（仍统计指标）
+            initial_rate: 初始速率，None表示从 max_rate 开始
+            min_rate: 降速下限
+            burst: 令牌桶容量（允许连续发出的请求数）
+            increase: 每次正常响应增加的速率（加性增）
+            decrease: 出错或响应过慢时速率乘以的系数（乘性减）
+            slow_threshold: 响应时间超过该值（秒）视为过慢
+            backoff_base: 连续出错时的首次暂停时间（秒），之后每次翻倍
+            max_backoff: 暂停时间上限（秒）
+            jitter: 等待时间的随机浮动比例，避免请求间隔过于规律
+            window: 计算错误率的最近请求数
+        """
+        self.max_rate = max_rate
+        self.min_rate = min(min_rate, max_rate) if max_rate > 0 else min_rate
+        self.initial_rate = initial_rate if initial_rate is not None else max_rate
+        self.burst = burst
+        self.increase = increase
+        self.decrease = decrease
+        self.slow_threshold = slow_threshold
+        self.backoff_base = backoff_base
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.window = window
+        self._hosts: Dict[str, _HostState] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_rate > 0
+
+    def _state(self, url: str) -> _HostState:
+        host = urlparse(url).netloc
+        state = self._hosts.get(host)
+        if state is None:
+            rate = min(max(self.initial_rate, self.min_rate), self.max_rate) if self.enabled else 0.0
+            state = self._hosts[host] = _HostState(rate, self.burst, self.window)
+        return state
+
+    def _refill(self, state: _HostState, now: float):
+        """按当前速率补充令牌（速率变化前调用，保证之前的时间按原速率计算）"""
+        if now > state.updated:
+            state.tokens = min(self.burst, state.tokens + (now - state.updated) * state.rate)
+            state.updated = now
+
+    def reserve(self, url: str) -> float:
+        """
+        预约该URL所属主机的下一个请求时隙
+
+        Args:
+            url: 即将访问的URL
+
+        Returns:
+            发出请求前需要等待的时间（秒）
+        """
+        with self._lock:
+            state = self._state(url)
+            state.requests += 1
+            if not self.enabled:
+                return 0.0
+
+            now = time.monotonic()
+            self._refill(state, now)
+            state.tokens -= 1
+            delay = (state.updated - now) + max(-state.tokens / state.rate, 0.0)
+
+        if delay > 0 and self.jitter > 0:
+            delay *= random.uniform(1 - self.jitter, 1 + self.jitter)
+        return delay
+
+    async def wait(self, url: str):
+        """等待该URL所属主机的下一个可用请求时隙（异步）"""
+        delay = self.reserve(url)
+        if delay > 0:
+            logger.debug(f"限速等待 {delay:.2f} 秒")
+            await asyncio.sleep(delay)
+
+    def acquire(self, url: str):
+        """等待该URL所属主机的下一个可用请求时隙（同步脚本使用）"""
+        delay = self.reserve(url)
+        if delay > 0:
+            time.sleep(delay)
+
+    def record(self, url: str, ok: bool = True, latency: Optional[float] = None,
+               reason: Optional[str] = None):
+        """
+        反馈请求结果，调整该主机的速率
+
+        Args:
+            url: 访问的URL
+            ok: 请求是否正常（网络错误、超时、跳转到错误页、5xx/429 为 False）
+            latency: 响应时间（秒）
+            reason: 失败原因（timeout/network/error_redirect/http_503 等），用于统计
+        """
+        with self._lock:
+            state = self._state(url)
+            now = time.monotonic()
+            if self.enabled:
+                self._refill(state, now)
+            if latency is not None:
+                state.latency_total += latency
+                state.latency_count += 1
+
+            slow = ok and latency is not None and latency > self.slow_threshold
+            state.outcomes.append(not ok)
+
+            if ok and not slow:
+                state.consecutive_errors = 0
+                if self.enabled:
+                    state.rate = min(self.max_rate, state.rate + self.increase)
+                return
+
+            if self.enabled:
+                state.rate = max(self.min_rate, state.rate * self.decrease)
+
+            if slow:
+                state.slow += 1
+                logger.debug(f"响应过慢 {latency:.1f}秒，降速至 {state.rate:.2f}/秒")
+                return
+
+            state.errors += 1
+            state.consecutive_errors += 1
+            state.reasons[reason or "error"] += 1
+            if self.enabled:
+                pause = min(self.max_backoff, self.backoff_base * 2 ** (state.consecutive_errors - 1))
+                state.tokens = min(state.tokens, 0.0)
+                state.updated = max(state.updated, now + pause)
+                state.backoffs += 1
+                logger.warning(f"请求异常({reason or 'error'})，降速至 {state.rate:.2f}/秒，暂停 {pause:.1f} 秒")
+
+    def metrics(self) -> Dict[str, Dict]:
+        """各主机的指标：当前速率、请求数、错误数、近期错误率、过慢次数、退避次数、平均响应时间、错误原因"""
+        with self._lock:
+            return {
+                host: {
+                    "rate": round(state.rate, 3),
+                    "requests": state.requests,
+                    "errors": state.errors,
+                    "error_ratio": round(sum(state.outcomes) / len(state.outcomes), 3) if state.outcomes else 0.0,
+                    "slow": state.slow,
+                    "backoffs": state.backoffs,
+                    "avg_latency": round(state.latency_total / state.latency_count, 3) if state.latency_count else 0.0,
+                    "reasons": dict(state.reasons),
+                }
+                for host, state in self._hosts.items()
+            }
+
+    def summary(self) -> Dict:
+        """所有主机的汇总指标"""
+        metrics = self.metrics()
+        requests = sum(m["requests"] for m in metrics.values())
+        errors = sum(m["errors"] for m in metrics.values())
+        reasons = Counter()
+        for m in metrics.values():
+            reasons.update(m["reasons"])
+        return {
+            "hosts": len(metrics),
+            "rate": {host: m["rate"] for host, m in metrics.items()},
+            "requests": requests,
+            "errors": errors,
+            "error_ratio": max((m["error_ratio"] for m in metrics.values()), default=0.0),
+            "slow": sum(m["slow"] for m in metrics.values()),
+            "backoffs": sum(m["backoffs"] for m in metrics.values()),
+            "reasons": dict(reasons),
+        }
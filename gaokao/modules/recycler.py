@@ -0,0 +1,139 @@
+"""
+页面回收模块
+长时间爬取时 Chromium 渲染进程内存随导航次数持续增长：每个页面导航满 N 次，
+或渲染进程内存超过阈值时，关闭页面（及其上下文）换上新页面，并记录每次回收前后的内存
+"""
+
+import logging
+from typing import Awaitable, Callable, Dict, Optional
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+# 读取页面JS堆大小（未安装 psutil 时作为内存的近似值）
+JS_HEAP_SCRIPT = "() => (performance.memory ? performance.memory.usedJSHeapSize : null)"
+
+
+def renderer_rss_mb() -> Optional[float]:
+    """
+    当前进程启动的所有 Chromium 渲染进程的常驻内存合计（MB）
+
+    Returns:
+        内存MB，未安装 psutil 时返回None
+    """
+    if psutil is None:
+        return None
+
+    total = 0
+    for proc in psutil.Process().children(recursive=True):
+        try:
+            if "--type=renderer" in proc.cmdline():
+                total += proc.memory_info().rss
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            continue
+    return total / 1024 / 1024
+
+
+class PageRecycler:
+    """页面回收器（导航次数 + 内存阈值）"""
+
+    def __init__(self, max_navigations: int = 200, max_memory_mb: float = 1536.0,
+                 check_every: int = 10):
+        """
+        初始化回收器
+
+        Args:
+            max_navigations: 单个页面导航满该次数后回收，<=0 表示不按次数回收
+            max_memory_mb: 渲染进程内存（MB）超过该值时回收，<=0 表示不检查内存；
+                未安装 psutil 时以页面JS堆大小近似
+            check_every: 每隔多少次导航检查一次内存
+        """
+        self.max_navigations = max_navigations
+        self.max_memory_mb = max_memory_mb
+        self.check_every = max(1, check_every)
+        self.memory_source = "renderer_rss" if psutil is not None else "js_heap"
+        self._navigations: Dict[object, int] = {}
+        self._since_check = 0
+        self.stats: Dict[str, float] = {
+            "navigations": 0, "recycles": 0, "by_count": 0, "by_memory": 0,
+            "peak_mb": 0.0, "freed_mb": 0.0,
+        }
+
+    async def measure(self, page=None) -> Optional[float]:
+        """
+        当前内存（MB）：优先渲染进程常驻内存，未安装 psutil 时读取页面JS堆大小
+
+        Args:
+            page: 未安装 psutil 时用于读取JS堆的页面
+
+        Returns:
+            内存MB，无法获取时返回None
+        """
+        memory = renderer_rss_mb()
+        if memory is None and page is not None:
+            try:
+                heap = await page.evaluate(JS_HEAP_SCRIPT)
+                memory = heap / 1024 / 1024 if heap else None
+            except Exception as e:
+                logger.debug(f"读取JS堆大小失败: {e}")
+        if memory is not None:
+            self.stats["peak_mb"] = max(self.stats["peak_mb"], round(memory, 1))
+        return memory
+
+    def navigated(self, page):
+        """记录页面完成一次导航"""
+        self._navigations[page] = self._navigations.get(page, 0) + 1
+        self._since_check += 1
+        self.stats["navigations"] += 1
+
+    async def maybe_recycle(self, page, reopen: Callable[[object], Awaitable[object]]):
+        """
+        需要时回收页面
+
+        Args:
+            page: 当前页面
+            reopen: 关闭旧页面（及其上下文）并返回新页面的协程函数
+
+        Returns:
+            可继续使用的页面（未回收时为原页面）
+        """
+        count = self._navigations.get(page, 0)
+        reason = None
+        memory = None
+
+        if self.max_navigations > 0 and count >= self.max_navigations:
+            reason = "by_count"
+        elif self.max_memory_mb > 0 and self._since_check >= self.check_every:
+            self._since_check = 0
+            memory = await self.measure(page)
+            if memory is not None and memory >= self.max_memory_mb:
+                reason = "by_memory"
+
+        if reason is None:
+            return page
+
+        if memory is None:
+            memory = await self.measure(page)
+        new_page = await reopen(page)
+        self._navigations.pop(page, None)
+        after = await self.measure(new_page)
+
+        self.stats["recycles"] += 1
+        self.stats[reason] += 1
+        if memory is not None and after is not None:
+            self.stats["freed_mb"] = round(self.stats["freed_mb"] + max(memory - after, 0.0), 1)
+
+        cause = f"导航 {count} 次" if reason == "by_count" else f"内存超过 {self.max_memory_mb:.0f}MB"
+        if memory is not None and after is not None:
+            logger.info(f"回收页面（{cause}），内存 {memory:.0f}MB → {after:.0f}MB [{self.memory_source}]")
+        else:
+            logger.info(f"回收页面（{cause}）")
+        return new_page
+
+    def summary(self) -> Dict:
+        """回收统计：导航次数、回收次数（按次数/按内存）、内存峰值和累计释放量"""
+        return {**self.stats, "memory_source": self.memory_source}
@@ -0,0 +1,157 @@
+"""
+学校名称匹配模块
+向量化标准化学校名称（全半角转换、空白处理），按标准名称做 merge 连接，
+精确匹配失败的名称用字符二元组索引给出模糊匹配候选
+"""
+
+import difflib
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+# 全角ASCII字符（！到～）和全角空格转半角
+FULL_TO_HALF = {code: code - 0xFEE0 for code in range(0xFF01, 0xFF5F)}
+FULL_TO_HALF[0x3000] = 0x20
+
+# 模糊匹配默认阈值（二元组 Dice 系数）
+FUZZY_THRESHOLD = 0.6
+
+
+def normalize_school_name(name):
+    """标准化单个学校名称（全角转半角、去除首尾空白、连续空白转单个空格），非字符串原样返回"""
+    if not isinstance(name, str):
+        return name
+    return ' '.join(name.translate(FULL_TO_HALF).split())
+
+
+def normalize_school_names(names: pd.Series) -> pd.Series:
+    """
+    向量化标准化学校名称，规则与 normalize_school_name 一致
+
+    Args:
+        names: 学校名称列
+
+    Returns:
+        标准名称列（索引不变，空值和非字符串为 NaN）
+    """
+    return (names.str.translate(FULL_TO_HALF)
+            .str.strip()
+            .str.replace(r'\s+', ' ', regex=True))
+
+
+def lookup_by_name(names: pd.Series, reference: pd.DataFrame, value_column: str,
+                   name_column: str = '学校名称') -> pd.Series:
+    """
+    按标准名称连接参考表，取出每个学校对应的值
+
+    Args:
+        names: 待匹配的学校名称列
+        reference: 参考表（如教育部名单）
+        value_column: 参考表中要取出的列
+        name_column: 参考表中的学校名称列
+
+    Returns:
+        与 names 索引对齐的值，未匹配为 NaN（参考表名称重复时取最后一条）
+    """
+    right = pd.DataFrame({
+        'key': normalize_school_names(reference[name_column]),
+        'value': reference[value_column],
+    }).dropna(subset=['key']).drop_duplicates('key', keep='last')
+
+    left = pd.DataFrame({'key': normalize_school_names(names)})
+    merged = left.merge(right, on='key', how='left')
+    return pd.Series(merged['value'].to_numpy(), index=names.index, name=value_column)
+
+
+def fill_by_name(df: pd.DataFrame, column: str, values, name_column: str = '学校名称',
+                 only_empty: bool = False) -> pd.Series:
+    """
+    按学校名称填充列（原地修改 df）
+
+    Args:
+        df: 数据表
+        column: 要填充的列
+        values: 学校名称 -> 值 的字典，或与 df 索引对齐的 Series（如 lookup_by_name 的结果）
+        name_column: df 中的学校名称列
+        only_empty: 只填充空值和空字符串
+
+    Returns:
+        被填充行的布尔掩码
+    """
+    if isinstance(values, dict):
+        reference = pd.DataFrame({'name': list(values), 'value': list(values.values())})
+        values = lookup_by_name(df[name_column], reference, 'value', name_column='name')
+
+    mask = values.notna()
+    if only_empty:
+        mask &= df[column].isna() | (df[column] == '')
+    if mask.any():
+        if df[column].dtype != object:
+            df[column] = df[column].astype(object)
+        df.loc[mask, column] = values[mask]
+    return mask
+
+
+def _bigrams(name: str) -> set:
+    if len(name) < 2:
+        return {name}
+    return {name[i:i + 2] for i in range(len(name) - 1)}
+
+
+class FuzzyNameIndex:
+    """学校名称模糊匹配索引（字符二元组倒排索引 + Dice 系数）"""
+
+    def __init__(self, names):
+        """
+        建立索引
+
+        Args:
+            names: 候选学校名称
+        """
+        self.names: List[str] = []
+        self.grams: List[set] = []
+        self.postings: Dict[str, List[int]] = defaultdict(list)
+
+        for name in dict.fromkeys(normalize_school_name(n) for n in names if isinstance(n, str)):
+            grams = _bigrams(name)
+            idx = len(self.names)
+            self.names.append(name)
+            self.grams.append(grams)
+            for gram in grams:
+                self.postings[gram].append(idx)
+
+    def search(self, name: str, limit: int = 3,
+               threshold: float = FUZZY_THRESHOLD) -> List[Tuple[str, float]]:
+        """
+        查找相似名称
+
+        Args:
+            name: 学校名称
+            limit: 最多返回个数
+            threshold: Dice 系数阈值
+
+        Returns:
+            [(候选名称, 相似度)]，按相似度降序（相同时按编辑相似度）
+        """
+        name = normalize_school_name(name)
+        grams = _bigrams(name)
+        shared = defaultdict(int)
+        for gram in grams:
+            for idx in self.postings.get(gram, ()):
+                shared[idx] += 1
+
+        candidates = []
+        for idx, count in shared.items():
+            score = 2 * count / (len(grams) + len(self.grams[idx]))
+            if score >= threshold:
+                ratio = difflib.SequenceMatcher(None, name, self.names[idx]).ratio()
+                candidates.append((score, ratio, self.names[idx]))
+
+        candidates.sort(key=lambda c: (-c[0], -c[1]))
+        return [(candidate, round(score, 3)) for score, _, candidate in candidates[:limit]]
+
+    def best(self, name: str, threshold: float = FUZZY_THRESHOLD) -> Optional[Tuple[str, float]]:
+        """最相似的名称，没有达到阈值的候选时返回 None"""
+        results = self.search(name, limit=1, threshold=threshold)
+        return results[0] if results else None
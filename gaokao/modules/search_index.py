@@ -0,0 +1,282 @@
+"""
+全文检索模块
+用SQLite FTS5为招生章程MD文件建立按章切分的倒排索引：中文按相邻二字切分（bigram），
+英文和数字按单词切分；按内容哈希增量更新，查询返回学校、章节和摘要
+"""
+
+import logging
+import re
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .cleaner import RegulationCleaner
+from .corpus import get_corpus
+
+logger = logging.getLogger(__name__)
+
+# 默认索引的MD目录
+DEFAULT_SOURCES = ("details", "tables", "special")
+
+# 中文连续片段、英文数字单词
+TOKEN_PATTERN = re.compile(r'[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+|[0-9A-Za-z]+')
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    切分为索引词：中文片段切分为相邻二字（单字片段保留单字），英文数字单词转小写
+
+    Args:
+        text: 文本
+
+    Returns:
+        按出现顺序的索引词
+    """
+    tokens = []
+    for match in TOKEN_PATTERN.finditer(text):
+        run = match.group()
+        if run.isascii():
+            tokens.append(run.lower())
+        elif len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend([run[i:i + 2] for i in range(len(run) - 1)])
+    return tokens
+
+
+def build_match_query(terms: Sequence[str]) -> Optional[str]:
+    """
+    把检索词转为 FTS5 查询：每个检索词是一个短语（bigram 连续出现即原文连续出现），多个检索词为“与”关系
+
+    单个汉字无法组成二字词，按前缀匹配（只能匹配到它后面还有汉字的位置）
+
+    Returns:
+        FTS5 MATCH 表达式，没有可检索内容时为 None
+    """
+    phrases = []
+    for term in terms:
+        tokens = tokenize(term)
+        if not tokens:
+            continue
+        if len(tokens) == 1 and len(tokens[0]) == 1 and not tokens[0].isascii():
+            phrases.append(f'{tokens[0]}*')
+        else:
+            phrases.append('"' + ' '.join(tokens) + '"')
+    return ' AND '.join(phrases) if phrases else None
+
+
+def make_snippet(text: str, terms: Sequence[str], width: int = 40) -> str:
+    """
+    截取第一个检索词附近的摘要，检索词用 ** 标出
+
+    Args:
+        text: 章节内容
+        terms: 检索词
+        width: 检索词前后保留的字符数
+
+    Returns:
+        单行摘要
+    """
+    lowered = text.lower()
+    positions = [(lowered.find(term.lower()), term) for term in terms if term]
+    positions = [(pos, term) for pos, term in positions if pos >= 0]
+    pos, term = min(positions) if positions else (0, '')
+
+    start = max(0, pos - width)
+    end = min(len(text), pos + len(term) + width)
+    snippet = text[start:end]
+    for t in terms:
+        if t:
+            snippet = re.sub(re.escape(t), lambda m: f"**{m.group()}**", snippet, flags=re.IGNORECASE)
+    snippet = ' '.join(snippet.split())
+    return ('…' if start > 0 else '') + snippet + ('…' if end < len(text) else '')
+
+
+class RegulationIndex:
+    """招生章程全文索引"""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS documents (
+        id INTEGER PRIMARY KEY,
+        source TEXT NOT NULL,
+        school_name TEXT NOT NULL,
+        content_hash TEXT NOT NULL,
+        UNIQUE (source, school_name)
+    );
+    CREATE TABLE IF NOT EXISTS segments (
+        id INTEGER PRIMARY KEY,
+        doc_id INTEGER NOT NULL,
+        chapter TEXT NOT NULL,
+        text TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_segments_doc ON segments (doc_id);
+    CREATE VIRTUAL TABLE IF NOT EXISTS segments_fts USING fts5(tokens, content='');
+    """
+
+    def __init__(self, db_path: str = "regulation_index.db"):
+        """
+        初始化索引
+
+        Args:
+            db_path: SQLite数据库文件路径
+        """
+        self.db_path = Path(db_path)
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+        self.cleaner = RegulationCleaner()
+
+    def close(self):
+        """关闭数据库连接"""
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def split_chapters(self, text: str) -> List[Tuple[str, str]]:
+        """
+        按最高一级标题切分章程：[(章节标题, 内容)]，第一个标题之前的内容标题为空
+
+        Args:
+            text: 章程文本
+
+        Returns:
+            章节列表（没有标题时为整篇一节）
+        """
+        root = self.cleaner.segment(text)
+        sections = []
+        first = root["children"][0]["start"] if root["children"] else len(text)
+        if text[:first].strip():
+            sections.append(("", text[:first]))
+        for node in root["children"]:
+            title = text[node["title_start"]:node["title_end"]].strip()
+            sections.append((title, text[node["start"]:node["end"]]))
+        return sections
+
+    def _delete_document(self, doc_id: int):
+        # 无内容FTS表删除时需要提供原来的索引词
+        rows = self.conn.execute("SELECT id, text FROM segments WHERE doc_id = ?", (doc_id,)).fetchall()
+        self.conn.executemany(
+            "INSERT INTO segments_fts (segments_fts, rowid, tokens) VALUES ('delete', ?, ?)",
+            [(segment_id, ' '.join(tokenize(text))) for segment_id, text in rows])
+        self.conn.execute("DELETE FROM segments WHERE doc_id = ?", (doc_id,))
+        self.conn.execute("DELETE FROM documents WHERE id = ?", (doc_id,))
+
+    def _add_document(self, source: str, school_name: str, digest: str, text: str):
+        cursor = self.conn.execute(
+            "INSERT INTO documents (source, school_name, content_hash) VALUES (?, ?, ?)",
+            (source, school_name, digest))
+        doc_id = cursor.lastrowid
+        for chapter, section in self.split_chapters(text):
+            segment_id = self.conn.execute(
+                "INSERT INTO segments (doc_id, chapter, text) VALUES (?, ?, ?)",
+                (doc_id, chapter, section)).lastrowid
+            self.conn.execute("INSERT INTO segments_fts (rowid, tokens) VALUES (?, ?)",
+                              (segment_id, ' '.join(tokenize(section))))
+
+    def update(self, sources: Iterable[str] = DEFAULT_SOURCES) -> Dict[str, int]:
+        """
+        增量更新索引：按目录清单中的内容哈希找出新增、修改和删除的文件
+
+        Args:
+            sources: MD目录列表
+
+        Returns:
+            统计信息（added/updated/removed/unchanged）
+        """
+        counts = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+        for source in sources:
+            corpus = get_corpus(source)
+            corpus.refresh()
+            hashes = {name[:-len(corpus.suffix)]: digest for name, digest in corpus.hashes().items()}
+            corpus.save_manifest()
+
+            indexed = {school_name: (doc_id, digest) for doc_id, school_name, digest in self.conn.execute(
+                "SELECT id, school_name, content_hash FROM documents WHERE source = ?", (source,))}
+
+            changed = [name for name, digest in hashes.items() if indexed.get(name, (None, None))[1] != digest]
+            removed = [name for name in indexed if name not in hashes]
+            counts["unchanged"] += len(hashes) - len(changed)
+
+            with self.conn:
+                for school_name in removed:
+                    self._delete_document(indexed[school_name][0])
+                    counts["removed"] += 1
+                for school_name, text in corpus.iter_texts(f"{name}{corpus.suffix}" for name in changed):
+                    if school_name in indexed:
+                        self._delete_document(indexed[school_name][0])
+                        counts["updated"] += 1
+                    else:
+                        counts["added"] += 1
+                    self._add_document(source, school_name, hashes[school_name], text)
+
+        logger.info(f"索引更新完成: {counts}")
+        return counts
+
+    def rebuild(self, sources: Iterable[str] = DEFAULT_SOURCES) -> Dict[str, int]:
+        """清空后重建索引"""
+        with self.conn:
+            self.conn.execute("DELETE FROM documents")
+            self.conn.execute("DELETE FROM segments")
+            self.conn.execute("INSERT INTO segments_fts (segments_fts) VALUES ('delete-all')")
+        return self.update(sources)
+
+    def search(self, terms: Sequence[str], limit: int = 20, source: Optional[str] = None,
+               snippet_width: int = 40) -> List[Dict]:
+        """
+        检索章节
+
+        Args:
+            terms: 检索词（同时包含全部检索词的章节才会返回）
+            limit: 最多返回条数
+            source: 只检索某个目录，None表示全部
+            snippet_width: 摘要中检索词前后保留的字符数
+
+        Returns:
+            结果列表，按相关度排序，每条包含 school_name、source、chapter、snippet
+        """
+        query = build_match_query(terms)
+        if query is None:
+            return []
+
+        sql = """
+            SELECT d.school_name, d.source, s.chapter, s.text
+            FROM segments_fts
+            JOIN segments s ON s.id = segments_fts.rowid
+            JOIN documents d ON d.id = s.doc_id
+            WHERE segments_fts MATCH ?
+        """
+        params = [query]
+        if source:
+            sql += " AND d.source = ?"
+            params.append(source)
+        sql += " ORDER BY segments_fts.rank LIMIT ?"
+        params.append(limit)
+
+        return [
+            {"school_name": school_name, "source": src, "chapter": chapter,
+             "snippet": make_snippet(text, terms, snippet_width)}
+            for school_name, src, chapter, text in self.conn.execute(sql, params)
+        ]
+
+    def count(self, terms: Sequence[str], source: Optional[str] = None) -> Tuple[int, int]:
+        """命中的 (文档数, 章节数)"""
+        query = build_match_query(terms)
+        if query is None:
+            return 0, 0
+        sql = """
+            SELECT COUNT(DISTINCT s.doc_id), COUNT(*)
+            FROM segments_fts
+            JOIN segments s ON s.id = segments_fts.rowid
+            JOIN documents d ON d.id = s.doc_id
+            WHERE segments_fts MATCH ?
+        """
+        params = [query]
+        if source:
+            sql += " AND d.source = ?"
+            params.append(source)
+        return tuple(self.conn.execute(sql, params).fetchone())
@@ -8,21 +8,32 @@ import logging
 from pathlib import Path
 from typing import Optional
 
+from .corpus import get_corpus
+from .crawl_cache import content_hash
+from .task_store import TaskStore
+
 logger = logging.getLogger(__name__)
 
 
 class RegulationStorage:
     """招生章程存储管理器"""
 
-    def __init__(self, output_dir: str = "details"):
+    def __init__(self, output_dir: str = "details", store: Optional[TaskStore] = None,
+                 job: str = "details"):
         """
         初始化存储管理器
 
         Args:
             output_dir: MD文件保存目录
+            store: SQLite任务存储，提供时保存成功后记录内容长度和哈希
+            job: 在任务存储中的任务类型
         """
         self.output_dir = Path(output_dir)
+        self.store = store
+        self.job = job
         self._ensure_output_dir()
+        # 与清洗、合并、检索共用同一个读取器（同一进程内只扫描一次目录）
+        self.corpus = get_corpus(self.output_dir)
 
     def _ensure_output_dir(self):
         """确保输出目录存在"""
@@ -55,6 +66,12 @@ class RegulationStorage:
                 f.write(content)
 
             logger.info(f"已保存: {filepath.name} ({len(content)} 字符)")
+            # 同步共享读取器的扫描结果和清单并写回清单文件，之后的清洗、合并不必重新读取该文件
+            stat = filepath.stat()
+            self.corpus.record(filepath.name, stat.st_size, stat.st_mtime_ns, content_hash(content))
+            self.corpus.save_manifest()
+            if self.store is not None:
+                self.store.update(school_name, "成功", self.job, content=content, count_attempt=False)
             return True
 
         except Exception as e:
@@ -105,12 +122,13 @@ class RegulationStorage:
         return safe_name
 
     def get_saved_count(self) -> int:
-        """获取已保存的MD文件数量"""
-        return len(list(self.output_dir.glob("*.md")))
+        """获取已保存的MD文件数量（重新扫描目录，包含其他代码写入的文件）"""
+        return len(self.corpus.refresh())
 
     def get_all_saved_files(self) -> list:
-        """获取所有已保存的文件名列表"""
-        return [f.stem for f in self.output_dir.glob("*.md")]
+        """获取所有已保存的文件名列表（重新扫描目录，包含其他代码写入的文件）"""
+        self.corpus.refresh()
+        return self.corpus.school_names()
 
 
 def save_empty_file(school_name: str, reason: str = "无法获取内容", output_dir: str = "details"):
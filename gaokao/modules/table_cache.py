@@ -0,0 +1,167 @@
+"""
+Excel列式缓存模块
+在Excel旁维护一份列式缓存（安装 pyarrow 时为 Parquet，否则为按列存储的JSON），
+缓存记录源文件的大小、修改时间和 pandas 版本，三者都未变化时直接读取缓存，否则重新解析Excel并刷新缓存
+
+两种缓存格式都只包含数据（不使用 pickle），读取缓存不会执行其中的代码
+"""
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Optional, Tuple
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+# Parquet 元数据中记录源文件状态和 pandas 版本的键
+SOURCE_STAT_KEY = b"gaokao.source_stat"
+PANDAS_VERSION_KEY = b"gaokao.pandas_version"
+
+
+def _source_stat(path: Path) -> Tuple[int, int]:
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def cache_paths(path) -> Tuple[Path, Path]:
+    """缓存文件路径（与Excel同目录的隐藏文件）：(Parquet路径, JSON路径)"""
+    path = Path(path)
+    return (path.with_name(f".{path.name}.parquet"),
+            path.with_name(f".{path.name}.json"))
+
+
+def _legacy_pickle_path(path: Path) -> Path:
+    """旧版本的 pickle 缓存（不再读取，刷新缓存时删除）"""
+    return path.with_name(f".{path.name}.pkl")
+
+
+def _write_atomic(path: Path, write):
+    tmp_path = path.with_name(path.name + ".tmp")
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _read_parquet(cache_file: Path, stat: Tuple[int, int]) -> Optional[pd.DataFrame]:
+    if pq is None or not cache_file.exists():
+        return None
+    metadata = pq.read_schema(cache_file).metadata or {}
+    if json.loads(metadata.get(SOURCE_STAT_KEY, b"null")) != list(stat):
+        return None
+    if metadata.get(PANDAS_VERSION_KEY, b"").decode() != pd.__version__:
+        return None
+    return pq.read_table(cache_file).to_pandas()
+
+
+def _decode_json(text: str, stat: Tuple[int, int]) -> Optional[pd.DataFrame]:
+    cached = json.loads(text)
+    if cached.get("source_stat") != list(stat) or cached.get("pandas") != pd.__version__:
+        return None
+
+    data = {}
+    for column in cached["columns"]:
+        dtype = column["dtype"]
+        if dtype.startswith("datetime64"):
+            data[column["name"]] = pd.to_datetime(pd.Series(column["values"], dtype=object)).astype(dtype)
+        else:
+            data[column["name"]] = pd.Series(column["values"], dtype=dtype)
+    return pd.DataFrame(data)
+
+
+def _encode_json(df: pd.DataFrame, stat: Tuple[int, int]) -> str:
+    """按列编码为JSON（日期列转为ISO字符串，NaN 保持为 NaN），含无法编码的值时抛出 TypeError"""
+    columns = []
+    for name in df.columns:
+        series = df[name]
+        if pd.api.types.is_datetime64_any_dtype(series):
+            values = [None if pd.isna(v) else v.isoformat() for v in series]
+        else:
+            values = series.tolist()
+        columns.append({"name": name, "dtype": str(series.dtype), "values": values})
+    return json.dumps({"source_stat": list(stat), "pandas": pd.__version__, "columns": columns},
+                      ensure_ascii=False)
+
+
+def _read_json(cache_file: Path, stat: Tuple[int, int]) -> Optional[pd.DataFrame]:
+    if not cache_file.exists():
+        return None
+    with open(cache_file, "r", encoding="utf-8") as f:
+        return _decode_json(f.read(), stat)
+
+
+def _write_parquet(cache_file: Path, df: pd.DataFrame, stat: Tuple[int, int]):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[SOURCE_STAT_KEY] = json.dumps(list(stat)).encode()
+    metadata[PANDAS_VERSION_KEY] = pd.__version__.encode()
+    table = table.replace_schema_metadata(metadata)
+    _write_atomic(cache_file, lambda tmp: pq.write_table(table, tmp))
+
+
+def _write_json(cache_file: Path, df: pd.DataFrame, stat: Tuple[int, int]):
+    text = _encode_json(df, stat)
+    # 写入前确认能还原出同样的 DataFrame（值和列类型），否则不缓存
+    pd.testing.assert_frame_equal(_decode_json(text, stat), df)
+
+    def write(tmp):
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    _write_atomic(cache_file, write)
+
+
+def read_excel_cached(path) -> pd.DataFrame:
+    """
+    读取Excel第一个工作表，优先使用列式缓存
+
+    源文件的大小或修改时间与缓存记录不一致时（脚本写回了Excel或手工编辑过），或 pandas 升级后，
+    重新解析Excel并刷新缓存；缓存读写失败只记录日志，不影响返回结果
+
+    Args:
+        path: Excel文件路径
+
+    Returns:
+        与 pd.read_excel(path) 相同的 DataFrame
+    """
+    path = Path(path)
+    stat = _source_stat(path)
+    parquet_file, json_file = cache_paths(path)
+
+    for read, cache_file in ((_read_parquet, parquet_file), (_read_json, json_file)):
+        try:
+            df = read(cache_file, stat)
+        except Exception as e:
+            logger.warning(f"读取缓存失败 {cache_file}: {e}")
+            continue
+        if df is not None:
+            logger.debug(f"使用缓存: {cache_file}")
+            return df
+
+    df = pd.read_excel(path)
+    _legacy_pickle_path(path).unlink(missing_ok=True)
+
+    # 混合类型的 object 列无法转换为 Arrow 时退回JSON
+    if pa is not None:
+        try:
+            _write_parquet(parquet_file, df, stat)
+            json_file.unlink(missing_ok=True)
+            return df
+        except (pa.ArrowException, OSError) as e:
+            logger.debug(f"写入Parquet缓存失败，改用JSON: {e}")
+            parquet_file.unlink(missing_ok=True)
+    try:
+        _write_json(json_file, df, stat)
+    except (TypeError, ValueError, AssertionError, OSError) as e:
+        # 含JSON无法表示的值（如 object 列中的日期）时不缓存，下次仍直接解析Excel
+        logger.debug(f"写入缓存失败 {json_file}: {e}")
+        json_file.unlink(missing_ok=True)
+    return df
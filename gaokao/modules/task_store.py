@@ -0,0 +1,438 @@
+"""
+任务存储模块
+用SQLite统一记录各爬取任务的学校、链接、状态、重试次数和内容哈希；
+失败任务按错误类型进入重试队列（带随机抖动的指数退避），超过次数进入死信列表
+"""
+
+import logging
+import os
+import random
+import sqlite3
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from openpyxl import load_workbook
+
+from .crawl_cache import content_hash
+from .excel_writer import StreamingExcelWriter
+
+logger = logging.getLogger(__name__)
+
+# 已完成状态（不再需要爬取）
+DONE_STATUSES = ("成功", "跳过")
+
+# 等待重试（在重试队列中）
+RETRY_STATUS = "重试"
+
+# 死信（重试次数用完或不可重试的错误，需要人工处理或 requeue_dead_letters 重新入队）
+DEAD_STATUS = "放弃"
+
+# 可自动重试的错误类型：超时、网络错误、空白页、跳转到错误页、其他异常
+RETRYABLE_ERRORS = ("timeout", "network", "empty_page", "error_redirect", "error")
+
+# 重试参数：最多尝试次数、首次重试延迟和延迟上限（秒）
+MAX_ATTEMPTS = 3
+RETRY_BASE_DELAY = 30.0
+RETRY_MAX_DELAY = 600.0
+
+
+class TaskStore:
+    """SQLite任务存储"""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS tasks (
+        job TEXT NOT NULL,
+        school_name TEXT NOT NULL,
+        url TEXT,
+        status TEXT NOT NULL DEFAULT '待爬取',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        text_length INTEGER NOT NULL DEFAULT 0,
+        table_count INTEGER NOT NULL DEFAULT 0,
+        content_hash TEXT,
+        note TEXT,
+        error_kind TEXT,
+        next_retry_at REAL,
+        created_at TEXT NOT NULL,
+        updated_at TEXT NOT NULL,
+        PRIMARY KEY (job, school_name)
+    );
+    CREATE INDEX IF NOT EXISTS idx_tasks_job_status ON tasks (job, status);
+    """
+
+    # 旧数据库缺少的列
+    MIGRATIONS = {
+        "error_kind": "ALTER TABLE tasks ADD COLUMN error_kind TEXT",
+        "next_retry_at": "ALTER TABLE tasks ADD COLUMN next_retry_at REAL",
+    }
+
+    def __init__(self, db_path: str = "gaokao_tasks.db"):
+        """
+        初始化任务存储
+
+        Args:
+            db_path: SQLite数据库文件路径
+        """
+        self.db_path = Path(db_path)
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        """为旧数据库补充新增的列"""
+        columns = {row["name"] for row in self.conn.execute("PRAGMA table_info(tasks)")}
+        with self.conn:
+            for column, sql in self.MIGRATIONS.items():
+                if column not in columns:
+                    self.conn.execute(sql)
+
+    def close(self):
+        """关闭数据库连接"""
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @staticmethod
+    def _now() -> str:
+        return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    def add_tasks(self, tasks: Iterable[Dict], job: str = "details") -> int:
+        """
+        批量添加任务（已存在的任务只更新链接，保留状态）
+
+        Args:
+            tasks: 任务列表，每个任务包含school_name和url字段
+            job: 任务类型（details/tables/special等）
+
+        Returns:
+            处理的任务数
+        """
+        now = self._now()
+        rows = [(job, t["school_name"], t.get("url"), now, now) for t in tasks]
+        with self.conn:
+            self.conn.executemany(
+                """
+                INSERT INTO tasks (job, school_name, url, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (job, school_name) DO UPDATE SET url = excluded.url
+                """,
+                rows,
+            )
+        return len(rows)
+
+    def import_excel(self, excel_path: str, job: str = "details",
+                     name_column: str = "学校名称",
+                     url_column: str = "招生章程详情页链接（本部）") -> int:
+        """
+        从Excel导入任务
+
+        Args:
+            excel_path: Excel文件路径
+            job: 任务类型
+            name_column: 学校名称列名
+            url_column: 链接列名
+
+        Returns:
+            导入的任务数
+        """
+        wb = load_workbook(excel_path, read_only=True, data_only=True)
+        ws = wb.active
+
+        rows = ws.iter_rows(values_only=True)
+        header = [str(h).strip() if h is not None else "" for h in next(rows)]
+        if name_column not in header or url_column not in header:
+            wb.close()
+            raise ValueError(f"无法找到必需的列：{name_column} 或 {url_column}")
+        name_idx = header.index(name_column)
+        url_idx = header.index(url_column)
+
+        tasks = []
+        for row in rows:
+            if not row or len(row) <= max(name_idx, url_idx):
+                continue
+            school_name, url = row[name_idx], row[url_idx]
+            if not school_name or not isinstance(url, str) or not url.startswith("http"):
+                continue
+            tasks.append({"school_name": str(school_name).strip(), "url": url.strip()})
+        wb.close()
+
+        count = self.add_tasks(tasks, job)
+        logger.info(f"已导入任务 [{job}]: {count} 个")
+        return count
+
+    def import_directory(self, directory: str, job: str = "details") -> int:
+        """
+        将目录中已存在的MD文件标记为成功（一次目录扫描，用于从文件状态迁移）
+
+        Args:
+            directory: MD文件目录
+            job: 任务类型
+
+        Returns:
+            标记为成功的任务数
+        """
+        dir_path = Path(directory)
+        if not dir_path.exists():
+            return 0
+
+        pending = {row["school_name"] for row in self.conn.execute(
+            "SELECT school_name FROM tasks WHERE job = ? AND status NOT IN (?, ?)",
+            (job, *DONE_STATUSES))}
+
+        now = self._now()
+        rows = []
+        with os.scandir(dir_path) as entries:
+            for entry in entries:
+                name, ext = os.path.splitext(entry.name)
+                if ext != ".md" or name not in pending:
+                    continue
+                with open(entry.path, "r", encoding="utf-8") as f:
+                    content = f.read()
+                rows.append((len(content), content_hash(content), now, job, name))
+
+        with self.conn:
+            self.conn.executemany(
+                """
+                UPDATE tasks SET status = '成功', text_length = ?, content_hash = ?, updated_at = ?
+                WHERE job = ? AND school_name = ?
+                """,
+                rows,
+            )
+        logger.info(f"已同步目录 {directory} [{job}]: {len(rows)} 个已完成")
+        return len(rows)
+
+    def update(self, school_name: str, status: str, job: str = "details",
+               content: Optional[str] = None, text_length: Optional[int] = None,
+               table_count: int = 0, note: str = "", count_attempt: bool = True):
+        """
+        更新任务状态（成功/跳过时尝试次数清零，attempts 只记录当前这一轮连续失败的次数）
+
+        Args:
+            school_name: 学校名称
+            status: 状态（成功/失败/跳过）
+            job: 任务类型
+            content: 保存的内容（提供时记录长度和哈希）
+            text_length: 文本字符数（未提供content时使用）
+            table_count: 表格数量
+            note: 备注
+            count_attempt: 是否计入尝试次数（只对未完成状态生效）
+        """
+        done = status in DONE_STATUSES
+        if content is not None:
+            text_length = len(content)
+        digest = content_hash(content) if content is not None else None
+        now = self._now()
+
+        with self.conn:
+            self.conn.execute(
+                """
+                INSERT INTO tasks (job, school_name, status, attempts, text_length, table_count,
+                                   content_hash, note, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (job, school_name) DO UPDATE SET
+                    status = excluded.status,
+                    attempts = CASE WHEN excluded.status IN (?, ?) THEN 0
+                                    ELSE tasks.attempts + excluded.attempts END,
+                    text_length = excluded.text_length,
+                    table_count = excluded.table_count,
+                    content_hash = COALESCE(excluded.content_hash, tasks.content_hash),
+                    note = excluded.note,
+                    error_kind = NULL,
+                    next_retry_at = NULL,
+                    updated_at = excluded.updated_at
+                """,
+                (job, school_name, status, 1 if count_attempt and not done else 0, text_length or 0,
+                 table_count, digest, note, now, now, *DONE_STATUSES),
+            )
+
+    def fail(self, school_name: str, kind: str, job: str = "details", note: str = "",
+             max_attempts: int = MAX_ATTEMPTS, base_delay: float = RETRY_BASE_DELAY,
+             max_delay: float = RETRY_MAX_DELAY) -> str:
+        """
+        记录一次失败：可重试的错误按指数退避（随机抖动 0.5-1.5 倍）进入重试队列，
+        尝试次数用完或错误不可重试时进入死信列表
+
+        Args:
+            school_name: 学校名称
+            kind: 错误类型（timeout/network/empty_page/error_redirect/extract_failed/error）
+            job: 任务类型
+            note: 备注（错误详情）
+            max_attempts: 最多尝试次数（含首次）
+            base_delay: 首次重试延迟（秒），之后每次翻倍
+            max_delay: 重试延迟上限（秒）
+
+        Returns:
+            新状态（重试/放弃）
+        """
+        row = self.conn.execute(
+            "SELECT attempts FROM tasks WHERE job = ? AND school_name = ?", (job, school_name)).fetchone()
+        attempts = (row["attempts"] if row else 0) + 1
+
+        if kind in RETRYABLE_ERRORS and attempts < max_attempts:
+            status = RETRY_STATUS
+            delay = min(max_delay, base_delay * 2 ** (attempts - 1)) * random.uniform(0.5, 1.5)
+            next_retry_at = time.time() + delay
+        else:
+            status = DEAD_STATUS
+            next_retry_at = None
+
+        now = self._now()
+        with self.conn:
+            self.conn.execute(
+                """
+                INSERT INTO tasks (job, school_name, status, attempts, note, error_kind, next_retry_at,
+                                   created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (job, school_name) DO UPDATE SET
+                    status = excluded.status,
+                    attempts = excluded.attempts,
+                    note = excluded.note,
+                    error_kind = excluded.error_kind,
+                    next_retry_at = excluded.next_retry_at,
+                    updated_at = excluded.updated_at
+                """,
+                (job, school_name, status, attempts, note, kind, next_retry_at, now, now),
+            )
+        return status
+
+    def get_retry_due(self, job: str = "details", now: Optional[float] = None) -> List[Dict]:
+        """
+        获取已到重试时间的任务
+
+        Args:
+            job: 任务类型
+            now: 当前时间戳，None表示 time.time()
+
+        Returns:
+            任务列表（按重试时间排序），每个任务包含school_name、url、attempts、error_kind字段
+        """
+        rows = self.conn.execute(
+            """
+            SELECT school_name, url, attempts, error_kind FROM tasks
+            WHERE job = ? AND status = ? AND next_retry_at <= ?
+            ORDER BY next_retry_at
+            """,
+            (job, RETRY_STATUS, time.time() if now is None else now),
+        )
+        return [dict(row) for row in rows]
+
+    def next_retry_time(self, job: str = "details") -> Optional[float]:
+        """重试队列中最早的重试时间戳，队列为空时返回None"""
+        row = self.conn.execute(
+            "SELECT MIN(next_retry_at) AS t FROM tasks WHERE job = ? AND status = ?",
+            (job, RETRY_STATUS)).fetchone()
+        return row["t"]
+
+    def get_dead_letters(self, job: str = "details") -> List[Dict]:
+        """获取死信列表（school_name、url、attempts、error_kind、note）"""
+        rows = self.conn.execute(
+            """
+            SELECT school_name, url, attempts, error_kind, note FROM tasks
+            WHERE job = ? AND status = ? ORDER BY rowid
+            """,
+            (job, DEAD_STATUS),
+        )
+        return [dict(row) for row in rows]
+
+    def requeue_dead_letters(self, job: str = "details") -> int:
+        """
+        死信任务重新入队（状态改为待爬取，尝试次数清零）
+
+        Returns:
+            重新入队的任务数
+        """
+        with self.conn:
+            cursor = self.conn.execute(
+                """
+                UPDATE tasks SET status = '待爬取', attempts = 0, next_retry_at = NULL, updated_at = ?
+                WHERE job = ? AND status = ?
+                """,
+                (self._now(), job, DEAD_STATUS),
+            )
+        logger.info(f"死信重新入队 [{job}]: {cursor.rowcount} 个")
+        return cursor.rowcount
+
+    def get_task(self, school_name: str, job: str = "details") -> Optional[Dict]:
+        """获取单个任务记录"""
+        row = self.conn.execute(
+            "SELECT * FROM tasks WHERE job = ? AND school_name = ?", (job, school_name)).fetchone()
+        return dict(row) if row else None
+
+    def get_remaining(self, job: str = "details") -> List[Dict]:
+        """
+        获取未完成的任务（单次索引查询，不含重试队列和死信）
+
+        Args:
+            job: 任务类型
+
+        Returns:
+            任务列表，每个任务包含school_name、url、attempts字段
+        """
+        rows = self.conn.execute(
+            """
+            SELECT school_name, url, attempts FROM tasks
+            WHERE job = ? AND status NOT IN (?, ?, ?, ?)
+            ORDER BY rowid
+            """,
+            (job, *DONE_STATUSES, RETRY_STATUS, DEAD_STATUS),
+        )
+        return [dict(row) for row in rows]
+
+    def get_tasks(self, job: str = "details", status: Optional[str] = None) -> List[Dict]:
+        """获取任务列表，可按状态过滤"""
+        if status is None:
+            rows = self.conn.execute("SELECT * FROM tasks WHERE job = ? ORDER BY rowid", (job,))
+        else:
+            rows = self.conn.execute(
+                "SELECT * FROM tasks WHERE job = ? AND status = ? ORDER BY rowid", (job, status))
+        return [dict(row) for row in rows]
+
+    def get_statistics(self, job: str = "details") -> Dict:
+        """获取统计信息"""
+        counts = {row["status"]: row["n"] for row in self.conn.execute(
+            "SELECT status, COUNT(*) AS n FROM tasks WHERE job = ? GROUP BY status", (job,))}
+        total = sum(counts.values())
+        completed = counts.get("成功", 0)
+        failed = counts.get("失败", 0)
+        retrying = counts.get(RETRY_STATUS, 0)
+        dead = counts.get(DEAD_STATUS, 0)
+
+        return {
+            "total": total,
+            "completed": completed,
+            "failed": failed,
+            "retrying": retrying,
+            "dead": dead,
+            "pending": total - completed - failed - retrying - dead,
+            "success_rate": f"{completed / total * 100:.2f}%" if total > 0 else "0%"
+        }
+
+    def export_excel(self, output_path: str, job: str = "details"):
+        """
+        导出任务状态到Excel
+
+        Args:
+            output_path: 输出Excel路径
+            job: 任务类型
+        """
+        headers = ["序号", "院校名称", "详情页链接", "状态", "尝试次数", "字符数", "表格数",
+                   "内容哈希", "错误类型", "更新时间", "备注"]
+
+        with StreamingExcelWriter(output_path) as writer:
+            sheet = writer.add_sheet(job, headers, header_style="gray_header")
+            sheet.append_rows(
+                [idx, task["school_name"], task["url"], task["status"], task["attempts"],
+                 task["text_length"], task["table_count"], task["content_hash"],
+                 task["error_kind"], task["updated_at"], task["note"]]
+                for idx, task in enumerate(self.get_tasks(job), 1)
+            )
+
+        logger.info(f"已导出任务状态 [{job}]: {output_path}")
@@ -4,7 +4,11 @@
 添加备注列并填写匹配失败原因
 """
 
-import pandas as pd
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from modules.table_cache import read_excel_cached
 
 
 def add_remarks_column():
@@ -17,7 +21,7 @@ def add_remarks_column():
 
     # 1. 读取数据
     print("📂 正在读取数据...")
-    df = pd.read_excel('招生章程.xlsx')
+    df = read_excel_cached('招生章程.xlsx')
     print(f"   ✅ 读取 {len(df)} 所学校")
     print()
 
@@ -6,7 +6,10 @@
 
 from openpyxl import load_workbook
 from pathlib import Path
-import pandas as pd
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from modules.table_cache import read_excel_cached
 
 # 文件路径
 EXCEL_FILE = "achievement/招生章程（详情）.xlsx"
@@ -24,7 +27,7 @@ print("开始添加特殊招生章程列")
 print("=" * 60)
 
 # 读取Excel获取学校名称列和行号对应关系
-df = pd.read_excel(EXCEL_FILE)
+df = read_excel_cached(EXCEL_FILE)
 school_column_name = "学校名称"
 
 print(f"\n总学校数: {len(df)}")
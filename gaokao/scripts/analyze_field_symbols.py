@@ -4,8 +4,12 @@
 分析具体字段的符号使用习惯
 """
 
-import pandas as pd
-from collections import defaultdict
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from modules.table_cache import read_excel_cached
+from modules.symbol_stats import count_series, to_dict
 
 
 def analyze_field_symbols(file_path, file_name, fields_to_analyze):
@@ -14,7 +18,7 @@ def analyze_field_symbols(file_path, file_name, fields_to_analyze):
     print(f"文件：{file_name}")
     print(f"{'='*80}\n")
 
-    df = pd.read_excel(file_path)
+    df = read_excel_cached(file_path)
     print(f"总行数：{len(df)}\n")
 
     results = {}
@@ -28,57 +32,21 @@ def analyze_field_symbols(file_path, file_name, fields_to_analyze):
         print(f"字段：{field}")
         print(f"{'─'*60}")
 
-        # 统计该字段的所有符号使用
-        full_parentheses = 0  # 全角括号
-        half_parentheses = 0  # 半角括号
-        full_comma = 0  # 全角逗号
-        half_comma = 0  # 半角逗号
-        full_period = 0  # 全角句号
-        half_period = 0  # 半角句号
-        dunhao = 0  # 顿号
+        # 统计该字段的所有符号使用（整列扫描一次）
+        values = df[field][df[field].notna()].astype(str)
+        counts = to_dict(count_series(values))
+        full_parentheses = counts.get('全角左括号', 0) + counts.get('全角右括号', 0)
+        half_parentheses = counts.get('半角左括号', 0) + counts.get('半角右括号', 0)
+        full_comma = counts.get('全角逗号', 0)
+        half_comma = counts.get('半角逗号', 0)
+        full_period = counts.get('全角句号', 0)
+        half_period = counts.get('半角句号', 0)
+        dunhao = counts.get('顿号', 0)
 
         # 收集示例（前10个）
-        full_paren_examples = []
-        half_paren_examples = []
-        dunhao_examples = []
-
-        for value in df[field]:
-            if pd.isna(value):
-                continue
-
-            value_str = str(value)
-
-            # 统计括号
-            full_left = value_str.count('（')
-            full_right = value_str.count('）')
-            half_left = value_str.count('(')
-            half_right = value_str.count(')')
-
-            full_parentheses += (full_left + full_right)
-            half_parentheses += (half_left + half_right)
-
-            # 统计逗号
-            full_comma += value_str.count('，')
-            half_comma += value_str.count(',')
-
-            # 统计句号
-            full_period += value_str.count('。')
-            half_period += value_str.count('.')
-
-            # 统计顿号
-            dunhao_count = value_str.count('、')
-            dunhao += dunhao_count
-
-            # 收集示例
-            if full_left > 0 or full_right > 0:
-                if len(full_paren_examples) < 10:
-                    full_paren_examples.append(value_str)
-            if half_left > 0 or half_right > 0:
-                if len(half_paren_examples) < 10:
-                    half_paren_examples.append(value_str)
-            if dunhao_count > 0:
-                if len(dunhao_examples) < 10:
-                    dunhao_examples.append(value_str)
+        full_paren_examples = values[values.str.contains('[（）]')].head(10).tolist()
+        half_paren_examples = values[values.str.contains(r'[()]')].head(10).tolist()
+        dunhao_examples = values[values.str.contains('、', regex=False)].head(10).tolist()
 
         # 计算总数
         total_parens = full_parentheses + half_parentheses
@@ -4,61 +4,13 @@
 统计Excel文件和MD文件中符号的全半角使用习惯
 """
 
-import pandas as pd
-from collections import defaultdict
+import sys
 from pathlib import Path
 
-
-def count_symbols(text):
-    """统计文本中的符号使用情况"""
-    if not text or not isinstance(text, str):
-        return defaultdict(int)
-
-    symbols = {
-        # 全角符号
-        '（': '全角左括号',
-        '）': '全角右括号',
-        '，': '全角逗号',
-        '。': '全角句号',
-        '、': '顿号',
-        '：': '全角冒号',
-        '；': '全角分号',
-        '"': '全角左双引号',
-        '"': '全角右双引号',
- ''': '全角左单引号',
- ''': '全角右单引号',
-        '《': '全角左书名号',
-        '》': '全角右书名号',
-        '【': '全角左方括号',
-        '】': '全角右方括号',
-        '！': '全角感叹号',
-        '？': '全角问号',
-
-        # 半角符号
-        '(': '半角左括号',
-        ')': '半角右括号',
-        ',': '半角逗号',
-        '.': '半角句号',
-        ':': '半角冒号',
-        ';': '半角分号',
-        '"': '半角双引号',
-        "'": '半角单引号',
-        '<': '半角小于号',
-        '>': '半角大于号',
-        '[': '半角左方括号',
-        ']': '半角右方括号',
-        '!': '半角感叹号',
-        '?': '半角问号',
-    }
-
-    counts = defaultdict(int)
-
-    for char, name in symbols.items():
-        count = text.count(char)
-        if count > 0:
-            counts[name] += count
-
-    return dict(counts)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from modules.table_cache import read_excel_cached
+from modules.corpus import get_corpus
+from modules.symbol_stats import count_dataframe, count_files
 
 
 def analyze_excel_file(file_path, file_name, exclude_columns=None):
@@ -68,7 +20,7 @@ def analyze_excel_file(file_path, file_name, exclude_columns=None):
     print(f"{'='*60}\n")
 
     try:
-        df = pd.read_excel(file_path)
+        df = read_excel_cached(file_path)
     except Exception as e:
         print(f"读取文件失败：{e}")
         return None
@@ -83,22 +35,8 @@ def analyze_excel_file(file_path, file_name, exclude_columns=None):
             if col in df.columns:
                 df = df.drop(columns=[col])
 
-    # 统计所有符号
-    total_counts = defaultdict(int)
-    column_counts = {}
-
-    for col in df.columns:
-        col_counts = defaultdict(int)
-        for value in df[col]:
-            counts = count_symbols(value)
-            for symbol, count in counts.items():
-                col_counts[symbol] += count
-                total_counts[symbol] += count
-
-        if col_counts:
-            column_counts[col] = dict(col_counts)
-
-    return dict(total_counts), column_counts
+    # 统计所有符号（每列拼接后扫描一次）
+    return count_dataframe(df)
 
 
 def analyze_details_folder(folder_path, file_name):
@@ -107,8 +45,7 @@ def analyze_details_folder(folder_path, file_name):
     print(f"文件夹：{file_name}")
     print(f"{'='*60}\n")
 
-    folder = Path(folder_path)
-    md_files = list(folder.glob('*.md'))
+    md_files = get_corpus(folder_path).paths()
 
     if not md_files:
         print("未找到MD文件")
@@ -117,26 +54,11 @@ def analyze_details_folder(folder_path, file_name):
     print(f"文件数量：{len(md_files)}")
     print(f"路径：{folder_path}\n")
 
-    total_counts = defaultdict(int)
-    file_counts = {}
-
-    for md_file in md_files:
-        try:
-            with open(md_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-
-            counts = count_symbols(content)
-
-            for symbol, count in counts.items():
-                total_counts[symbol] += count
-
-            if counts:
-                file_counts[md_file.name] = dict(counts)
-
-        except Exception as e:
-            print(f"读取文件失败 {md_file.name}: {e}")
+    total_counts, file_counts, errors = count_files(md_files)
+    for name, error in errors.items():
+        print(f"读取文件失败 {name}: {error}")
 
-    return dict(total_counts), file_counts
+    return total_counts, file_counts
 
 
 def print_summary(total_counts, title="总体统计"):
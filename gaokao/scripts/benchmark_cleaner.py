@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+RegulationCleaner.clean_text 性能基准
+
+对比逐个正则多次扫描的旧实现和字面量预筛选 + 按需替换的新实现，
+在 details/ 全量MD文件上统计吞吐量（MB/s），并校验两者输出一致
+"""
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from modules.cleaner import RegulationCleaner
+
+DETAILS_DIR = "details"
+
+
+def legacy_clean_text(text, compiled_patterns):
+    """旧实现：每个模式一次 re.sub，再做三次全文正则替换和 split/strip/join"""
+    if not text:
+        return ""
+
+    for pattern in compiled_patterns:
+        text = pattern.sub('', text)
+
+    text = re.sub(r'[ \t]+', ' ', text)
+    text = re.sub(r'\n\s*\n', '\n\n', text)
+    text = re.sub(r'\r\n', '\n', text)
+
+    lines = [line.strip() for line in text.split('\n')]
+    text = '\n'.join(lines)
+
+    return text.strip()
+
+
+def run(label, func, texts, total_mb, rounds):
+    """多轮执行取最快一轮，返回输出结果"""
+    best = float('inf')
+    results = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        results = [func(text) for text in texts]
+        best = min(best, time.perf_counter() - start)
+
+    print(f"{label:<8} {best:8.3f} 秒  {total_mb / best:8.1f} MB/s")
+    return results, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RegulationCleaner.clean_text 性能基准")
+    parser.add_argument("--dir", default=DETAILS_DIR, help="MD文件目录")
+    parser.add_argument("--rounds", type=int, default=3, help="每种实现执行轮数（取最快一轮）")
+    args = parser.parse_args()
+
+    files = sorted(Path(args.dir).glob("*.md"))
+    texts = [f.read_text(encoding='utf-8') for f in files]
+    total_mb = sum(len(t.encode('utf-8')) for t in texts) / 1024 / 1024
+
+    print("=" * 60)
+    print(f"文件数: {len(files)}，总大小: {total_mb:.1f} MB，轮数: {args.rounds}")
+    print("=" * 60)
+
+    cleaner = RegulationCleaner()
+    old_results, old_time = run("旧实现", lambda t: legacy_clean_text(t, cleaner.compiled_patterns),
+                                texts, total_mb, args.rounds)
+    new_results, new_time = run("新实现", cleaner.clean_text, texts, total_mb, args.rounds)
+
+    mismatches = [f.name for f, a, b in zip(files, old_results, new_results) if a != b]
+
+    print("-" * 60)
+    print(f"加速比: {old_time / new_time:.2f}x")
+    if mismatches:
+        print(f"输出不一致: {len(mismatches)} 个文件")
+        for name in mismatches[:10]:
+            print(f"  - {name}")
+    else:
+        print("输出一致: 全部文件")
+
+
+if __name__ == "__main__":
+    main()
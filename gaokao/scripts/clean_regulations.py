@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+批量清洗招生章程MD文件
+
+多进程并行清洗，目录清单（.corpus_manifest.json）记录已清洗文件，重复执行时跳过未变化的文件
+"""
+
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from modules.cleaner import RegulationCleaner
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量清洗招生章程MD文件")
+    parser.add_argument("--dir", nargs="+", default=["details"], help="MD文件目录（可多个）")
+    parser.add_argument("--workers", type=int, default=None, help="进程数（默认CPU核数，1为单进程）")
+    parser.add_argument("--full", action="store_true", help="不使用目录清单，重新检查全部文件")
+    args = parser.parse_args()
+
+    cleaner = RegulationCleaner()
+    for directory in args.dir:
+        start = time.perf_counter()
+        result = cleaner.batch_clean(directory, workers=args.workers, use_manifest=not args.full)
+        print(f"{directory}: 共 {result['total']} 个文件，清洗 {result['cleaned']} 个，"
+              f"跳过 {result['skipped']} 个，失败 {result['failed']} 个，"
+              f"耗时 {time.perf_counter() - start:.2f} 秒")
+
+
+if __name__ == "__main__":
+    main()
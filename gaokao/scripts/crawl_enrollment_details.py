@@ -14,17 +14,22 @@
 批次大小：15-20条/批次
 延迟策略：
   - 翻页后: 2.5-4秒（随机）
-  - 学校之间: 3-5.5秒（随机）
-  - 批次之间: 5-10秒（随机）
-  - 出错重试: 10-20秒（随机）
+  - 请求间隔: 自适应限速（AdaptiveRateLimiter），初始约4秒一次，正常时逐步缩短到3秒，
+    导航失败或空白页时间隔加倍，连续出错时从10秒起指数退避（最长60秒）
 """
 
 import pandas as pd
 import json
 import os
 import random
+import sys
 import time
 from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from modules.rate_limiter import AdaptiveRateLimiter
+from modules.table_cache import read_excel_cached
 
 # ==================== 配置参数 ====================
 BATCH_SIZE = 15-20  # 每批15-20条（根据实际情况调整）
@@ -34,9 +39,16 @@ ERROR_LOG_PATH = 'crawl_errors.log'
 
 # 延迟设置（秒）- 根据反爬虫策略优化
 DELAY_AFTER_PAGE_LOAD = (2.5, 4.0)  # 翻页后2.5-4秒（随机）
-DELAY_BETWEEN_SCHOOLS = (3.0, 5.5)  # 学校之间3-5.5秒（随机）
-DELAY_BETWEEN_BATCHES = (5.0, 10.0)  # 批次之间5-10秒（随机）
-DELAY_ON_ERROR = (10.0, 20.0)  # 出错后10-20秒（随机）
+
+# 请求限速：替代固定的学校间、批次间和出错后延迟
+limiter = AdaptiveRateLimiter(
+    max_rate=1 / 3.0,      # 最快3秒一次
+    initial_rate=1 / 4.0,  # 初始约4秒一次
+    min_rate=1 / 20.0,     # 最慢20秒一次
+    increase=0.01,
+    backoff_base=10.0,     # 出错后暂停10秒起，连续出错翻倍
+    max_backoff=60.0,
+)
 
 
 # ==================== 工具函数 ====================
@@ -79,7 +91,7 @@ def save_progress(progress):
 
 def get_remaining_schools():
     """获取待爬取学校列表"""
-    df = pd.read_excel(EXCEL_PATH)
+    df = read_excel_cached(EXCEL_PATH)
     progress = load_progress()
 
     completed = set(progress['completed_schools'])
@@ -116,7 +128,7 @@ def update_excel_batch(batch_results):
             }
         }
     """
-    df = pd.read_excel(EXCEL_PATH)
+    df = read_excel_cached(EXCEL_PATH)
 
     for school_name, result in batch_results.items():
         # 精确匹配学校名称
@@ -141,7 +153,7 @@ def update_excel_batch(batch_results):
 
 def verify_batch_update(batch_results):
     """验证批次更新是否成功"""
-    df = pd.read_excel(EXCEL_PATH)
+    df = read_excel_cached(EXCEL_PATH)
 
     for school_name, result in batch_results.items():
         mask = df['学校名称'] == school_name
@@ -184,16 +196,20 @@ def crawl_school(school_name, enrollment_link):
     from mcp__playwright import browser_navigate, browser_run_code
 
     try:
-        # 1. 导航到招生章程链接
+        # 1. 导航到招生章程链接（限速器决定何时发出请求）
+        limiter.acquire(enrollment_link)
+        start = time.monotonic()
         result = browser_navigate(url=enrollment_link, timeout=10000)
+        latency = time.monotonic() - start
         if not result.get('success'):
+            limiter.record(enrollment_link, ok=False, latency=latency, reason='navigate_failed')
             return {
                 'status': 'unknown',
                 'message': '导航失败'
             }
 
         # 2. 等待页面加载
-        time.sleep(DELAY_AFTER_PAGE_LOAD)
+        time.sleep(random.uniform(*DELAY_AFTER_PAGE_LOAD))
 
         # 3. 执行JavaScript提取
         js_code = """
@@ -251,6 +267,9 @@ def crawl_school(school_name, enrollment_link):
 
         if extraction_result.get('success'):
             data = extraction_result.get('result', {})
+            # 空白页通常是被限流，按失败反馈以便降速
+            empty = data.get('status') == 'empty_page'
+            limiter.record(enrollment_link, ok=not empty, latency=latency, reason='empty_page')
             return {
                 'status': data.get('status', 'unknown'),
                 'title': data.get('title', ''),
@@ -264,6 +283,7 @@ def crawl_school(school_name, enrollment_link):
             }
 
     except Exception as e:
+        limiter.record(enrollment_link, ok=False, reason='error')
         log_error(f"爬取 {school_name} 异常: {str(e)}")
         return {
             'status': 'unknown',
@@ -310,11 +330,6 @@ def crawl_batch(schools):
         }.get(result['status'], '❌')
         print(f"    {status_icon} {result['message']}")
 
-        # 学校之间延迟
-        if i < len(schools) - 1:
-            delay = random.uniform(DELAY_BETWEEN_SCHOOLS_MIN, DELAY_BETWEEN_SCHOOLS_MAX)
-            time.sleep(delay)
-
     return batch_results
 
 
@@ -403,12 +418,7 @@ def main():
         # 显示总体进度
         percentage = progress['metadata']['completed_count'] / total_to_crawl * 100
         print(f"\n📊 总进度: {progress['metadata']['completed_count']}/{total_to_crawl} ({percentage:.1f}%)")
-
-        # 批次间延迟
-        if batch_idx < total_batches - 1:
-            delay = random.uniform(DELAY_BETWEEN_BATCHES_MIN, DELAY_BETWEEN_BATCHES_MAX)
-            print(f"⏱️  等待 {delay:.1f} 秒后继续...")
-            time.sleep(delay)
+        print(f"⏱️  限速: {limiter.summary()}")
 
     # 5. 完成
     print(f"\n{'=' * 60}")
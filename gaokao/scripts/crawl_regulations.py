@@ -4,25 +4,46 @@
 爬取阳光高考网所有学校的招生章程完整内容
 """
 
-import asyncio
+import json
 import sys
 import logging
 from pathlib import Path
 from datetime import datetime
-import random
-from playwright.async_api import async_playwright
-import pandas as pd
+from typing import Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from modules.crawl_cache import CrawlCache
+from modules.crawler import START_MARKER, END_MARKER
+from modules.engine import CrawlJob, TaskFailed, build_parser, run_job
+from modules.extractor import build_table_document
+from modules.http_fetcher import HttpRegulationFetcher
+from modules.task_store import TaskStore
 
 # ==================== 配置参数 ====================
 
 EXCEL_PATH = "achievement/招生章程.xlsx"
 OUTPUT_DIR = "details"
-PROGRESS_FILE = "爬取进度.xlsx"
-
-# 爬取参数
-BATCH_SIZE = 15  # 每批处理学校数量
+PROGRESS_FILE = "爬取进度.xlsx"  # 结束时从任务存储导出的进度表
+CACHE_FILE = "crawl_cache.json"  # ETag/Last-Modified/内容哈希缓存
+TASK_DB = "gaokao_tasks.db"  # SQLite任务存储
+TASK_JOB = "details"
+TABLES_DIR = "tables"  # 含表格的章程同时保存到此目录（正文 + HTML表格）
+TABLES_JOB = "tables"
+TABLE_LIST_FILE = "tables/有表格的学校清单.json"
+
+# 爬取参数（并发数由 --concurrency 指定）
+CHECKPOINT_EVERY = 15  # 每处理多少所学校保存一次缓存并输出进度
 DELAY_FIRST_PAGE = 2.0  # 第一条等待时间
-DELAY_BETWEEN_SCHOOLS = (0.3, 0.5)  # 学校之间延迟
+# 自适应限速（每秒请求数）：正常时逐步提速到上限，出错、跳转错误页或响应过慢时减半，连续出错时指数退避
+INITIAL_RATE = 2.0
+MAX_RATE = 3.0
+MIN_RATE = 0.2
+
+# 页面回收：浏览器导航满该次数，或渲染进程内存超过阈值（MB）时连同上下文换新，避免长时间运行内存增长
+RECYCLE_EVERY = 200
+MAX_RENDERER_MB = 1536
+PROFILE_DIR = "browser_profile/details"  # 浏览器配置档（cookie、localStorage、磁盘缓存跨运行保留）
+USE_HTTP_CHANGE_CHECK = True  # 已有MD文件时先用HTTP检查页面是否变化，未变化时不打开浏览器
 
 # 日志配置
 LOG_FILE = f"logs/crawl_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
@@ -74,138 +95,255 @@ def extract_content(text: str) -> str:
         return ""
 
 
-async def main():
-    """主程序入口"""
+def save_if_changed(school_name: str, url: str, content: str, cache: CrawlCache,
+                    output_dir: str = OUTPUT_DIR, cache_key: str = None) -> bool:
+    """
+    内容有变化时才写入MD文件
 
-    logger.info("=" * 60)
-    logger.info("招生章程详情页爬虫启动")
-    logger.info("=" * 60)
+    Args:
+        cache_key: 内容哈希在缓存中的键，默认为url
 
-    # 读取任务
-    df = pd.read_excel(EXCEL_PATH)
-    df = df[df['招生章程详情页链接（本部）'].notna()]
-
-    # 只获取本部链接有数据的学校
-    tasks = df[['学校名称', '招生章程详情页链接（本部）']].to_dict('records')
-
-    logger.info(f"总任务数: {len(tasks)}")
-
-    # 获取剩余任务（排除已完成的）
-    remaining_tasks = []
-    for task in tasks:
-        school_name = task['学校名称']
-        md_file = Path(OUTPUT_DIR) / f"{school_name}.md"
-        if not md_file.exists():
-            remaining_tasks.append(task)
-
-    logger.info(f"剩余任务数: {len(remaining_tasks)}")
-
-    if not remaining_tasks:
-        logger.info("所有任务已完成！")
-        return
+    Returns:
+        写入返回True，内容未变化返回False
+    """
+    md_file = Path(output_dir) / f"{school_name}.md"
+    cache_key = cache_key or url
 
-    # 启动浏览器（只启动一次）
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(
-            headless=False,
-            args=['--disable-blink-features=AutomationControlled']
-        )
+    changed = cache.content_changed(cache_key, content)
+    if changed is None and md_file.exists():
+        # 缓存中没有哈希记录时与现有文件比较
+        changed = md_file.read_text(encoding='utf-8') != content
 
-        context = await browser.new_context(
-            user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
-            viewport={'width': 1920, 'height': 1080},
-            locale='zh-CN',
-            timezone_id='Asia/Shanghai',
-        )
+    cache.record_content(cache_key, content)
+    if changed is False and md_file.exists():
+        return False
 
-        page = await context.new_page()
-        logger.info("浏览器启动成功")
+    with open(md_file, 'w', encoding='utf-8') as f:
+        f.write(content)
+    return True
 
-        # 分批处理
-        total_batches = (len(remaining_tasks) + BATCH_SIZE - 1) // BATCH_SIZE
-        logger.info(f"开始分批爬取: 共 {total_batches} 批，预计 {total_batches * 15 / 60:.1f} 小时")
 
-        completed_count = 0
-        failed_count = 0
+def save_table_document(school_name: str, url: str, html: str, cache: CrawlCache,
+                        store: TaskStore) -> int:
+    """
+    同一次访问中提取表格章程（正文 + 清理后的HTML表格），有数据表格时保存到 tables/
 
-        for batch_idx, batch_start in enumerate(range(0, len(remaining_tasks), BATCH_SIZE), 1):
-            batch_tasks = remaining_tasks[batch_start:batch_start + BATCH_SIZE]
+    Returns:
+        数据表格数，没有表格返回0
+    """
+    if "<table" not in html.lower():
+        return 0
 
-            logger.info(f"")
-            logger.info(f"=" * 60)
-            logger.info(f"批次 [{batch_idx}/{total_batches}]: {len(batch_tasks)} 所学校")
-            logger.info(f"=" * 60)
+    result = build_table_document(html, START_MARKER, END_MARKER)
+    if result is None or result[1] == 0:
+        return 0
 
-            for idx, task in enumerate(batch_tasks, 1):
-                school_name = task['学校名称']
-                url = task['招生章程详情页链接（本部）']
+    document, table_count = result
+    Path(TABLES_DIR).mkdir(exist_ok=True)
+    if save_if_changed(school_name, url, document, cache, TABLES_DIR, cache_key=f"{url}#tables"):
+        logger.info(f"  ✓ 表格章程 ({table_count}个表格)")
+    store.update(school_name, '成功', TABLES_JOB, content=document, table_count=table_count)
+    return table_count
 
-                logger.info(f"[{completed_count + failed_count + 1}/{len(remaining_tasks)}] {school_name}")
 
-                try:
-                    # 访问页面
-                    await page.goto(url, timeout=30000, wait_until='domcontentloaded')
+def load_table_list() -> list:
+    """读取含表格的学校清单（合并Excel时据此优先使用 tables/ 的内容）"""
+    if not Path(TABLE_LIST_FILE).exists():
+        return []
+    with open(TABLE_LIST_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)
 
-                    # 第一条等待2秒，后续0.5秒
-                    wait_time = DELAY_FIRST_PAGE if completed_count == 0 and failed_count == 0 else 0.5
-                    await asyncio.sleep(wait_time)
 
-                    # 获取文本
-                    text = await page.evaluate("() => document.body.innerText || ''")
+def save_table_list(table_list: list):
+    """保存含表格的学校清单"""
+    Path(TABLE_LIST_FILE).parent.mkdir(exist_ok=True)
+    with open(TABLE_LIST_FILE, 'w', encoding='utf-8') as f:
+        json.dump(table_list, f, ensure_ascii=False, indent=2)
 
-                    if text and len(text) > 100:
-                        # 提取内容
-                        content = extract_content(text)
 
-                        if content:
-                            # 保存MD文件
-                            filepath = Path(OUTPUT_DIR) / school_name
-                            with open(f"{filepath}.md", 'w', encoding='utf-8') as f:
-                                f.write(content)
+# HTTP条件请求返回304（内容未变化，无需下载和重写）
+NOT_MODIFIED = object()
+# HTTP源码中的正文片段与上次相同（服务器不支持条件请求时的变化检测）
+SOURCE_UNCHANGED = object()
+
+
+def source_fingerprint(html: str) -> Optional[str]:
+    """
+    HTML源码中从开始标记到结束标记的片段，用于判断页面是否变化（不含页头页脚中随访问变化的内容）
+
+    Returns:
+        正文片段，缺少任一标记时返回None
+    """
+    start = html.find(START_MARKER)
+    end = html.find(END_MARKER, start) if start >= 0 else -1
+    if end < 0:
+        return None
+    return html[start:end]
+
+# 浏览器渲染后的HTML和 innerText（同一次 evaluate 读取；innerText 按CSS布局分行，不含隐藏元素）
+PAGE_SNAPSHOT_JS = """
+() => ({
+    html: document.documentElement.outerHTML,
+    text: document.body ? document.body.innerText : ''
+})
+"""
 
-                            logger.info(f"  ✓ 成功 ({len(content)}字符)")
-                            completed_count += 1
-                        else:
-                            logger.warning(f"  ✗ 内容提取失败")
-                            failed_count += 1
-                    else:
-                        logger.warning(f"  ✗ 页面内容为空")
-                        failed_count += 1
 
-                except Exception as e:
-                    logger.error(f"  ✗ {e}")
-                    failed_count += 1
-
-                # 学校之间延迟
-                if idx < len(batch_tasks):
-                    delay = random.uniform(*DELAY_BETWEEN_SCHOOLS)
-                    await asyncio.sleep(delay)
-
-            # 批次完成，显示进度
-            progress_pct = (completed_count + failed_count) / len(remaining_tasks) * 100
-            logger.info(f"")
-            logger.info(f"批次完成！总进度: {completed_count + failed_count}/{len(remaining_tasks)} ({progress_pct:.1f}%)")
-            logger.info(f"  成功: {completed_count}, 失败: {failed_count}")
-
-            # 批次之间稍作停顿
-            if batch_idx < total_batches:
-                await asyncio.sleep(2.0)
-
-        await browser.close()
-
-    # 最终统计
-    logger.info(f"")
-    logger.info(f"=" * 60)
-    logger.info(f"爬取完成！")
-    logger.info(f"  成功: {completed_count}")
-    logger.info(f"  失败: {failed_count}")
-    logger.info(f"  成功率: {completed_count / (completed_count + failed_count) * 100:.1f}%")
-    logger.info(f"=" * 60)
+class RegulationJob(CrawlJob):
+    """招生章程详情页：已有MD文件时先用HTTP检查是否变化；内容由浏览器提取，同一次访问同时生成纯文本和表格章程"""
+
+    name = TASK_JOB
+    title = "招生章程详情页爬虫"
+
+    # 正文开始和结束标记都出现即可提取，固定等待时间只作为超时兜底
+    markers = (START_MARKER,)
+    selectors = ()
+    end_markers = (END_MARKER,)
+    first_wait = DELAY_FIRST_PAGE
+    wait = 0.5
+
+    max_rate = MAX_RATE
+    initial_rate = INITIAL_RATE
+    min_rate = MIN_RATE
+    recycle_every = RECYCLE_EVERY
+    max_renderer_mb = MAX_RENDERER_MB
+    profile_dir = PROFILE_DIR
+
+    def __init__(self, refresh: bool = False):
+        """
+        Args:
+            refresh: 刷新模式，重新检查所有学校（条件请求），只重写内容有变化的MD文件
+        """
+        super().__init__(refresh)
+        # 爬取缓存：条件请求和内容哈希比较
+        self.cache = CrawlCache(CACHE_FILE).load()
+        # 含表格的学校清单（本次新发现的表格章程追加到清单）
+        self.table_list = load_table_list()
+        self.table_schools = {school['学校名称'] for school in self.table_list}
+        self.table_list_size = len(self.table_list)
+        self.http_fetcher = None
+        # HTTP检查发现变化、等待浏览器提取的页面：url -> (正文片段, validators)，保存成功后写入缓存
+        self.pending_sources = {}
+
+    def load_tasks(self, store: TaskStore):
+        # 只导入本部链接有数据的学校
+        total = store.import_excel(EXCEL_PATH, job=TASK_JOB)
+        logger.info(f"总任务数: {total}")
+
+    def select(self, store: TaskStore) -> list:
+        if not self.refresh:
+            # 同步已存在的MD文件（一次目录扫描），剩余任务由索引查询得到
+            store.import_directory(OUTPUT_DIR, job=TASK_JOB)
+        return super().select(store)
+
+    async def open(self, engine):
+        await super().open(engine)
+        # HTTP直连和浏览器共用引擎的限速器，同一主机的请求统一限速（HTML中包含正文开始标记才采用）
+        self.http_fetcher = HttpRegulationFetcher(body_markers=[START_MARKER], cache=self.cache,
+                                                  rate_limiter=engine.limiter)
+        await self.http_fetcher.start()
+
+    async def prefetch(self, task: dict):
+        """
+        HTTP检查页面是否变化（只用于变化检测，MD文件的内容统一由浏览器的 innerText 提取）
+
+        MD文件不存在时（新任务、上次保存失败或被删除）直接用浏览器，不发HTTP请求
+
+        Returns:
+            304 时返回 NOT_MODIFIED，正文片段与上次相同时返回 SOURCE_UNCHANGED，
+            需要浏览器提取时返回None
+        """
+        if not USE_HTTP_CHANGE_CHECK:
+            return None
+        url = task['url']
+        if not (Path(OUTPUT_DIR) / f"{task['school_name']}.md").exists():
+            return None
+
+        modified, html, validators = await self.http_fetcher.fetch_if_modified(url)
+        if not modified:
+            return NOT_MODIFIED
+        source = source_fingerprint(html) if html else None
+        if source is None:
+            return None
+
+        self.pending_sources[url] = (source, validators)
+        if self.cache.content_changed(f"{url}#source", source) is False:
+            return SOURCE_UNCHANGED
+        return None
+
+    async def extract(self, page, task: dict) -> tuple:
+        """读取渲染后的HTML（用于表格章程）和 innerText（用于纯文本章程）"""
+        snapshot = await page.evaluate(PAGE_SNAPSHOT_JS)
+        return snapshot['html'], snapshot['text']
+
+    def _record_source(self, url: str):
+        """内容已保存（或确认未变化），记录HTTP正文片段哈希和 ETag / Last-Modified，供之后的刷新比较"""
+        pending = self.pending_sources.pop(url, None)
+        if pending is None:
+            return
+        source, validators = pending
+        self.cache.record_content(f"{url}#source", source)
+        self.cache.update_validators(url, **validators)
+
+    def save(self, task: dict, result):
+        school_name = task['school_name']
+        url = task['url']
+
+        if result is NOT_MODIFIED:
+            logger.info(f"  = 未变化(304)")
+            return None
+        if result is SOURCE_UNCHANGED:
+            self._record_source(url)
+            logger.info(f"  = 未变化(正文相同)")
+            return None
+
+        html, text = result
+        if not text or len(text) <= 100:
+            raise TaskFailed('empty_page', '页面内容为空')
+
+        # 提取内容
+        content = extract_content(text)
+        if not content:
+            raise TaskFailed('extract_failed', '内容提取失败')
+
+        # 含表格的章程在同一次访问中保存到 tables/，不再单独爬取
+        table_count = save_table_document(school_name, url, html, self.cache, self.engine.store)
+        if table_count and school_name not in self.table_schools:
+            self.table_schools.add(school_name)
+            self.table_list.append({'学校名称': school_name, '详情页链接': url})
+
+        changed = save_if_changed(school_name, url, content, self.cache)
+        # MD文件已保存，之后的刷新才可以用 ETag / Last-Modified 和正文片段判断变化
+        self._record_source(url)
+
+        if changed:
+            logger.info(f"  ✓ 成功 ({len(content)}字符)")
+            return {'content': content, 'table_count': table_count}
+
+        logger.info(f"  = 内容未变化")
+        return {'content': content, 'table_count': table_count, 'note': '内容未变化', 'changed': False}
+
+    def on_failure(self, task: dict, kind: str, message: str, status: str):
+        # 浏览器提取失败时不记录HTTP检查结果，下次仍重新提取
+        self.pending_sources.pop(task['url'], None)
+
+    def checkpoint(self):
+        """保存缓存和含表格清单"""
+        self.cache.save()
+        if len(self.table_list) > self.table_list_size:
+            save_table_list(self.table_list)
+            self.table_list_size = len(self.table_list)
+
+    async def close(self):
+        if self.http_fetcher is not None:
+            await self.http_fetcher.close()
+        # 导出各学校的爬取状态（状态、尝试次数、字符数、错误类型等）
+        self.engine.store.export_excel(PROGRESS_FILE, TASK_JOB)
+
+    def summary(self) -> dict:
+        return {'含表格学校': len(self.table_list)}
 
 
 if __name__ == "__main__":
-    try:
-        asyncio.run(main())
-    except KeyboardInterrupt:
-        logger.info("")
-        logger.info("用户中断，进度已保存（已完成的MD文件）")
+    args = build_parser("招生章程详情页爬虫").parse_args()
+    run_job(RegulationJob(refresh=args.refresh), args, task_db=TASK_DB, checkpoint_every=CHECKPOINT_EVERY)
@@ -5,7 +5,12 @@
 根据网络搜索和用户确认的映射关系更新城市信息
 """
 
-import pandas as pd
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from modules.table_cache import read_excel_cached
+from modules.school_matcher import fill_by_name
 
 
 def fill_47_cities():
@@ -18,7 +23,7 @@ def fill_47_cities():
 
     # 1. 读取数据
     print("📂 正在读取数据...")
-    df = pd.read_excel('招生章程.xlsx')
+    df = read_excel_cached('招生章程.xlsx')
     print(f"   ✅ 读取 {len(df)} 所学校")
     print()
 
@@ -75,12 +80,7 @@ def fill_47_cities():
 
     # 3. 更新城市数据
     print("📝 正在更新城市数据...")
-    updated_count = 0
-    for idx, row in df.iterrows():
-        school_name = row['学校名称']
-        if school_name in city_mapping:
-            df.at[idx, '城市'] = city_mapping[school_name]
-            updated_count += 1
+    updated_count = int(fill_by_name(df, '城市', city_mapping).sum())
 
     print(f"   ✅ 已更新 {updated_count} 所学校的城市信息")
     print()
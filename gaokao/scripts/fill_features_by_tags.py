@@ -7,6 +7,12 @@
 
 import pandas as pd
 import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from modules.table_cache import read_excel_cached
+from modules.school_matcher import fill_by_name
 
 # 学校名称到特性的映射
 FEATURE_MAPPING = {
@@ -18,7 +24,7 @@ FEATURE_MAPPING = {
 
 def load_existing_schools():
     """读取招生章程.xlsx"""
-    df = pd.read_excel("招生章程.xlsx")
+    df = read_excel_cached("招生章程.xlsx")
     print(f"✅ 读取招生章程.xlsx: {len(df)} 所学校")
     return df
 
@@ -42,14 +48,7 @@ def load_feature_mapping(input_path="/tmp/school_features.json"):
 def update_excel_with_features(df, schools_dict):
     """更新Excel中的院校特性列"""
     # 只更新空值
-    mask = (df['院校特性'].isna()) | (df['院校特性'] == '')
-    updated_count = 0
-
-    for idx, row in df[mask].iterrows():
-        school_name = row['学校名称']
-        if school_name in schools_dict:
-            df.at[idx, '院校特性'] = schools_dict[school_name]
-            updated_count += 1
+    updated_count = int(fill_by_name(df, '院校特性', schools_dict, only_empty=True).sum())
 
     print(f"✅ 更新了 {updated_count} 所学校的院校特性")
     return df, updated_count
@@ -7,66 +7,231 @@
 2. 从 tables/ 和 details/ 读取MD文件内容
 3. 新增"招生章程内容"和"招生章程是否含表格"两列
 4. 保存到 achievement/招生章程（详情）.xlsx
+
+增量合并：合并缓存（achievement/.merge_cache.db）按学校记录MD文件的路径、大小、修改时间和
+内容哈希（不保存内容），再次运行时只读取大小或修改时间有变化的MD文件计算哈希，内容都没有变化时
+不重写Excel；需要重写时用共享语料读取器（多线程）流式读取全部MD文件生成内容列。
+使用 --full 忽略缓存全部重新比较。
 """
 
-import pandas as pd
+import argparse
 import json
+import os
+import sqlite3
+import sys
 from pathlib import Path
 
-# 读取800所表格学校清单
-print("读取表格学校清单...")
-with open('tables/有表格的学校清单.json', 'r', encoding='utf-8') as f:
-    table_schools = json.load(f)
-table_school_names = set(s['学校名称'] for s in table_schools)
-print(f"  表格学校: {len(table_school_names)}所")
-
-# 读取源Excel
-print("\n读取源Excel...")
-df = pd.read_excel('achievement/招生章程.xlsx')
-print(f"  总学校数: {len(df)}所")
-
-# 新增列
-df['招生章程内容'] = ''
-df['招生章程是否含表格'] = ''
-
-# 遍历每所学校
-print("\n开始合并MD文件内容...")
-success_count = 0
-not_found_count = 0
-
-for idx, row in df.iterrows():
-    school_name = row['学校名称']
-
-    # 优先从 tables/ 读取
-    if school_name in table_school_names:
-        md_file = Path(f'tables/{school_name}.md')
-        df.at[idx, '招生章程是否含表格'] = '是'
-    else:
-        md_file = Path(f'details/{school_name}.md')
-        df.at[idx, '招生章程是否含表格'] = '否'
-
-    # 读取MD文件内容
-    if md_file.exists():
-        with open(md_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-        df.at[idx, '招生章程内容'] = content
-        success_count += 1
-        if success_count % 500 == 0:
-            print(f"  进度: {success_count}/{len(df)}")
+import numpy as np
+import pandas as pd
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from modules.corpus import get_corpus
+from modules.excel_writer import StreamingExcelWriter
+from modules.table_cache import read_excel_cached
+
+SOURCE_FILE = 'achievement/招生章程.xlsx'
+OUTPUT_FILE = 'achievement/招生章程（详情）.xlsx'
+TABLE_LIST_FILE = 'tables/有表格的学校清单.json'
+CACHE_FILE = 'achievement/.merge_cache.db'
+MD_DIRS = ('tables', 'details')
+
+
+def open_cache(path: str) -> sqlite3.Connection:
+    """打开合并缓存（旧版本缓存中保存了全部内容，删除后重建）"""
+    conn = sqlite3.connect(path)
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(files)")]
+    if 'content' in columns:
+        conn.execute("DROP TABLE files")
+        conn.execute("VACUUM")
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS files (
+            school_name TEXT PRIMARY KEY,
+            path TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            content_hash TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+    """)
+    return conn
+
+
+def scan_md_files() -> dict:
+    """一次目录扫描取得所有MD文件的大小和修改时间：{路径: (大小, 修改时间ns)}"""
+    stats = {}
+    for directory in MD_DIRS:
+        for name, stat in get_corpus(directory).refresh().items():
+            stats[f'{directory}/{name}'] = stat
+    return stats
+
+
+def sync_cache(conn: sqlite3.Connection, md_paths: pd.Series, stats: dict, full: bool) -> int:
+    """
+    同步合并缓存：只读取路径、大小或修改时间有变化的MD文件，按内容哈希判断是否真的变化
+
+    Args:
+        conn: 合并缓存连接
+        md_paths: 学校名称 -> MD文件路径
+        stats: scan_md_files 的结果
+        full: 忽略缓存全部重新比较
+
+    Returns:
+        内容有变化的学校数（新增、修改、删除）
+    """
+    cached = {} if full else {
+        name: (path, size, mtime_ns, digest)
+        for name, path, size, mtime_ns, digest in conn.execute(
+            "SELECT school_name, path, size, mtime_ns, content_hash FROM files")
+    }
+
+    touched = []
+    removed = []
+    for school_name, path in md_paths.items():
+        stat = stats.get(path)
+        if stat is None:
+            if school_name in cached:
+                removed.append(school_name)
+        elif cached.get(school_name, ())[:3] != (path, *stat):
+            touched.append((school_name, path, stat))
+    # 已不在源Excel中的学校
+    removed.extend(set(cached) - set(md_paths.index))
+
+    # 内容哈希取自目录清单，清单中没有或已过期的文件由语料读取器并行读取后计算
+    for directory in MD_DIRS:
+        corpus = get_corpus(directory)
+        names = [path.split('/', 1)[1] for _, path, _ in touched if path.startswith(f'{directory}/')]
+        for _ in corpus.iter_texts(name for name in names if not corpus.is_fresh(name)):
+            pass
+        corpus.save_manifest()
+
+    rows = []
+    changed = 0
+    for school_name, path, (size, mtime_ns) in touched:
+        directory, name = path.split('/', 1)
+        record = get_corpus(directory).manifest.get(name)
+        if record is None:
+            continue
+        previous = cached.get(school_name)
+        if previous is None or previous[0] != path or previous[3] != record['hash']:
+            changed += 1
+        rows.append((school_name, path, size, mtime_ns, record['hash']))
+
+    with conn:
+        if full:
+            conn.execute("DELETE FROM files")
+        conn.executemany("DELETE FROM files WHERE school_name = ?", [(name,) for name in removed])
+        conn.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)", rows)
+
+    return changed + len(removed)
+
+
+def read_contents(md_paths: pd.Series, stats: dict) -> dict:
+    """用语料读取器并行读取全部存在的MD文件：{学校名称: 内容}"""
+    schools = {path: school_name for school_name, path in md_paths.items() if path in stats}
+    contents = {}
+    for directory in MD_DIRS:
+        corpus = get_corpus(directory)
+        names = [path.split('/', 1)[1] for path in schools if path.startswith(f'{directory}/')]
+        for school_file, text in corpus.iter_texts(names):
+            contents[schools[f'{directory}/{school_file}.md']] = text
+        corpus.save_manifest()
+    return contents
+
+
+def write_workbook(df: pd.DataFrame, output_file: str):
+    """流式保存Excel（只写模式，内存占用与行数无关）"""
+    with StreamingExcelWriter(output_file) as writer:
+        sheet = writer.add_sheet("Sheet1", list(df.columns), header_style="bold_header")
+        values = df.astype(object).where(df.notna(), None)
+        sheet.append_rows(values.itertuples(index=False, name=None))
+
+
+def load_source():
+    """读取表格学校清单和源Excel，确定每所学校的MD文件路径"""
+    # 读取表格学校清单
+    print("读取表格学校清单...")
+    with open(TABLE_LIST_FILE, 'r', encoding='utf-8') as f:
+        table_schools = json.load(f)
+    table_school_names = set(s['学校名称'] for s in table_schools)
+    print(f"  表格学校: {len(table_school_names)}所")
+
+    # 读取源Excel
+    print("\n读取源Excel...")
+    df = read_excel_cached(SOURCE_FILE)
+    print(f"  总学校数: {len(df)}所")
+
+    # 优先从 tables/ 读取，其余从 details/ 读取
+    has_table = df['学校名称'].isin(table_school_names)
+    names = df['学校名称'].astype(str)
+    md_paths = pd.Series(np.where(has_table, 'tables/' + names + '.md', 'details/' + names + '.md'),
+                         index=names)
+    md_paths = md_paths[~md_paths.index.duplicated()]
+    return df, has_table, md_paths
+
+
+def main(full: bool = False):
+    conn = open_cache(CACHE_FILE)
+    meta = dict(conn.execute("SELECT key, value FROM meta"))
+    source_mtime = str(os.stat(SOURCE_FILE).st_mtime_ns)
+    table_list_mtime = str(os.stat(TABLE_LIST_FILE).st_mtime_ns)
+
+    # 源Excel和表格清单都未变化时直接使用上次的路径映射，不读取Excel
+    sources_unchanged = (not full and Path(OUTPUT_FILE).exists() and 'md_paths' in meta
+                         and meta.get('source_mtime') == source_mtime
+                         and meta.get('table_list_mtime') == table_list_mtime)
+    if sources_unchanged:
+        df = None
+        md_paths = pd.Series(json.loads(meta['md_paths']), dtype=object)
     else:
-        not_found_count += 1
-
-# 保存到新文件
-print(f"\n保存到新文件...")
-output_file = 'achievement/招生章程（详情）.xlsx'
-df.to_excel(output_file, index=False, engine='openpyxl')
-
-# 统计结果
-print(f"\n" + "=" * 50)
-print(f"合并完成！")
-print(f"  成功合并: {success_count}所")
-print(f"  文件不存在: {not_found_count}所")
-print(f"  含表格: {len(df[df['招生章程是否含表格'] == '是'])}所")
-print(f"  不含表格: {len(df[df['招生章程是否含表格'] == '否'])}所")
-print(f"  输出文件: {output_file}")
-print(f"=" * 50)
+        df, has_table, md_paths = load_source()
+
+    print("\n同步MD文件...")
+    stats = scan_md_files()
+    changed_count = sync_cache(conn, md_paths, stats, full)
+    print(f"  有变化: {changed_count}所")
+
+    if sources_unchanged and changed_count == 0:
+        conn.close()
+        print(f"\n没有变化，跳过写入: {OUTPUT_FILE}")
+        return
+
+    if df is None:
+        df, has_table, md_paths = load_source()
+
+    # 按列整体构建
+    contents = read_contents(md_paths, stats)
+    df['招生章程内容'] = df['学校名称'].map(contents).fillna('')
+    df['招生章程是否含表格'] = np.where(has_table, '是', '否')
+    success_count = int(df['学校名称'].isin(contents.keys()).sum())
+    not_found_count = len(df) - success_count
+
+    # 保存到新文件
+    print(f"\n保存到新文件...")
+    write_workbook(df, OUTPUT_FILE)
+
+    with conn:
+        conn.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)", [
+            ('source_mtime', source_mtime),
+            ('table_list_mtime', table_list_mtime),
+            ('md_paths', json.dumps(md_paths.to_dict(), ensure_ascii=False)),
+        ])
+    conn.close()
+
+    # 统计结果
+    print(f"\n" + "=" * 50)
+    print(f"合并完成！")
+    print(f"  成功合并: {success_count}所")
+    print(f"  文件不存在: {not_found_count}所")
+    print(f"  含表格: {len(df[df['招生章程是否含表格'] == '是'])}所")
+    print(f"  不含表格: {len(df[df['招生章程是否含表格'] == '否'])}所")
+    print(f"  输出文件: {OUTPUT_FILE}")
+    print(f"=" * 50)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="将MD文件中的招生章程内容合并到Excel")
+    parser.add_argument("--full", action="store_true", help="忽略合并缓存，重新读取全部MD文件")
+    args = parser.parse_args()
+    main(full=args.full)
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+招生章程全文检索
+
+首次运行时为 details/、tables/、special/ 建立索引（regulation_index.db），之后每次查询前
+按内容哈希增量更新（未变化时只扫描目录），查询返回学校、章节和摘要
+
+用法：
+    python scripts/search_regulations.py 体检
+    python scripts/search_regulations.py 外语语种 加分 --source details --limit 50
+    python scripts/search_regulations.py --rebuild
+"""
+
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from modules.search_index import DEFAULT_SOURCES, RegulationIndex
+
+logging.basicConfig(
+    level=logging.WARNING,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="招生章程全文检索")
+    parser.add_argument("terms", nargs="*", help="检索词（多个检索词同时出现在同一章节）")
+    parser.add_argument("--source", choices=DEFAULT_SOURCES, default=None, help="只检索某个目录")
+    parser.add_argument("--limit", type=int, default=20, help="最多显示条数")
+    parser.add_argument("--db", default="regulation_index.db", help="索引文件路径")
+    parser.add_argument("--rebuild", action="store_true", help="清空后重建索引")
+    parser.add_argument("--no-update", action="store_true", help="查询前不增量更新索引")
+    args = parser.parse_args()
+
+    with RegulationIndex(args.db) as index:
+        if args.rebuild or not args.no_update:
+            start = time.perf_counter()
+            counts = index.rebuild() if args.rebuild else index.update()
+            if args.rebuild or counts["added"] or counts["updated"] or counts["removed"]:
+                print(f"索引更新：新增 {counts['added']}，修改 {counts['updated']}，删除 {counts['removed']}，"
+                      f"未变 {counts['unchanged']}，耗时 {time.perf_counter() - start:.2f} 秒")
+
+        if not args.terms:
+            return
+
+        start = time.perf_counter()
+        results = index.search(args.terms, limit=args.limit, source=args.source)
+        doc_count, segment_count = index.count(args.terms, source=args.source)
+        elapsed = (time.perf_counter() - start) * 1000
+
+        print(f"“{' '.join(args.terms)}”：{doc_count} 篇章程 {segment_count} 个章节命中，"
+              f"显示前 {len(results)} 条（{elapsed:.1f} 毫秒）\n")
+        for result in results:
+            chapter = result["chapter"] or "（开头）"
+            if len(chapter) > 30:
+                chapter = chapter[:30] + "…"
+            print(f"{result['school_name']} [{result['source']}] {chapter}")
+            print(f"    {result['snippet']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,33 @@
 #!/usr/bin/env python3
 """
 验证数据准确性 - 本地Playwright方案
-- 20条一批，每批完成后保存副本
+- 整个运行只启动一次浏览器，20条一批保存副本
 - 第一条等待2秒防错
-- 支持断点续传
+- 支持断点续传（任务存储记录已验证的学校，--refresh 重新验证全部）
 """
 
 import pandas as pd
-import asyncio
-import time
-import json
+import logging
 import os
-from datetime import datetime
-from playwright.async_api import async_playwright
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from modules.engine import CrawlJob, build_parser, run_job
+from modules.table_cache import read_excel_cached
+from modules.task_store import TaskStore, RETRY_STATUS
 
 # ==================== 配置 ====================
 EXCEL_FILE = '招生章程.xlsx'
 COPY_FILE = '招生章程_验证副本.xlsx'
-BATCH_SIZE = 20  # 每批20条
-PROGRESS_FILE = 'verification_progress.json'
+BATCH_SIZE = 20  # 每批20条，每批完成后保存副本
+TASK_DB = 'gaokao_tasks.db'  # 验证进度、重试队列和死信列表
+TASK_JOB = 'verify'
+PROFILE_DIR = 'browser_profile/verify'  # 浏览器配置档（cookie、localStorage、磁盘缓存跨运行保留）
+DETAIL_LINK_SELECTOR = 'a[href*="/zsgs/zhangcheng/listVerifedZszc--"]'
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+logger = logging.getLogger(__name__)
 
 # ==================== 工具函数 ====================
 
@@ -28,7 +37,7 @@ def create_copy():
         print(f"✅ 副本已存在: {COPY_FILE}")
         return True
 
-    df = pd.read_excel(EXCEL_FILE)
+    df = read_excel_cached(EXCEL_FILE)
 
     # 添加两列
     df['验证状态'] = ''
@@ -39,28 +48,9 @@ def create_copy():
     print(f"   添加列: 验证状态、新招生章程详情页链接")
     return True
 
-def load_progress():
-    """加载进度"""
-    if os.path.exists(PROGRESS_FILE):
-        with open(PROGRESS_FILE, 'r') as f:
-            return json.load(f)
-    return {
-        'start_time': None,
-        'last_update': None,
-        'verified_count': 0,
-        'total_count': 0,
-        'current_batch': 0
-    }
-
-def save_progress(progress):
-    """保存进度"""
-    progress['last_update'] = datetime.now().isoformat()
-    with open(PROGRESS_FILE, 'w') as f:
-        json.dump(progress, f, ensure_ascii=False, indent=2)
-
 def get_schools_to_verify():
     """获取需要验证的学校"""
-    df = pd.read_excel(EXCEL_FILE)
+    df = read_excel_cached(EXCEL_FILE)
 
     schools = []
     for idx, row in df.iterrows():
@@ -85,159 +75,99 @@ def get_schools_to_verify():
 
     return schools
 
-async def verify_and_update_batch(schools, batch_num, total_batches):
-    """验证一批学校并更新副本"""
-
-    print(f"\n批次 {batch_num}/{total_batches} ({len(schools)}条)")
-    print("-" * 50)
-
-    results = []
-    start_time = time.time()
-
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(
-            headless=False,
-            args=['--disable-blink-features=AutomationControlled']
-        )
-
-        context = await browser.new_context(
-            user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
-            viewport={'width': 1920, 'height': 1080},
-            locale='zh-CN',
-            timezone_id='Asia/Shanghai',
-        )
-
-        page = await context.new_page()
-
-        for i, school in enumerate(schools):
-            print(f"  [{i+1}/{len(schools)}] {school['name']}", flush=True)
-
-            # 第一条等待2秒，后续等待0.5秒
-            wait_time = 2.0 if batch_num == 1 and i == 0 else 0.5
-
-            try:
-                await page.goto(school['enrollment_link'], timeout=30000, wait_until='domcontentloaded')
-                await asyncio.sleep(wait_time)
-
-                detail_links = await page.query_selector_all('a[href*="/zsgs/zhangcheng/listVerifedZszc--"]')
+class VerifyJob(CrawlJob):
+    """读取招生章程页的详情页链接，与现有数据比较，结果写入副本的两列"""
+
+    name = TASK_JOB
+    title = "数据准确性验证"
+
+    # 详情页链接出现即可读取，等待时间只作为超时兜底
+    markers = ()
+    selectors = (DETAIL_LINK_SELECTOR,)
+    end_markers = ()
+    first_wait = 2.0
+    wait = 0.5
+
+    # 自适应限速（每秒请求数）：正常时逐步提速，出错或响应过慢时自动降速
+    max_rate = 3.0
+    initial_rate = 2.0
+    min_rate = 0.2
+    profile_dir = PROFILE_DIR
+
+    def __init__(self, refresh: bool = False):
+        super().__init__(refresh)
+        self.schools = {}
+        self.results = {}
+        self.issues = 0
+
+    def load_tasks(self, store: TaskStore):
+        create_copy()
+        all_schools = get_schools_to_verify()
+        logger.info(f"待验证学校: {len(all_schools)} 条")
+        self.schools = {school['name']: school for school in all_schools}
+        store.add_tasks([{'school_name': school['name'], 'url': school['enrollment_link']}
+                         for school in all_schools], job=TASK_JOB)
+
+        # 重试队列中已不需要验证的学校直接跳过
+        for task in store.get_tasks(TASK_JOB, RETRY_STATUS):
+            if task['school_name'] not in self.schools:
+                store.update(task['school_name'], '跳过', TASK_JOB, note='已无需验证', count_attempt=False)
+
+    def select(self, store: TaskStore) -> list:
+        return [task for task in super().select(store) if task['school_name'] in self.schools]
+
+    async def extract(self, page, task: dict) -> str:
+        detail_links = await page.query_selector_all(DETAIL_LINK_SELECTOR)
+        if not detail_links:
+            return ''
+
+        link_text = await detail_links[0].inner_text()
+        link_href = await detail_links[0].get_attribute('href')
+        if link_href and not link_href.startswith('http'):
+            link_href = 'https://gaokao.chsi.com.cn' + link_href
+        return f"{link_text.strip()},{link_href}"
+
+    def save(self, task: dict, new_formatted: str) -> dict:
+        school = self.schools[task['school_name']]
+
+        if not new_formatted:
+            logger.info(f"    ⚠️  未找到详情页")
+            status, new_data = '⚠️未找到详情页', ''
+        elif new_formatted == school['existing_data']:
+            logger.info(f"    ✅")
+            status, new_data = '', ''
+        else:
+            logger.info(f"    ❌ 不一致")
+            status, new_data = '❌不一致', new_formatted
+
+        if status:
+            self.issues += 1
+        self.results[school['index']] = (status, new_data)
+        return {'note': status}
+
+    def on_failure(self, task: dict, kind: str, message: str, status: str):
+        school = self.schools.get(task['school_name'])
+        if school is not None:
+            self.results[school['index']] = (f'⚠️错误:{message[:30]}', '')
+
+    def checkpoint(self):
+        """把本批结果写入副本"""
+        if not self.results:
+            return
+
+        df = read_excel_cached(COPY_FILE)
+        for index, (status, new_data) in self.results.items():
+            df.at[index, '验证状态'] = status
+            df.at[index, '新招生章程详情页链接'] = new_data
+
+        df.to_excel(COPY_FILE, index=False, engine='openpyxl')
+        logger.info(f"✅ 副本已更新: {COPY_FILE}（{len(self.results)} 条）")
+        self.results = {}
+
+    def summary(self) -> dict:
+        return {'问题数据': self.issues, '副本文件': COPY_FILE}
 
-                if detail_links:
-                    link_text = await detail_links[0].inner_text()
-                    link_href = await detail_links[0].get_attribute('href')
-
-                    if link_href and not link_href.startswith('http'):
-                        link_href = 'https://gaokao.chsi.com.cn' + link_href
-
-                    new_formatted = f"{link_text.strip()},{link_href}"
-                    existing = school['existing_data']
-
-                    if new_formatted == existing:
-                        print(f"    ✅", flush=True)
-                        result = {'index': school['index'], 'status': '', 'new_data': ''}
-                    else:
-                        print(f"    ❌ 不一致", flush=True)
-                        result = {'index': school['index'], 'status': '❌不一致', 'new_data': new_formatted}
-                else:
-                    print(f"    ⚠️  未找到详情页", flush=True)
-                    result = {'index': school['index'], 'status': '⚠️未找到详情页', 'new_data': ''}
-
-            except Exception as e:
-                print(f"    ❌ 错误: {str(e)[:40]}", flush=True)
-                result = {'index': school['index'], 'status': f'⚠️错误:{str(e)[:30]}', 'new_data': ''}
-
-            results.append(result)
-
-            # 延迟
-            if i < len(schools) - 1:
-                await asyncio.sleep(0.3)
-
-        await browser.close()
-
-    elapsed = time.time() - start_time
-    print(f"\n批次耗时: {elapsed:.1f}秒")
-
-    # 暂停1-2秒
-    print("保存副本中...")
-    await asyncio.sleep(1.5)
-
-    # 更新副本
-    df = pd.read_excel(COPY_FILE)
-    for r in results:
-        df.at[r['index'], '验证状态'] = r['status']
-        df.at[r['index'], '新招生章程详情页链接'] = r['new_data']
-
-    df.to_excel(COPY_FILE, index=False, engine='openpyxl')
-    print(f"✅ 副本已更新: {COPY_FILE}")
-
-    return results
-
-async def main():
-    """主流程"""
-    print("=" * 60)
-    print("数据准确性验证 - 本地Playwright")
-    print("=" * 60)
-
-    # 1. 创建副本
-    print("\n步骤1: 创建副本")
-    create_copy()
-
-    # 2. 加载进度
-    print("\n步骤2: 加载进度")
-    progress = load_progress()
-    if progress['verified_count'] > 0:
-        print(f"  已验证: {progress['verified_count']} 条")
-        print(f"  上次批次: {progress['current_batch']}")
-
-    # 3. 获取待验证学校
-    print("\n步骤3: 获取待验证学校")
-    all_schools = get_schools_to_verify()
-    print(f"  总计: {len(all_schools)} 条")
-
-    if progress['total_count'] == 0:
-        progress['total_count'] = len(all_schools)
-
-    if len(all_schools) == 0:
-        print("  没有需要验证的数据")
-        return
-
-    # 4. 分批验证
-    print(f"\n步骤4: 开始验证（每批{BATCH_SIZE}条）")
-    print("=" * 60)
-
-    if progress['start_time'] is None:
-        progress['start_time'] = datetime.now().isoformat()
-        save_progress(progress)
-
-    total_batches = (len(all_schools) + BATCH_SIZE - 1) // BATCH_SIZE
-
-    for batch_idx in range(progress['current_batch'], total_batches):
-        start_idx = batch_idx * BATCH_SIZE
-        end_idx = min(start_idx + BATCH_SIZE, len(all_schools))
-        batch_schools = all_schools[start_idx:end_idx]
-
-        # 验证并更新
-        results = await verify_and_update_batch(batch_schools, batch_idx + 1, total_batches)
-
-        # 更新进度
-        progress['verified_count'] += len(batch_schools)
-        progress['current_batch'] = batch_idx + 1
-        save_progress(progress)
-
-        # 统计
-        issues = len([r for r in results if r['status']])
-        print(f"本批问题: {issues}/{len(results)}")
-
-        # 总进度
-        percentage = progress['verified_count'] / len(all_schools) * 100
-        print(f"总进度: {progress['verified_count']}/{len(all_schools)} ({percentage:.1f}%)")
-        print(f"✅ 进度已保存，可随时中断\n")
-
-    # 5. 完成
-    print("=" * 60)
-    print("验证完成！")
-    print("=" * 60)
-    print(f"\n副本文件: {COPY_FILE}")
-    print(f"筛选'验证状态'列即可查看问题数据")
 
 if __name__ == '__main__':
-    asyncio.run(main())
+    args = build_parser("数据准确性验证 - 本地Playwright").parse_args()
+    run_job(VerifyJob(refresh=args.refresh), args, task_db=TASK_DB, checkpoint_every=BATCH_SIZE)
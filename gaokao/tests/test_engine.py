@@ -0,0 +1,137 @@
+"""
+CrawlEngine 运行、重试队列和死信测试（用不启动浏览器的任务定义）
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from modules import engine as engine_module
+from modules.engine import CrawlEngine, CrawlJob, CrawlerStartError, TaskFailed
+from modules.task_store import TaskStore
+
+SCHOOLS = ["甲大学", "乙大学", "丙大学", "丁大学", "戊大学"]
+
+
+class FakeJob(CrawlJob):
+    """prefetch 按预设结果依次返回：字符串为页面内容，TaskFailed 为失败，None 表示需要浏览器"""
+
+    name = "fake"
+    title = "测试任务"
+
+    def __init__(self, script: dict):
+        super().__init__()
+        self.script = {school: list(results) for school, results in script.items()}
+        self.calls = {school: 0 for school in script}
+
+    def load_tasks(self, store: TaskStore):
+        store.add_tasks([{"school_name": school, "url": f"https://example.com/{school}"}
+                         for school in self.script], job=self.name)
+
+    async def prefetch(self, task: dict):
+        school = task["school_name"]
+        self.calls[school] += 1
+        result = self.script[school].pop(0)
+        if isinstance(result, TaskFailed):
+            raise result
+        return result
+
+    async def extract(self, page, task: dict):
+        return await page.content()
+
+    def save(self, task: dict, result) -> dict:
+        return {"content": result}
+
+
+@pytest.fixture(autouse=True)
+def no_retry_delay(monkeypatch):
+    """重试退避时间为0，重试到期任务立即处理"""
+    monkeypatch.setattr("modules.task_store.random.uniform", lambda a, b: 0.0)
+
+
+def run_engine(job: CrawlJob, db_path: Path) -> dict:
+    engine = CrawlEngine(job, task_db=str(db_path))
+    return asyncio.run(engine.run())
+
+
+def test_retry_queue_and_dead_letters(tmp_path):
+    """可重试错误重试到成功或次数用完进入死信，不可重试错误直接进入死信"""
+    job = FakeJob({
+        "甲大学": ["内容"],
+        "乙大学": [TaskFailed("timeout"), "内容"],
+        "丙大学": [TaskFailed("timeout")] * 3,
+        "丁大学": [TaskFailed("extract_failed")],
+    })
+    stats = run_engine(job, tmp_path / "tasks.db")
+
+    assert stats["completed"] == 2
+    assert stats["failed"] == 2
+    assert stats["retry"] == 0
+    assert job.calls == {"甲大学": 1, "乙大学": 2, "丙大学": 3, "丁大学": 1}
+
+    with TaskStore(str(tmp_path / "tasks.db")) as store:
+        assert store.get_task("乙大学", "fake")["status"] == "成功"
+        assert store.get_task("乙大学", "fake")["attempts"] == 0
+        dead = {task["school_name"]: task for task in store.get_dead_letters("fake")}
+        assert set(dead) == {"丙大学", "丁大学"}
+        assert dead["丙大学"]["attempts"] == 3
+        assert dead["丁大学"]["error_kind"] == "extract_failed"
+
+
+def test_finished_tasks_are_not_reprocessed(tmp_path):
+    """再次运行只处理未完成的任务"""
+    run_engine(FakeJob({"甲大学": ["内容"], "乙大学": [TaskFailed("extract_failed")]}), tmp_path / "tasks.db")
+
+    job = FakeJob({"甲大学": [], "乙大学": []})
+    stats = run_engine(job, tmp_path / "tasks.db")
+    assert stats["processed"] == 0
+    assert job.calls == {"甲大学": 0, "乙大学": 0}
+
+
+def test_browser_start_failure_stops_without_touching_tasks(tmp_path, monkeypatch):
+    """浏览器无法启动时停止运行，只尝试启动一次，任务状态和尝试次数不变"""
+    starts = []
+
+    class BrokenCrawler:
+        def __init__(self, **kwargs):
+            pass
+
+        async def start(self):
+            starts.append(1)
+            raise RuntimeError("Executable doesn't exist")
+
+        async def close(self):
+            pass
+
+    monkeypatch.setattr(engine_module, "RegulationCrawler", BrokenCrawler)
+    job = FakeJob({school: [None] for school in SCHOOLS})
+    engine = CrawlEngine(job, concurrency=2, task_db=str(tmp_path / "tasks.db"))
+
+    with pytest.raises(CrawlerStartError):
+        asyncio.run(engine.run())
+
+    assert len(starts) == 1
+    with TaskStore(str(tmp_path / "tasks.db")) as store:
+        for school in SCHOOLS:
+            task = store.get_task(school, "fake")
+            assert task["status"] == "待爬取"
+            assert task["attempts"] == 0
+            assert task["error_kind"] is None
+        assert store.get_dead_letters("fake") == []
+
+
+def test_job_missing_hook_fails_on_construction():
+    """未实现 save 的任务定义在创建实例时报错，而不是爬取中途失败"""
+
+    class IncompleteJob(CrawlJob):
+        def load_tasks(self, store: TaskStore):
+            pass
+
+        async def extract(self, page, task: dict):
+            return None
+
+    with pytest.raises(TypeError):
+        IncompleteJob()
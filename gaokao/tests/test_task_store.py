@@ -0,0 +1,38 @@
+"""
+TaskStore 重试计数测试
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from modules.task_store import TaskStore, RETRY_STATUS, DEAD_STATUS
+
+
+def test_success_resets_attempts(tmp_path):
+    """成功过两次的学校第一次超时仍进入重试队列，而不是死信列表"""
+    with TaskStore(str(tmp_path / "tasks.db")) as store:
+        store.add_tasks([{"school_name": "测试大学", "url": "https://example.com/a"}])
+        store.update("测试大学", "成功", content="第一次")
+        store.update("测试大学", "成功", content="第二次")
+        assert store.get_task("测试大学")["attempts"] == 0
+
+        assert store.fail("测试大学", "timeout") == RETRY_STATUS
+        task = store.get_task("测试大学")
+        assert task["attempts"] == 1
+        assert task["next_retry_at"] is not None
+
+
+def test_failures_after_success_reach_dead_letters(tmp_path):
+    """成功后的连续失败从零计数，次数用完才进入死信列表"""
+    with TaskStore(str(tmp_path / "tasks.db")) as store:
+        store.update("测试大学", "成功", content="内容")
+        assert store.fail("测试大学", "timeout") == RETRY_STATUS
+        assert store.fail("测试大学", "timeout") == RETRY_STATUS
+        assert store.fail("测试大学", "timeout") == DEAD_STATUS
+
+        store.update("测试大学", "成功", content="内容")
+        task = store.get_task("测试大学")
+        assert task["attempts"] == 0
+        assert task["error_kind"] is None
+        assert task["next_retry_at"] is None
@@ -2,6 +2,7 @@ import os
 import sys
 # 禁用生成 __pycache__
 sys.dont_write_bytecode = True
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import PatternFill, Font, Alignment, Border, Side
 from openpyxl.utils import get_column_letter
 from bs4 import BeautifulSoup
@@ -164,3 +165,19 @@ def autofit_columns(ws, max_cols, max_width=60):
             # 留一点余量 (+2)，但不超过最大限制
             adjusted_width = min(max_length + 2, max_width)
             ws.column_dimensions[col_letter].width = adjusted_width
+
+def styled_header_row(ws, headers):
+    """
+    生成只写工作表 (Workbook(write_only=True)) 的表头行，样式与 get_header_style 一致
+    用法: ws.append(styled_header_row(ws, headers))
+    """
+    header_fill, header_font = get_header_style()
+    align_center, _, _ = get_common_styles()
+    row = []
+    for header in headers:
+        cell = WriteOnlyCell(ws, value=header)
+        cell.fill = header_fill
+        cell.font = header_font
+        cell.alignment = align_center
+        row.append(cell)
+    return row
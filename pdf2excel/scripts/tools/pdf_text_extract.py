@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
-import sys; sys.dont_write_bytecode = True"""
+import sys; sys.dont_write_bytecode = True
+"""
 PDF 文本提取器 - 保留布局结构
 适用于有文本但无表格结构的 PDF
 """
@@ -9,6 +10,15 @@ import pandas as pd
 from pathlib import Path
 import sys
 
+# 自动定位项目根目录并加入 sys.path
+project_root = Path(__file__).resolve().parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from openpyxl import Workbook
+
+from scripts.common.excel_utils import styled_header_row
+
 def extract_text_with_layout():
     """提取文本并保留布局"""
     pdf_path = sys.argv[1] if len(sys.argv) > 1 else "zhejiang.pdf"
@@ -71,19 +81,29 @@ def extract_text_with_layout():
         # 按页码和Y坐标排序
         df = df.sort_values(['页码', 'Y坐标', 'X坐标'])
         
-        with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-            # 完整数据（带坐标）
-            df.to_excel(writer, sheet_name='完整数据', index=False)
-            
-            # 纯文本（按页分组）
-            for page_num in df['页码'].unique():
-                page_df = df[df['页码'] == page_num]['内容']
-                page_df.to_excel(writer, sheet_name=f'第{page_num}页', index=False, header=False)
-            
-            # 合并所有文本
-            all_text_df = df['内容']
-            all_text_df.to_excel(writer, sheet_name='全部文本', index=False, header=False)
-        
+        # 流式写入（只写模式），内存占用不随行数增长
+        columns = ['页码', 'X坐标', 'Y坐标', '内容']
+        workbook = Workbook(write_only=True)
+
+        # 完整数据（带坐标）
+        ws = workbook.create_sheet('完整数据')
+        ws.append(styled_header_row(ws, columns))
+        for row in df[columns].itertuples(index=False, name=None):
+            ws.append(list(row))
+
+        # 纯文本（按页分组，排序后同一页的行是连续的）
+        for page_num, page_df in df.groupby('页码', sort=False):
+            ws = workbook.create_sheet(f'第{page_num}页')
+            for text in page_df['内容']:
+                ws.append([text])
+
+        # 合并所有文本
+        ws = workbook.create_sheet('全部文本')
+        for text in df['内容']:
+            ws.append([text])
+
+        workbook.save(output_path)
+
         print(f"\n🎉 成功！文件: {output_path.absolute()}")
         print(f"📊 包含 {len(df['页码'].unique()) + 2} 个工作表")
         print(f"\n💡 提示:")